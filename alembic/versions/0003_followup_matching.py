@@ -0,0 +1,34 @@
+"""followup_matching
+
+Revision ID: 0003_followup_matching
+Revises: 0002_add_clinical_fields
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_followup_matching'
+down_revision = '0002_add_clinical_fields'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'qct_followups',
+        sa.Column('prior_nodule_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('qct_nodules.id'), nullable=True),
+    )
+    op.add_column('qct_followups', sa.Column('vdt_days', sa.Integer(), nullable=True))
+    op.create_index('ix_qct_followups_prior_nodule_id', 'qct_followups', ['prior_nodule_id'])
+    op.create_index('ix_qct_followups_nodule_id', 'qct_followups', ['nodule_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_qct_followups_nodule_id', table_name='qct_followups')
+    op.drop_index('ix_qct_followups_prior_nodule_id', table_name='qct_followups')
+    op.drop_column('qct_followups', 'vdt_days')
+    op.drop_column('qct_followups', 'prior_nodule_id')
@@ -0,0 +1,50 @@
+"""nodule_trajectories
+
+Revision ID: 0004_nodule_trajectories
+Revises: 0003_followup_matching
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_nodule_trajectories'
+down_revision = '0003_followup_matching'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'nodule_trajectory_points',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column('patient_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('patients.id'), nullable=False),
+        sa.Column('track_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('nodule_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('qct_nodules.id'), nullable=False),
+        sa.Column('study_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('studies.id'), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('study_uid', sa.String(length=64), nullable=False),
+        sa.Column('study_date', sa.Date(), nullable=False),
+        sa.Column('nodule_uid', sa.String(length=64), nullable=False),
+        sa.Column('location', sa.String(length=64), nullable=False),
+        sa.Column('volume_mm3', sa.Float(), nullable=False),
+        sa.Column('diameter_mm', sa.Float(), nullable=False),
+        sa.Column('vdt_days', sa.Integer(), nullable=True),
+        sa.Column('growth_percent', sa.Float(), nullable=True),
+        sa.Column('risk', sa.String(length=32), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_trajectory_patient_track', 'nodule_trajectory_points', ['patient_id', 'track_id', 'position'])
+    op.create_index('ix_trajectory_track', 'nodule_trajectory_points', ['track_id', 'position'])
+    op.create_index('ix_trajectory_nodule', 'nodule_trajectory_points', ['nodule_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trajectory_nodule', table_name='nodule_trajectory_points')
+    op.drop_index('ix_trajectory_track', table_name='nodule_trajectory_points')
+    op.drop_index('ix_trajectory_patient_track', table_name='nodule_trajectory_points')
+    op.drop_table('nodule_trajectory_points')
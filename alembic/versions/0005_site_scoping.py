@@ -0,0 +1,53 @@
+"""site_scoping
+
+Revision ID: 0005_site_scoping
+Revises: 0004_nodule_trajectories
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_site_scoping'
+down_revision = '0004_nodule_trajectories'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_studies_site_date', 'studies', ['site_id', 'study_date'])
+    op.create_index('ix_studies_site_status_date', 'studies', ['site_id', 'status', 'study_date'])
+    op.create_index('ix_studies_site_risk_date', 'studies', ['site_id', 'overall_risk', 'study_date'])
+    op.create_index('ix_patients_site_id', 'patients', ['site_id'])
+    op.create_index('ix_sites_client_id', 'sites', ['client_id'])
+    op.create_index('ix_qct_followups_current_study_id', 'qct_followups', ['current_study_id'])
+    op.create_index('ix_ingestion_logs_study_id', 'ingestion_logs', ['study_id'])
+
+    op.create_table(
+        'site_overview_stats',
+        sa.Column('site_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('sites.id'), primary_key=True, nullable=False),
+        sa.Column('client_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('clients.id'), nullable=False),
+        sa.Column('total_patients', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_studies', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_nodules', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('low_risk', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('medium_risk', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('high_risk', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_site_overview_stats_client', 'site_overview_stats', ['client_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_site_overview_stats_client', table_name='site_overview_stats')
+    op.drop_table('site_overview_stats')
+    op.drop_index('ix_ingestion_logs_study_id', table_name='ingestion_logs')
+    op.drop_index('ix_qct_followups_current_study_id', table_name='qct_followups')
+    op.drop_index('ix_sites_client_id', table_name='sites')
+    op.drop_index('ix_patients_site_id', table_name='patients')
+    op.drop_index('ix_studies_site_risk_date', table_name='studies')
+    op.drop_index('ix_studies_site_status_date', table_name='studies')
+    op.drop_index('ix_studies_site_date', table_name='studies')
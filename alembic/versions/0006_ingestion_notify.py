@@ -0,0 +1,42 @@
+"""ingestion_notify
+
+Revision ID: 0006_ingestion_notify
+Revises: 0005_site_scoping
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_ingestion_notify'
+down_revision = '0005_site_scoping'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Only the id travels in the payload (NOTIFY caps it at 8000 bytes); listeners
+    # load the row once per worker.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_ingestion_log() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('ingestion_logs', json_build_object('id', NEW.id, 'op', TG_OP)::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER ingestion_logs_notify
+        AFTER INSERT OR UPDATE ON ingestion_logs
+        FOR EACH ROW EXECUTE FUNCTION notify_ingestion_log()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS ingestion_logs_notify ON ingestion_logs")
+    op.execute("DROP FUNCTION IF EXISTS notify_ingestion_log()")
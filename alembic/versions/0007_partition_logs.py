@@ -0,0 +1,141 @@
+"""partition_logs
+
+Revision ID: 0007_partition_logs
+Revises: 0006_ingestion_notify
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_partition_logs'
+down_revision = '0006_ingestion_notify'
+branch_labels = None
+depends_on = None
+
+# Months created ahead of today; scripts/partition_maintenance.py keeps this window moving.
+PREMAKE_MONTHS = 3
+
+TABLES = {
+    'ingestion_logs': {
+        'key': 'started_at',
+        'columns': """
+            id uuid NOT NULL,
+            study_id uuid NOT NULL REFERENCES studies(id),
+            status varchar(32) NOT NULL,
+            message text NOT NULL,
+            started_at timestamptz NOT NULL,
+            completed_at timestamptz,
+            created_at timestamptz,
+            updated_at timestamptz
+        """,
+        'column_names': 'id, study_id, status, message, started_at, completed_at, created_at, updated_at',
+        'indexes': {
+            'ix_ingestion_logs_study_id': 'study_id',
+            'ix_ingestion_logs_started_at': 'started_at',
+        },
+    },
+    'access_audits': {
+        'key': 'accessed_at',
+        'columns': """
+            id uuid NOT NULL,
+            user_id uuid NOT NULL REFERENCES users(id),
+            study_id uuid NOT NULL REFERENCES studies(id),
+            action varchar(32) NOT NULL,
+            ip_address varchar(64) NOT NULL,
+            accessed_at timestamptz NOT NULL,
+            created_at timestamptz,
+            updated_at timestamptz
+        """,
+        'column_names': 'id, user_id, study_id, action, ip_address, accessed_at, created_at, updated_at',
+        'indexes': {
+            'ix_access_audits_study_id': 'study_id',
+            'ix_access_audits_accessed_at': 'accessed_at',
+        },
+    },
+}
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _months(first: date, last: date):
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month = _add_months(month, 1)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    this_month = datetime.utcnow().date().replace(day=1)
+    for table, spec in TABLES.items():
+        legacy = f'{table}_unpartitioned'
+        key = spec['key']
+        op.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+        # Index names are schema-wide, so free them up for the partitioned table.
+        op.execute(f'ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey')
+        for index in spec['indexes']:
+            op.execute(f'ALTER INDEX IF EXISTS {index} RENAME TO {index}_unpartitioned')
+        if table == 'ingestion_logs':
+            op.execute(f'DROP TRIGGER IF EXISTS ingestion_logs_notify ON {legacy}')
+
+        # The partition key has to be part of the primary key.
+        op.execute(
+            f"""
+            CREATE TABLE {table} (
+                {spec['columns']},
+                PRIMARY KEY (id, {key})
+            ) PARTITION BY RANGE ({key})
+            """
+        )
+        # Catches rows outside every monthly range so inserts never fail.
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+        oldest = bind.execute(sa.text(f'SELECT min({key}) FROM {legacy}')).scalar()
+        first = min(oldest.date(), this_month) if oldest else this_month
+        for month in _months(first, _add_months(this_month, PREMAKE_MONTHS)):
+            op.execute(
+                f"""
+                CREATE TABLE {table}_{month:%Y_%m} PARTITION OF {table}
+                FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{_add_months(month, 1).isoformat()} 00:00:00+00')
+                """
+            )
+        op.execute(f"INSERT INTO {table} ({spec['column_names']}) SELECT {spec['column_names']} FROM {legacy}")
+        op.execute(f'DROP TABLE {legacy}')
+        for index, column in spec['indexes'].items():
+            op.execute(f'CREATE INDEX {index} ON {table} ({column})')
+
+    op.execute(
+        """
+        CREATE TRIGGER ingestion_logs_notify
+        AFTER INSERT OR UPDATE ON ingestion_logs
+        FOR EACH ROW EXECUTE FUNCTION notify_ingestion_log()
+        """
+    )
+
+
+def downgrade() -> None:
+    for table, spec in TABLES.items():
+        partitioned = f'{table}_partitioned'
+        op.execute(f'ALTER TABLE {table} RENAME TO {partitioned}')
+        op.execute(f'ALTER TABLE {partitioned} RENAME CONSTRAINT {table}_pkey TO {partitioned}_pkey')
+        for index in spec['indexes']:
+            op.execute(f'DROP INDEX IF EXISTS {index}')
+        op.execute(f"CREATE TABLE {table} ({spec['columns']}, PRIMARY KEY (id))")
+        op.execute(f"INSERT INTO {table} ({spec['column_names']}) SELECT {spec['column_names']} FROM {partitioned}")
+        # Drops every partition with it.
+        op.execute(f'DROP TABLE {partitioned}')
+    op.execute('CREATE INDEX ix_ingestion_logs_study_id ON ingestion_logs (study_id)')
+    op.execute(
+        """
+        CREATE TRIGGER ingestion_logs_notify
+        AFTER INSERT OR UPDATE ON ingestion_logs
+        FOR EACH ROW EXECUTE FUNCTION notify_ingestion_log()
+        """
+    )
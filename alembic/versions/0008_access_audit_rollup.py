@@ -0,0 +1,82 @@
+"""access_audit_rollup
+
+Revision ID: 0008_access_audit_rollup
+Revises: 0007_partition_logs
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_access_audit_rollup'
+down_revision = '0007_partition_logs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Indexes on the partitioned parent cascade to every monthly partition.
+    op.drop_index('ix_access_audits_accessed_at', table_name='access_audits')
+    op.drop_index('ix_access_audits_study_id', table_name='access_audits')
+    op.create_index(
+        'ix_access_audits_accessed_id',
+        'access_audits',
+        ['accessed_at', 'id'],
+        postgresql_include=['user_id', 'study_id', 'action', 'ip_address'],
+    )
+    op.create_index(
+        'ix_access_audits_user_accessed',
+        'access_audits',
+        ['user_id', 'accessed_at', 'id'],
+        postgresql_include=['study_id', 'action', 'ip_address'],
+    )
+    op.create_index(
+        'ix_access_audits_study_accessed',
+        'access_audits',
+        ['study_id', 'accessed_at', 'id'],
+        postgresql_include=['user_id', 'action', 'ip_address'],
+    )
+
+    op.create_table(
+        'access_audit_daily',
+        sa.Column('day', sa.Date(), primary_key=True, nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), primary_key=True, nullable=False),
+        sa.Column('study_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('studies.id'), primary_key=True, nullable=False),
+        sa.Column('access_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_accessed_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        'ix_access_audit_daily_user_day',
+        'access_audit_daily',
+        ['user_id', 'day'],
+        postgresql_include=['study_id', 'access_count'],
+    )
+    op.create_index(
+        'ix_access_audit_daily_study_day',
+        'access_audit_daily',
+        ['study_id', 'day'],
+        postgresql_include=['user_id', 'access_count'],
+    )
+    # Backfill from the audit rows still retained; new rows are counted as they are written.
+    op.execute(
+        """
+        INSERT INTO access_audit_daily (day, user_id, study_id, access_count, last_accessed_at)
+        SELECT (accessed_at AT TIME ZONE 'UTC')::date, user_id, study_id, count(*), max(accessed_at)
+        FROM access_audits
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_access_audit_daily_study_day', table_name='access_audit_daily')
+    op.drop_index('ix_access_audit_daily_user_day', table_name='access_audit_daily')
+    op.drop_table('access_audit_daily')
+    op.drop_index('ix_access_audits_study_accessed', table_name='access_audits')
+    op.drop_index('ix_access_audits_user_accessed', table_name='access_audits')
+    op.drop_index('ix_access_audits_accessed_id', table_name='access_audits')
+    op.create_index('ix_access_audits_study_id', 'access_audits', ['study_id'])
+    op.create_index('ix_access_audits_accessed_at', 'access_audits', ['accessed_at'])
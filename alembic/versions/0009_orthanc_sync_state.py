@@ -0,0 +1,29 @@
+"""orthanc_sync_state
+
+Revision ID: 0009_orthanc_sync_state
+Revises: 0008_access_audit_rollup
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_orthanc_sync_state'
+down_revision = '0008_access_audit_rollup'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'orthanc_sync_state',
+        sa.Column('name', sa.String(length=64), primary_key=True, nullable=False),
+        sa.Column('last_seq', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('orthanc_sync_state')
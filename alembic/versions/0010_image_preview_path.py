@@ -0,0 +1,24 @@
+"""image preview_path
+
+Revision ID: 0010_image_preview_path
+Revises: 0009_orthanc_sync_state
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010_image_preview_path'
+down_revision = '0009_orthanc_sync_state'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('images', sa.Column('preview_path', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('images', 'preview_path')
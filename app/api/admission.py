@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Served without a database session, so never queued.
+UNLIMITED_PREFIXES = ("/static/", "/images/", "/_healthz", "/_readyz", "/_profile")
+
+
+class AdmissionMiddleware:
+    """Runs at most DB_POOL_SIZE + DB_MAX_OVERFLOW requests at once per worker; the rest wait here.
+
+    A request's session keeps its connection from get_current_user until the
+    dependency teardown, across several threadpool hops. Left unbounded, a
+    burst fills the threadpool with requests waiting for a connection while
+    the requests holding one wait for a thread, and everything stalls until
+    DB_POOL_TIMEOUT. Queueing in the event loop before any connection is
+    taken keeps pool waits at zero. Event streams stay open indefinitely and
+    are not counted.
+    """
+
+    def __init__(self, app: ASGIApp, limit: int | None = None) -> None:
+        self.app = app
+        self.limit = limit or settings.db_pool_size + settings.db_max_overflow
+        self._limiter: anyio.CapacityLimiter | None = None
+
+    def _exempt(self, scope: Scope) -> bool:
+        path = scope["path"]
+        if path.startswith(UNLIMITED_PREFIXES) or path == settings.metrics_path:
+            return True
+        return "text/event-stream" in Headers(scope=scope).get("accept", "")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._exempt(scope):
+            await self.app(scope, receive, send)
+            return
+        if self._limiter is None:
+            # Created on first use: it binds to the running event loop.
+            self._limiter = anyio.CapacityLimiter(self.limit)
+        async with self._limiter:
+            await self.app(scope, receive, send)
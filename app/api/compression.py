@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def _qvalues(accept_encoding: str) -> dict[str, float]:
+    qvalues: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, *params = (part.strip() for part in item.split(";"))
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[name.lower()] = q
+    return qvalues
+
+
+def negotiate_encoding(accept_encoding: str, available: tuple[str, ...]) -> str | None:
+    """The coding of ``available`` the client weights highest, ``None`` if none is acceptable.
+
+    Follows RFC 9110: ``q=0`` refuses a coding and ``*`` covers the codings not
+    listed. Ties go to the earlier entry of ``available``.
+    """
+    qvalues = _qvalues(accept_encoding)
+    wildcard = qvalues.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = qvalues.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=brotli_quality)
+            self._compress = self._impl.process
+            self._flush = self._impl.flush
+            self._finish = self._impl.finish
+        else:
+            self._impl = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._compress = self._impl.compress
+            self._flush = lambda: self._impl.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._impl.flush
+
+    def chunk(self, data: bytes, more_body: bool) -> bytes:
+        # Streaming bodies are flushed per chunk so clients see data as it is produced.
+        if more_body:
+            return self._compress(data) + self._flush()
+        return self._compress(data) + self._finish()
+
+
+class CompressionMiddleware:
+    """Negotiated gzip/brotli for dynamic responses above ``minimum_size``.
+
+    Pure ASGI, so streaming responses stay streaming. Responses that are
+    already encoded (precompressed assets, the CSV export), partial content,
+    event streams and non-text types pass through untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        available = ("br", "gzip") if brotli is not None else ("gzip",)
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), available)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        compressor: _Compressor | None = None
+        passthrough = False
+        pending: list[bytes] = []
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    message["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or "content-range" in headers
+                    or content_type.startswith("text/event-stream")
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                # Hold small leading chunks back: BaseHTTPMiddleware re-streams even
+                # tiny bodies, so the size decision needs the first minimum_size bytes.
+                pending.append(body)
+                size = sum(len(part) for part in pending)
+                if more_body and size < self.minimum_size:
+                    return
+                body = b"".join(pending)
+                pending.clear()
+                assert start_message is not None
+                headers = MutableHeaders(raw=start_message["headers"])
+                if not more_body and size < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body, "more_body": False})
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                data = compressor.chunk(body, more_body)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(data))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+            await send(
+                {"type": "http.response.body", "body": compressor.chunk(body, more_body), "more_body": more_body}
+            )
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.instrumentation import observe_request, request_usage, track_request
+
+
+class DBTimingMiddleware:
+    """Adds the request's database time to a ``Server-Timing`` header and the per-route histograms.
+
+    The header carries the statements run before the response started
+    (``db;dur=12.3;desc="4 queries", db-pool;dur=0.2``), so browser dev tools
+    show it next to the request; streamed bodies (CSV export) may run more
+    afterwards, which only the histograms see. Event streams are skipped.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        usage, token = track_request(scope)
+        streaming = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal streaming
+            if message["type"] == "http.response.start":
+                streaming = Headers(raw=message["headers"]).get("content-type", "").startswith("text/event-stream")
+                if not streaming:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing",
+                        f'db;dur={usage.db_seconds * 1000:.1f};desc="{usage.queries} queries", '
+                        f"db-pool;dur={usage.pool_wait_seconds * 1000:.1f}",
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                request_usage.reset(token)
+            if not streaming:
+                observe_request(usage)
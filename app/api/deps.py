@@ -1,14 +1,20 @@
 from __future__ import annotations
 
 from collections.abc import Generator
+from datetime import date
+from uuid import UUID
 
-from fastapi import Depends, Request, status
+from fastapi import Depends, Query, Request, status
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.security import ensure_db_user, get_session_user
 from app.db.models import User
 from app.db.session import SessionLocal
+from app.services.date_range import DATE_RANGE_PRESETS, DateRange
+from app.services.provider import DataProvider
+from app.services.scope import TenantScope
 
 
 def get_db() -> Generator:
@@ -19,6 +25,11 @@ def get_db() -> Generator:
         db.close()
 
 
+def get_provider(request: Request) -> DataProvider:
+    # Built and warmed once per worker by the app lifespan.
+    return request.app.state.provider
+
+
 def get_current_user(
     request: Request,
     db: Session = Depends(get_db),
@@ -27,3 +38,50 @@ def get_current_user(
     if auth_user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
     return ensure_db_user(db, auth_user)
+
+
+def require_audit_role(request: Request, current_user: User = Depends(get_current_user)) -> User:
+    # The configured role wins over the one stored when the users row was first created.
+    auth_user = getattr(request.state, "auth_user", None) or get_session_user(request)
+    role = auth_user.role if auth_user else current_user.role
+    allowed = {item.strip() for item in settings.audit_roles.split(",") if item.strip()}
+    if role not in allowed:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return current_user
+
+
+def get_tenant_scope(
+    site_id: UUID | None = Query(default=None),
+    client_id: UUID | None = Query(default=None),
+) -> TenantScope:
+    return TenantScope(site_id=site_id, client_id=client_id)
+
+
+def _parse_date(value: str | None, name: str) -> date | None:
+    # Filter forms submit empty inputs as "", which should mean "no bound".
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid {name}; expected YYYY-MM-DD",
+        ) from None
+
+
+def get_date_range(
+    date_from: str | None = Query(default=None),
+    date_to: str | None = Query(default=None),
+    preset: str | None = Query(default=None, alias="range"),
+) -> DateRange:
+    if preset and preset not in DATE_RANGE_PRESETS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Invalid range; expected one of {', '.join(DATE_RANGE_PRESETS)}",
+        )
+    return DateRange(
+        preset=preset or None,
+        date_from=_parse_date(date_from, "date_from"),
+        date_to=_parse_date(date_to, "date_to"),
+    )
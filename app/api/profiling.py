@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import uuid
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security import is_private_address
+from app.services.profiler import finish_request_profile, profiled_request, start_request_profile
+
+
+class ProfileRequestMiddleware:
+    """Samples a single request that carries PROFILE_HEADER (PROFILING_ENABLED, private clients only).
+
+    The response names the profile in the same header; once the response is
+    complete, GET /_profile/requests/<name> returns its collapsed stacks. Only
+    the event loop while it runs this request's tasks, and threadpool threads
+    while they run its calls, are sampled. ``busy`` means another profile was
+    running on this worker and the request was not profiled.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        client = scope.get("client")
+        if (
+            scope["type"] != "http"
+            or not Headers(scope=scope).get(settings.profile_header)
+            or not is_private_address(client[0] if client else None)
+        ):
+            await self.app(scope, receive, send)
+            return
+        marker = object()
+        sampler = start_request_profile(marker)
+        name = uuid.uuid4().hex if sampler is not None else "busy"
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[settings.profile_header] = name
+            await send(message)
+
+        if sampler is None:
+            await self.app(scope, receive, send_wrapper)
+            return
+        token = profiled_request.set(marker)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiled_request.reset(token)
+            await run_in_threadpool(finish_request_profile, sampler, name)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any
+
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+class ModelJSONResponse(Response):
+    media_type = "application/json"
+
+
+def model_response(
+    response_type: Any, content: Any, status_code: int = 200, validate: bool = True
+) -> Response:
+    """Validate ``content`` once as ``response_type`` and render it with pydantic-core.
+
+    Returning a Response makes FastAPI skip its own response_model pass, and
+    ``dump_json`` writes bytes directly instead of going through
+    jsonable_encoder and json.dumps. Keep ``response_model`` on the route for
+    the OpenAPI schema.
+
+    Pass ``validate=False`` when ``content`` is already built from the schema
+    models (e.g. ``model_construct`` over typed column rows); it is then only
+    serialized.
+    """
+    adapter = _adapter(response_type)
+    value = adapter.validate_python(content, from_attributes=True) if validate else content
+    return ModelJSONResponse(adapter.dump_json(value), status_code=status_code)
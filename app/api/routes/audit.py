@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_date_range, get_db, require_audit_role
+from app.api.responses import model_response
+from app.core.config import settings
+from app.schemas.audit import AccessAuditPage, StudyDailyAccess, UserDailyAccess
+from app.services import audit
+from app.services.date_range import DateRange
+
+router = APIRouter(prefix="/api/audit", dependencies=[Depends(require_audit_role)])
+
+
+def _audit_range(request: Request, date_range: DateRange = Depends(get_date_range)) -> DateRange:
+    # Same convention as /ingestion: bounded unless "range" is given, even empty.
+    if date_range.is_open and "range" not in request.query_params:
+        return DateRange(preset=settings.audit_default_range or None)
+    return date_range
+
+
+@router.get("/accesses", response_model=AccessAuditPage)
+def accesses_api(
+    user_id: UUID | None = Query(default=None),
+    study_id: UUID | None = Query(default=None),
+    cursor: str | None = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    date_range: DateRange = Depends(_audit_range),
+):
+    """Study accesses, newest first; pass ``next_cursor`` back as ``cursor`` for the next page."""
+    date_from, date_to = date_range.bounds()
+    try:
+        page = audit.list_accesses(
+            db,
+            user_id=user_id,
+            study_id=study_id,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from None
+    return model_response(AccessAuditPage, page)
+
+
+@router.get("/daily/users", response_model=list[UserDailyAccess])
+def daily_users_api(
+    user_id: UUID | None = Query(default=None),
+    study_id: UUID | None = Query(default=None),
+    limit: int = Query(default=1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    date_range: DateRange = Depends(_audit_range),
+):
+    date_from, date_to = date_range.bounds()
+    rows = audit.daily_user_counts(
+        db, user_id=user_id, study_id=study_id, date_from=date_from, date_to=date_to, limit=limit
+    )
+    return model_response(list[UserDailyAccess], rows)
+
+
+@router.get("/daily/studies", response_model=list[StudyDailyAccess])
+def daily_studies_api(
+    user_id: UUID | None = Query(default=None),
+    study_id: UUID | None = Query(default=None),
+    limit: int = Query(default=1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    date_range: DateRange = Depends(_audit_range),
+):
+    date_from, date_to = date_range.bounds()
+    rows = audit.daily_study_counts(
+        db, user_id=user_id, study_id=study_id, date_from=date_from, date_to=date_to, limit=limit
+    )
+    return model_response(list[StudyDailyAccess], rows)
@@ -1,40 +1,92 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from datetime import date
+from typing import Literal
+from urllib.parse import urlencode
 
-from app.api.deps import get_current_user, get_db
-from app.schemas.overview import OverviewResponse
-from app.services.provider import get_provider
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import HTMLResponse, StreamingResponse
 
-router = APIRouter(dependencies=[Depends(get_current_user)])
+from app.api.deps import get_current_user, get_db, get_provider, get_tenant_scope
+from app.api.responses import model_response
+from app.api.templating import templates
+from app.core.config import settings
+from app.schemas.overview import OverviewResponse, VolumeTrendResponse
+from app.services.provider import DataProvider
+from app.services.scope import TenantScope
+from app.services.streaming import overview_broadcaster, sse_body
 
-templates = Jinja2Templates(directory="app/templates")
+router = APIRouter(dependencies=[Depends(get_current_user)])
 
 
 @router.get("/", response_class=HTMLResponse)
-def overview_page(request: Request, db=Depends(get_db)):
-    provider = get_provider()
-    kpis = provider.get_overview_kpis(db)
-    risk_breakdown = provider.get_risk_breakdown(db)
-    volume_trend = provider.get_volume_trend(db)
+def overview_page(
+    request: Request,
+    db=Depends(get_db),
+    scope: TenantScope = Depends(get_tenant_scope),
+    provider: DataProvider = Depends(get_provider),
+):
+    summary = provider.get_overview_summary(db, scope=scope)
+    volume_trend = provider.get_volume_trend(db, max_points=settings.trend_max_points, scope=scope)
     return templates.TemplateResponse(
         "overview.html",
         {
             "request": request,
-            "kpis": kpis,
-            "risk_breakdown": risk_breakdown,
+            "kpis": summary["kpis"],
+            "risk_breakdown": summary["risk_breakdown"],
             "volume_trend": volume_trend,
+            "sites": provider.list_sites(db),
+            "selected_site": str(scope.site_id or ""),
+            "stream_url": f"/api/overview/stream?{urlencode(scope.query_params())}",
         },
     )
 
 
 @router.get("/api/overview", response_model=OverviewResponse)
-def overview_api(db=Depends(get_db)):
-    provider = get_provider()
-    return {
-        "kpis": provider.get_overview_kpis(db),
-        "risk_breakdown": provider.get_risk_breakdown(db),
-        "volume_trend": provider.get_volume_trend(db),
-    }
+def overview_api(
+    db=Depends(get_db),
+    scope: TenantScope = Depends(get_tenant_scope),
+    provider: DataProvider = Depends(get_provider),
+):
+    return model_response(
+        OverviewResponse,
+        {
+            **provider.get_overview_summary(db, scope=scope),
+            "volume_trend": provider.get_volume_trend(
+                db, max_points=settings.trend_max_points, scope=scope
+            ),
+        },
+    )
+
+
+@router.get("/api/overview/stream")
+async def overview_stream(scope: TenantScope = Depends(get_tenant_scope)):
+    """Server-Sent Events: a ``snapshot`` of the overview, then a ``delta`` per data change."""
+    return StreamingResponse(
+        sse_body(overview_broadcaster.subscribe(scope)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/api/overview/trend", response_model=VolumeTrendResponse)
+def volume_trend_api(
+    date_from: date | None = Query(default=None),
+    date_to: date | None = Query(default=None),
+    bucket: Literal["day", "week", "month"] = Query(default="day"),
+    max_points: int | None = Query(default=None, ge=3, le=2000),
+    db=Depends(get_db),
+    scope: TenantScope = Depends(get_tenant_scope),
+    provider: DataProvider = Depends(get_provider),
+):
+    return model_response(
+        VolumeTrendResponse,
+        provider.get_volume_trend_splits(
+            db,
+            date_from=date_from,
+            date_to=date_to,
+            bucket=bucket,
+            max_points=max_points or settings.trend_max_points,
+            scope=scope,
+        ),
+    )
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+import time
+
+import anyio
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from app.core.config import settings
+from app.services.profiler import profile_worker, request_profile_path
+
+# Reachable only from private networks (AuthMiddleware) and only with PROFILING_ENABLED.
+router = APIRouter(prefix="/_profile", include_in_schema=False)
+
+FOLDED_MEDIA_TYPE = "text/plain; charset=utf-8"
+
+
+@router.get("")
+async def profile_api(
+    seconds: float = Query(default=10, gt=0),
+    interval_ms: float | None = Query(default=None, gt=0),
+    idle: bool = Query(default=False),
+):
+    # Per worker: the profile covers whichever worker answered (its pid is in the file name).
+    seconds = min(seconds, settings.profile_max_seconds)
+    interval = (interval_ms or settings.profile_interval_ms) / 1000
+    # A thread of its own: the profile should not take one of the threadpool's.
+    sampler = await anyio.to_thread.run_sync(
+        profile_worker, seconds, interval, idle, limiter=anyio.CapacityLimiter(1)
+    )
+    if sampler is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+    filename = f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+    return PlainTextResponse(
+        sampler.collapsed(),
+        media_type=FOLDED_MEDIA_TYPE,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(sampler.samples),
+        },
+    )
+
+
+@router.get("/requests/{name}")
+def request_profile_api(name: str):
+    path = request_profile_path(name) if name.isalnum() else None
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type=FOLDED_MEDIA_TYPE, filename=path.name)
@@ -3,20 +3,22 @@ from __future__ import annotations
 from math import ceil
 from urllib.parse import urlencode
 
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user, get_date_range, get_db, get_provider, get_tenant_scope
+from app.api.templating import templates
 from app.core.security import authenticate_credentials, clear_session_user, ensure_db_user, set_session_user
-from app.services.provider import get_provider
+from app.core.config import settings
+from app.services.date_range import DATE_RANGE_PRESETS, DateRange
+from app.services.provider import DataProvider
+from app.services.scope import TenantScope
+from app.services.streaming import ingestion_listener, sse_body
 
 router = APIRouter()
 
-templates = Jinja2Templates(directory="app/templates")
-
 
 @router.get("/followups", response_class=HTMLResponse, dependencies=[Depends(get_current_user)])
 def followups_page(
@@ -25,20 +27,24 @@ def followups_page(
     per_page: int = 10,
     q: str | None = None,
     db: Session = Depends(get_db),
+    scope: TenantScope = Depends(get_tenant_scope),
+    provider: DataProvider = Depends(get_provider),
 ):
     per_page = max(1, min(per_page, 100))
-    provider = get_provider()
-    total = provider.count_followups(db, search=q)
+    total = provider.count_followups(db, search=q, scope=scope)
     total_pages = max(1, ceil(total / per_page))
     page = min(page, total_pages)
     offset = (page - 1) * per_page
-    followups = provider.get_followup_timeline(db, limit=per_page, offset=offset, search=q)
+    followups = provider.get_followup_timeline(db, limit=per_page, offset=offset, search=q, scope=scope)
+    base_params = {"per_page": per_page, **scope.query_params()}
+    if q:
+        base_params["q"] = q
     pagination = {
         "page": page,
         "per_page": per_page,
         "total": total,
         "total_pages": total_pages,
-        "base_query": urlencode({"per_page": per_page, "q": q} if q else {"per_page": per_page}),
+        "base_query": urlencode(base_params),
     }
     return templates.TemplateResponse(
         "followups.html",
@@ -47,6 +53,8 @@ def followups_page(
             "followups": followups,
             "pagination": pagination,
             "search_query": q or "",
+            "sites": provider.list_sites(db),
+            "selected_site": str(scope.site_id or ""),
         },
     )
 
@@ -58,20 +66,32 @@ def ingestion_page(
     per_page: int = 10,
     q: str | None = None,
     db: Session = Depends(get_db),
+    scope: TenantScope = Depends(get_tenant_scope),
+    date_range: DateRange = Depends(get_date_range),
+    provider: DataProvider = Depends(get_provider),
 ):
+    # Bounded by default so the page reads only the newest monthly partitions;
+    # an explicit empty "range" selects the whole retained history.
+    if date_range.is_open and "range" not in request.query_params:
+        date_range = DateRange(preset=settings.ingestion_default_range or None)
     per_page = max(1, min(per_page, 100))
-    provider = get_provider()
-    total = provider.count_ingestion_logs(db, search=q)
+    date_from, date_to = date_range.bounds()
+    filters = {"search": q, "scope": scope, "date_from": date_from, "date_to": date_to}
+    total = provider.count_ingestion_logs(db, **filters)
     total_pages = max(1, ceil(total / per_page))
     page = min(page, total_pages)
     offset = (page - 1) * per_page
-    logs = provider.get_ingestion_logs(db, limit=per_page, offset=offset, search=q)
+    logs = provider.get_ingestion_logs(db, limit=per_page, offset=offset, **filters)
+    base_params = {"per_page": per_page, **scope.query_params(), "range": date_range.preset or ""}
+    base_params.update(date_range.query_params())
+    if q:
+        base_params["q"] = q
     pagination = {
         "page": page,
         "per_page": per_page,
         "total": total,
         "total_pages": total_pages,
-        "base_query": urlencode({"per_page": per_page, "q": q} if q else {"per_page": per_page}),
+        "base_query": urlencode(base_params),
     }
     return templates.TemplateResponse(
         "ingestion.html",
@@ -80,10 +100,33 @@ def ingestion_page(
             "logs": logs,
             "pagination": pagination,
             "search_query": q or "",
+            "sites": provider.list_sites(db),
+            "selected_site": str(scope.site_id or ""),
+            "selected_range": date_range.preset or "",
+            "range_presets": list(DATE_RANGE_PRESETS),
+            # Only the unfiltered first page shows the newest events, so only it goes live.
+            "stream_url": f"/ingestion/stream?{urlencode(scope.query_params())}"
+            if ingestion_listener.available and page == 1 and not q and date_range.date_to is None
+            else None,
         },
     )
 
 
+@router.get("/ingestion/stream", dependencies=[Depends(get_current_user)])
+async def ingestion_stream(scope: TenantScope = Depends(get_tenant_scope)):
+    """Server-Sent Events: a ``log`` per ingestion_logs insert/update in the scope, ``resync`` on gaps."""
+    if not ingestion_listener.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Ingestion stream requires PostgreSQL LISTEN/NOTIFY",
+        )
+    return StreamingResponse(
+        sse_body(ingestion_listener.subscribe(scope)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/login", response_class=HTMLResponse, include_in_schema=False)
 def login_page(request: Request, error: str | None = None):
     return templates.TemplateResponse(
@@ -1,22 +1,30 @@
 from __future__ import annotations
 
-from datetime import datetime
+from collections.abc import Iterator
+from datetime import date
 from math import ceil
 from urllib.parse import urlencode
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_db
-from app.db.models import AccessAudit, User
+from app.api.compression import negotiate_encoding
+from app.api.deps import get_current_user, get_date_range, get_db, get_provider, get_tenant_scope
+from app.api.responses import model_response
+from app.api.templating import templates
+from app.db.models import User
+from app.db.session import SessionLocal
 from app.schemas.study import StudyDetail, StudyListItem
-from app.services.provider import get_provider
+from app.services.audit import record_access
+from app.services.date_range import DATE_RANGE_PRESETS, DateRange
+from app.services.export import iter_csv
+from app.services.provider import DataProvider
+from app.services.scope import TenantScope
 
 router = APIRouter(prefix="/studies", dependencies=[Depends(get_current_user)])
 
-templates = Jinja2Templates(directory="app/templates")
+EXPORT_HEADER = ("study_uid", "patient", "study_date", "status", "overall_risk", "nodule_count")
 
 
 @router.get("", response_class=HTMLResponse)
@@ -28,22 +36,36 @@ def studies_page(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=10, ge=1, le=100),
     db: Session = Depends(get_db),
+    scope: TenantScope = Depends(get_tenant_scope),
+    date_range: DateRange = Depends(get_date_range),
+    provider: DataProvider = Depends(get_provider),
 ):
-    provider = get_provider()
-    total = provider.count_studies(db, status=status, risk=risk, search=q)
+    date_from, date_to = date_range.bounds()
+    filters = {
+        "status": status,
+        "risk": risk,
+        "search": q,
+        "scope": scope,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+    total = provider.count_studies(db, **filters)
     total_pages = max(1, ceil(total / per_page)) if per_page else 1
     page = min(page, total_pages)
     offset = (page - 1) * per_page
-    rows = provider.list_studies(
-        db, status=status, risk=risk, search=q, limit=per_page, offset=offset
-    )
-    base_params = {"per_page": per_page}
+    rows = provider.list_studies(db, limit=per_page, offset=offset, **filters)
+    filter_params = {**scope.query_params()}
     if status:
-        base_params["status"] = status
+        filter_params["status"] = status
     if risk:
-        base_params["risk"] = risk
+        filter_params["risk"] = risk
     if q:
-        base_params["q"] = q
+        filter_params["q"] = q
+    base_params = {"per_page": per_page, **filter_params, **date_range.query_params()}
+    # The "last 30 days" quick filter toggles the preset on top of the other filters.
+    last30_params = {"per_page": per_page, **filter_params}
+    if date_range.preset != "last30":
+        last30_params["range"] = "last30"
     pagination = {
         "page": page,
         "per_page": per_page,
@@ -59,6 +81,15 @@ def studies_page(
             "selected_status": status or "",
             "selected_risk": risk or "",
             "search_query": q or "",
+            "selected_range": date_range.preset or "",
+            "date_from": date_range.date_from.isoformat() if date_range.date_from else "",
+            "date_to": date_range.date_to.isoformat() if date_range.date_to else "",
+            "range_presets": list(DATE_RANGE_PRESETS),
+            "last30_query": urlencode(last30_params),
+            "export_query": urlencode({**filter_params, **date_range.query_params()}),
+            "sites": provider.list_sites(db),
+            "selected_site": str(scope.site_id or ""),
+            "scope_query": urlencode(scope.query_params()),
             "pagination": pagination,
         },
     )
@@ -72,16 +103,63 @@ def studies_api(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=10, ge=1, le=100),
     db: Session = Depends(get_db),
+    scope: TenantScope = Depends(get_tenant_scope),
+    date_range: DateRange = Depends(get_date_range),
+    provider: DataProvider = Depends(get_provider),
 ):
     offset = (page - 1) * per_page
-    provider = get_provider()
+    date_from, date_to = date_range.bounds()
     studies = provider.list_studies(
-        db, status=status, risk=risk, search=q, limit=per_page, offset=offset
+        db,
+        status=status,
+        risk=risk,
+        search=q,
+        limit=per_page,
+        offset=offset,
+        scope=scope,
+        date_from=date_from,
+        date_to=date_to,
     )
-    return [
-        StudyListItem(**study)
-        for study in studies
-    ]
+    return model_response(list[StudyListItem], studies, validate=False)
+
+
+@router.get("/export.csv")
+def studies_export(
+    request: Request,
+    status: str | None = Query(default=None),
+    risk: str | None = Query(default=None),
+    q: str | None = Query(default=None),
+    scope: TenantScope = Depends(get_tenant_scope),
+    date_range: DateRange = Depends(get_date_range),
+    provider: DataProvider = Depends(get_provider),
+):
+    date_from, date_to = date_range.bounds()
+    compress = negotiate_encoding(request.headers.get("accept-encoding", ""), ("gzip",)) == "gzip"
+
+    def body() -> Iterator[bytes]:
+        # get_db's session is closed before a streaming body runs, so the export opens its own.
+        db = SessionLocal()
+        try:
+            rows = provider.iter_study_export(
+                db,
+                status=status,
+                risk=risk,
+                search=q,
+                scope=scope,
+                date_from=date_from,
+                date_to=date_to,
+            )
+            yield from iter_csv(EXPORT_HEADER, rows, compress=compress)
+        finally:
+            db.close()
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="studies_export_{date.today().isoformat()}.csv"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body(), media_type="text/csv; charset=utf-8", headers=headers)
 
 
 @router.get("/{study_id}", response_class=HTMLResponse)
@@ -90,20 +168,19 @@ def study_detail_page(
     study_id: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    provider: DataProvider = Depends(get_provider),
 ):
-    provider = get_provider()
     detail = provider.get_study_detail(db, study_id)
     if not detail:
         raise HTTPException(status_code=404, detail="Study not found")
 
-    audit = AccessAudit(
+    record_access(
+        db,
         user_id=current_user.id,
         study_id=detail["id"],
         action="view",
         ip_address=request.client.host if request.client else "unknown",
-        accessed_at=datetime.utcnow(),
     )
-    db.add(audit)
     db.commit()
 
     return templates.TemplateResponse(
@@ -116,10 +193,13 @@ def study_detail_page(
 
 
 @router.get("/{study_id}/api", response_model=StudyDetail)
-def study_detail_api(study_id: str, db: Session = Depends(get_db)):
-    provider = get_provider()
+def study_detail_api(
+    study_id: str,
+    db: Session = Depends(get_db),
+    provider: DataProvider = Depends(get_provider),
+):
     detail = provider.get_study_detail(db, study_id)
     if not detail:
         raise HTTPException(status_code=404, detail="Study not found")
 
-    return detail
+    return model_response(StudyDetail, detail)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db, get_provider, get_tenant_scope
+from app.api.responses import model_response
+from app.schemas.trajectory import NoduleTrajectory, PatientTrajectories
+from app.services.provider import DataProvider
+from app.services.scope import TenantScope
+
+router = APIRouter(prefix="/trajectories", dependencies=[Depends(get_current_user)])
+
+
+@router.get("/patients/{patient_id}/api", response_model=PatientTrajectories)
+def patient_trajectories_api(
+    patient_id: UUID,
+    db: Session = Depends(get_db),
+    scope: TenantScope = Depends(get_tenant_scope),
+    provider: DataProvider = Depends(get_provider),
+):
+    tracks = provider.get_patient_trajectories(db, patient_id, scope=scope)
+    if not tracks:
+        raise HTTPException(status_code=404, detail="Patient trajectories not found")
+    return model_response(PatientTrajectories, {"patient_id": patient_id, "tracks": tracks})
+
+
+@router.get("/nodules/{nodule_id}/api", response_model=NoduleTrajectory)
+def nodule_trajectory_api(
+    nodule_id: UUID,
+    db: Session = Depends(get_db),
+    scope: TenantScope = Depends(get_tenant_scope),
+    provider: DataProvider = Depends(get_provider),
+):
+    track = provider.get_nodule_trajectory(db, nodule_id, scope=scope)
+    if not track:
+        raise HTTPException(status_code=404, detail="Nodule trajectory not found")
+    return model_response(NoduleTrajectory, track)
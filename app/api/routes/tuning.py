@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.services.tuning import database_limits, observer, tuning_report
+
+router = APIRouter(prefix="/_tuning", include_in_schema=False, dependencies=[Depends(get_current_user)])
+
+
+@router.get("")
+def tuning_api(db: Session = Depends(get_db)):
+    # Per worker: the numbers describe whichever worker answered.
+    return tuning_report(database_limits(db))
+
+
+@router.post("/reset")
+def tuning_reset():
+    observer.reset()
+    return {"status": "ok"}
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import os
+from mimetypes import guess_type
+from pathlib import Path
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from app.api.compression import negotiate_encoding
+from app.core.config import settings
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_SOURCE_DIR = Path("app/static")
+MANIFEST_NAME = "manifest.json"
+# Preference order when the client weights several encodings equally.
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def load_static_manifest() -> dict[str, str]:
+    """Source path -> hashed path map written by scripts/build_static.py (empty if not built)."""
+    path = Path(settings.static_dist_dir) / MANIFEST_NAME
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+def static_root(manifest: dict[str, str]) -> Path:
+    return Path(settings.static_dist_dir) if manifest else STATIC_SOURCE_DIR
+
+
+def _parse_range(value: str, size: int) -> tuple[int, int] | None:
+    """Inclusive bounds of a single ``bytes=`` range.
+
+    Returns None for forms we do not serve partially (multiple ranges, other
+    units), in which case the full body is sent; raises ValueError when the
+    range cannot be satisfied.
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                raise ValueError(value)
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise ValueError(value)
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(FileResponse):
+    """206 response carrying ``[start, end]`` of a file."""
+
+    def __init__(self, path: str, start: int, end: int, stat_result: os.stat_result, **kwargs) -> None:
+        super().__init__(path, status_code=206, stat_result=stat_result, **kwargs)
+        self.start = start
+        self.end = end
+        self.headers["content-length"] = str(end - start + 1)
+        self.headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves ``.br``/``.gz`` siblings and single byte ranges.
+
+    Compressed siblings are produced ahead of time (build_static.py, the image
+    store), so no request compresses anything. Range requests are answered from
+    the identity file. The body itself still goes through FileResponse, which
+    uses ``http.response.pathsend`` when the server offers it; in production
+    nginx serves these paths from disk and only falls back here.
+    """
+
+    def __init__(self, *args, cache_control: str | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        full_path = os.fspath(full_path)
+        request_headers = Headers(scope=scope)
+        media_type = guess_type(full_path)[0] or "text/plain"
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, media_type=media_type)
+        self.set_etag(response, full_path, None)
+
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and status_code == 200 and (if_range is None or if_range == response.headers["etag"]):
+            try:
+                byte_range = _parse_range(range_header, stat_result.st_size)
+            except ValueError:
+                return Response(
+                    status_code=416, headers={"Content-Range": f"bytes */{stat_result.st_size}"}
+                )
+            if byte_range is not None:
+                response = RangeFileResponse(
+                    full_path, *byte_range, stat_result=stat_result, media_type=media_type
+                )
+                self.set_etag(response, full_path, None)
+        else:
+            variants = {}
+            for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+                try:
+                    variants[encoding] = (full_path + suffix, os.stat(full_path + suffix))
+                except FileNotFoundError:
+                    continue
+            encoding = negotiate_encoding(request_headers.get("accept-encoding", ""), tuple(variants))
+            if encoding is not None:
+                variant_path, variant_stat = variants[encoding]
+                response = FileResponse(
+                    variant_path, status_code=status_code, stat_result=variant_stat, media_type=media_type
+                )
+                response.headers["Content-Encoding"] = encoding
+                self.set_etag(response, full_path, encoding)
+
+        response.headers["Accept-Ranges"] = "bytes"
+        response.headers["Vary"] = "Accept-Encoding"
+        if self.cache_control:
+            response.headers["Cache-Control"] = self.cache_control
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def set_etag(self, response: Response, full_path: str, encoding: str | None) -> None:
+        # FileResponse already derives one from the served file's mtime and size.
+        return None
+
+
+class ImmutableStaticFiles(PrecompressedStaticFiles):
+    """Static files for content-addressed paths, where a URL never changes content.
+
+    The file name is the content hash, so it doubles as a strong ETag that is
+    stable across hosts and re-deploys (unlike the default mtime/size tag).
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        kwargs.setdefault("cache_control", IMMUTABLE_CACHE_CONTROL)
+        super().__init__(*args, **kwargs)
+
+    def set_etag(self, response: Response, full_path: str, encoding: str | None) -> None:
+        digest = Path(full_path).stem
+        response.headers["ETag"] = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
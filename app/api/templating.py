@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+
+from fastapi.templating import Jinja2Templates
+
+from app.api.staticfiles import STATIC_SOURCE_DIR, load_static_manifest
+
+static_manifest = load_static_manifest()
+
+
+@lru_cache(maxsize=None)
+def _source_version(path: str) -> str:
+    try:
+        return hashlib.sha256((STATIC_SOURCE_DIR / path).read_bytes()).hexdigest()[:12]
+    except FileNotFoundError:
+        return ""
+
+
+def static_url(path: str) -> str:
+    """URL of a static asset: its content-hashed name when built, else a hash query string."""
+    hashed = static_manifest.get(path)
+    if hashed:
+        return f"/static/{hashed}"
+    version = _source_version(path)
+    return f"/static/{path}?v={version}" if version else f"/static/{path}"
+
+
+templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["static_url"] = static_url
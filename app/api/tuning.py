@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import time
+
+from anyio.to_thread import current_default_thread_limiter
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.instrumentation import request_usage, track_request
+from app.services.tuning import observer
+
+
+class TuningMiddleware:
+    """Feeds app.services.tuning.observer with every request (TUNING_MODE only).
+
+    Records threadpool use on arrival and, per route template, wall time plus
+    the statement time and pool wait its queries accumulated. Event streams
+    and requests that matched no route (static files, 404s) only count
+    towards concurrency.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limiter = current_default_thread_limiter()
+        observer.request_started(limiter.borrowed_tokens, int(limiter.total_tokens))
+        usage, token = track_request(scope)
+        streaming = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal streaming
+            if message["type"] == "http.response.start":
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                streaming = content_type.startswith("text/event-stream")
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                request_usage.reset(token)
+            name = usage.route if not streaming else None
+            if name and name.startswith("/_tuning"):
+                name = None
+            observer.request_finished(name, time.perf_counter() - start, usage)
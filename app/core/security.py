@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import hmac
+import ipaddress
 from dataclasses import dataclass
 
 from fastapi import HTTPException, Request, status
@@ -8,6 +9,7 @@ from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.db.models import User
+from app.db.routing import RoutingSession
 
 
 @dataclass(frozen=True)
@@ -67,6 +69,17 @@ def authenticate_credentials(username: str, password: str) -> AuthUser | None:
     )
 
 
+def is_private_address(host: str | None) -> bool:
+    """Loopback or private network client: the gate of /metrics and /_profile."""
+    if not host:
+        return False
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return address.is_private or address.is_loopback
+
+
 def get_session_user(request: Request) -> AuthUser | None:
     if "session" not in request.scope:
         return None
@@ -102,6 +115,14 @@ def ensure_db_user(db: Session, auth_user: AuthUser) -> User:
         .filter(User.username == auth_user.username)
         .one_or_none()
     )
+    if db_user is None and isinstance(db, RoutingSession):
+        # A lagging replica may not have the row yet; confirm on the primary before inserting.
+        db.use_primary()
+        db_user = (
+            db.query(User)
+            .filter(User.username == auth_user.username)
+            .one_or_none()
+        )
     if db_user:
         return db_user
     db_user = User(
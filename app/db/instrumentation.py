@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.db")
+
+# Checkouts kept per pool for percentiles.
+CHECKOUT_SAMPLES = 4096
+# A slow statement's plan is logged at most this often per fingerprint.
+EXPLAIN_INTERVAL_SECONDS = 300
+EXPLAIN_PREFIXES = {"postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}
+# Route label of statements run outside a request (lifespan, background threads).
+BACKGROUND = "background"
+
+STATEMENT_SECONDS = Histogram(
+    "db_statement_duration_seconds",
+    "Statement execution time by route template and statement fingerprint.",
+    ["route", "statement"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_STATEMENTS = Histogram(
+    "db_statements_per_request",
+    "Statements executed per request, by route template.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "db_time_per_request_seconds",
+    "Statement time per request, by route template.",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+_PARAMS = re.compile(r"%\(\w+\)s|%s|\$\d+|\?|(?<![:\w]):\w+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+# psycopg2 (pyformat) placeholders and escaped percent signs.
+_PYFORMAT = re.compile(r"%\((\w+)\)s|%%")
+
+
+@dataclass
+class RequestUsage:
+    """Database work done on behalf of one request."""
+
+    queries: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    scope: dict | None = field(default=None, repr=False)
+
+    @property
+    def route(self) -> str | None:
+        # The router stores the matched route in the (shared) scope.
+        return getattr((self.scope or {}).get("route"), "path", None)
+
+    @property
+    def request_id(self) -> str | None:
+        return (self.scope or {}).get("state", {}).get("request_id")
+
+
+# Set by the middleware that wants the numbers; sync routes run in the
+# threadpool with a copy of the context, so they add to the same object.
+request_usage: ContextVar[RequestUsage | None] = ContextVar("request_usage", default=None)
+
+
+def track_request(scope: dict) -> tuple[RequestUsage, Token | None]:
+    """The RequestUsage of this request, created unless an outer middleware already did.
+
+    The token is None when the usage was inherited, so only its creator resets it.
+    """
+    usage = request_usage.get()
+    if usage is not None:
+        return usage, None
+    usage = RequestUsage(scope=scope)
+    return usage, request_usage.set(usage)
+
+
+class CheckoutSamples:
+    """Connections in use right after each checkout, per pool, over a bounded window."""
+
+    def __init__(self, size: int = CHECKOUT_SAMPLES) -> None:
+        self.size = size
+        self.enabled = False
+        self._samples: dict[str, deque[int]] = {}
+        self._peaks: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, pool: str, checked_out: int) -> None:
+        with self._lock:
+            self._samples.setdefault(pool, deque(maxlen=self.size)).append(checked_out)
+            self._peaks[pool] = max(self._peaks.get(pool, 0), checked_out)
+
+    def snapshot(self) -> dict[str, tuple[list[int], int]]:
+        with self._lock:
+            return {pool: (list(samples), self._peaks[pool]) for pool, samples in self._samples.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._peaks.clear()
+
+
+checkout_samples = CheckoutSamples()
+
+
+def record_checkout(pool: str, wait_seconds: float, checked_out: int) -> None:
+    usage = request_usage.get()
+    if usage is not None:
+        usage.pool_wait_seconds += wait_seconds
+    if checkout_samples.enabled:
+        checkout_samples.add(pool, checked_out)
+
+
+@lru_cache(maxsize=4096)
+def normalize_statement(statement: str) -> str:
+    """The statement with parameters and literals as ``?`` and IN lists collapsed."""
+    normalized = _LITERALS.sub("?", _PARAMS.sub("?", statement))
+    return _SPACE.sub(" ", _LISTS.sub("(...)", normalized)).strip()
+
+
+_fingerprints_seen: set[str] = set()
+
+
+@lru_cache(maxsize=4096)
+def statement_fingerprint(statement: str) -> str:
+    """Short, stable label of a normalized statement; its text is logged once per worker."""
+    normalized = normalize_statement(statement)
+    fingerprint = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+    if fingerprint not in _fingerprints_seen:
+        _fingerprints_seen.add(fingerprint)
+        logger.info("statement fingerprint=%s sql=%s", fingerprint, normalized)
+    return fingerprint
+
+
+def _generic_statement(statement: str) -> str:
+    """``statement`` with its pyformat placeholders numbered as $1, $2... for EXPLAIN (GENERIC_PLAN)."""
+    numbers: dict[str, int] = {}
+
+    def replace(match: re.Match) -> str:
+        if match[1] is None:
+            return "%"
+        return f"${numbers.setdefault(match[1], len(numbers) + 1)}"
+
+    return _PYFORMAT.sub(replace, statement)
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return "(no plan for this statement)"
+    postgres = conn.dialect.name == "postgresql"
+    if postgres and not settings.allow_phi:
+        # psycopg2 binds on the client, so a plan of the bound statement would
+        # carry search terms and patient ids into the log in its Filter lines.
+        # A generic plan shows $n instead (SQLite's plans never show values).
+        if (conn.dialect.server_version_info or (0,)) < (16,):
+            return "(no plan: GENERIC_PLAN needs PostgreSQL 16; bound values are only explained with ALLOW_PHI)"
+        explain, parameters = "EXPLAIN (GENERIC_PLAN) " + _generic_statement(statement), None
+    else:
+        explain = prefix + statement
+    # A raw DBAPI cursor, so neither these hooks nor the ORM see the EXPLAIN; the
+    # savepoint keeps a failed EXPLAIN from aborting the request's transaction.
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if postgres:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(explain, parameters)
+            rows = cursor.fetchall()
+        except Exception as exc:
+            if postgres:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return f"(EXPLAIN failed: {exc})"
+        if postgres:
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        cursor.close()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+_explained_at: dict[str, float] = {}
+
+
+def _log_slow_statement(conn, statement: str, parameters, fingerprint: str, seconds: float, route: str) -> None:
+    usage = request_usage.get()
+    now = time.monotonic()
+    plan = ""
+    last = _explained_at.get(fingerprint)
+    if settings.db_slow_query_explain and (last is None or now - last >= EXPLAIN_INTERVAL_SECONDS):
+        _explained_at[fingerprint] = now
+        plan = "\nplan:\n" + _explain(conn, statement, parameters)
+    logger.warning(
+        "slow query duration_ms=%.2f fingerprint=%s route=%s request_id=%s sql=%s%s",
+        seconds * 1000,
+        fingerprint,
+        route,
+        usage.request_id if usage else None,
+        normalize_statement(statement),
+        plan,
+    )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.pop("query_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    usage = request_usage.get()
+    if usage is not None:
+        usage.queries += 1
+        usage.db_seconds += seconds
+    route = (usage.route if usage else None) or BACKGROUND
+    fingerprint = statement_fingerprint(statement)
+    STATEMENT_SECONDS.labels(route, fingerprint).observe(seconds)
+    if settings.db_slow_query_ms > 0 and seconds * 1000 >= settings.db_slow_query_ms and not executemany:
+        _log_slow_statement(conn, statement, parameters, fingerprint, seconds, route)
+
+
+def observe_request(usage: RequestUsage) -> None:
+    """Per-request statement count and time, for requests that matched a route."""
+    route = usage.route
+    if route is not None:
+        REQUEST_STATEMENTS.labels(route).observe(usage.queries)
+        REQUEST_DB_SECONDS.labels(route).observe(usage.db_seconds)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement: Prometheus histograms, slow-query log and the request's RequestUsage."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,16 +1,20 @@
-from app.db.models.models import AccessAudit, Client, Image, IngestionLog, Patient, QCTFollowup, QCTNodule, QCTSummary, Series, Site, Study, User
+from app.db.models.models import AccessAudit, AccessAuditDaily, Client, Image, IngestionLog, NoduleTrajectoryPoint, OrthancSyncState, Patient, QCTFollowup, QCTNodule, QCTSummary, Series, Site, SiteOverviewStats, Study, User
 
 __all__ = [
     "AccessAudit",
+    "AccessAuditDaily",
     "Client",
     "Image",
     "IngestionLog",
+    "NoduleTrajectoryPoint",
+    "OrthancSyncState",
     "Patient",
     "QCTFollowup",
     "QCTNodule",
     "QCTSummary",
     "Series",
     "Site",
+    "SiteOverviewStats",
     "Study",
     "User",
-]
+]
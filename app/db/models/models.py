@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from datetime import date, datetime
 
-from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Index, Integer, String, Text
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -36,6 +36,34 @@ class Site(Base, TimestampMixin):
     patients: Mapped[list["Patient"]] = relationship(back_populates="site")
     studies: Mapped[list["Study"]] = relationship(back_populates="site")
 
+    __table_args__ = (Index("ix_sites_client_id", "client_id"),)
+
+
+class SiteOverviewStats(Base):
+    __tablename__ = "site_overview_stats"
+
+    site_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("sites.id"), primary_key=True)
+    client_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("clients.id"), nullable=False)
+    total_patients: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_studies: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_nodules: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    low_risk: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    medium_risk: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    high_risk: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("ix_site_overview_stats_client", "client_id"),)
+
+
+class OrthancSyncState(Base):
+    """Last Orthanc ``/changes`` sequence number applied to the local mirror."""
+
+    __tablename__ = "orthanc_sync_state"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
 
 class Patient(Base, TimestampMixin):
     __tablename__ = "patients"
@@ -50,6 +78,8 @@ class Patient(Base, TimestampMixin):
     site: Mapped[Site] = relationship(back_populates="patients")
     studies: Mapped[list["Study"]] = relationship(back_populates="patient")
 
+    __table_args__ = (Index("ix_patients_site_id", "site_id"),)
+
 
 class Study(Base, TimestampMixin):
     __tablename__ = "studies"
@@ -79,6 +109,9 @@ class Study(Base, TimestampMixin):
         Index("ix_study_date", "study_date"),
         Index("ix_status", "status"),
         Index("ix_overall_risk", "overall_risk"),
+        Index("ix_studies_site_date", "site_id", "study_date"),
+        Index("ix_studies_site_status_date", "site_id", "status", "study_date"),
+        Index("ix_studies_site_risk_date", "site_id", "overall_risk", "study_date"),
     )
 
 
@@ -102,6 +135,7 @@ class Image(Base, TimestampMixin):
     image_uid: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
     file_path: Mapped[str] = mapped_column(String(255), nullable=False)
     thumbnail_path: Mapped[str] = mapped_column(String(255), nullable=True)
+    preview_path: Mapped[str] = mapped_column(String(255), nullable=True)
 
     series: Mapped[Series] = relationship(back_populates="images")
 
@@ -137,7 +171,10 @@ class QCTNodule(Base, TimestampMixin):
     is_followup: Mapped[bool] = mapped_column(Boolean, default=False)
 
     study: Mapped[Study] = relationship(back_populates="nodules")
-    followups: Mapped[list["QCTFollowup"]] = relationship(back_populates="nodule")
+    followups: Mapped[list["QCTFollowup"]] = relationship(
+        back_populates="nodule",
+        foreign_keys="QCTFollowup.nodule_id",
+    )
 
 
 class QCTFollowup(Base, TimestampMixin):
@@ -145,15 +182,50 @@ class QCTFollowup(Base, TimestampMixin):
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     nodule_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("qct_nodules.id"))
+    prior_nodule_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("qct_nodules.id"), nullable=True)
     prior_study_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("studies.id"))
     current_study_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("studies.id"))
     growth_percent: Mapped[float] = mapped_column(Float, nullable=False)
+    vdt_days: Mapped[int] = mapped_column(Integer, nullable=True)
     status: Mapped[str] = mapped_column(String(32), nullable=False)
 
-    nodule: Mapped[QCTNodule] = relationship(back_populates="followups")
+    nodule: Mapped[QCTNodule] = relationship(back_populates="followups", foreign_keys=[nodule_id])
+    prior_nodule: Mapped[QCTNodule] = relationship(foreign_keys=[prior_nodule_id])
     prior_study: Mapped[Study] = relationship(foreign_keys=[prior_study_id])
     current_study: Mapped[Study] = relationship(back_populates="followups", foreign_keys=[current_study_id])
 
+    __table_args__ = (
+        Index("ix_qct_followups_current_study_id", "current_study_id"),
+        Index("ix_qct_followups_nodule_id", "nodule_id"),
+        Index("ix_qct_followups_prior_nodule_id", "prior_nodule_id"),
+    )
+
+
+class NoduleTrajectoryPoint(Base, TimestampMixin):
+    __tablename__ = "nodule_trajectory_points"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    patient_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("patients.id"), nullable=False)
+    track_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    nodule_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("qct_nodules.id"), nullable=False)
+    study_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("studies.id"), nullable=False)
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    study_uid: Mapped[str] = mapped_column(String(64), nullable=False)
+    study_date: Mapped[date] = mapped_column(Date, nullable=False)
+    nodule_uid: Mapped[str] = mapped_column(String(64), nullable=False)
+    location: Mapped[str] = mapped_column(String(64), nullable=False)
+    volume_mm3: Mapped[float] = mapped_column(Float, nullable=False)
+    diameter_mm: Mapped[float] = mapped_column(Float, nullable=False)
+    vdt_days: Mapped[int] = mapped_column(Integer, nullable=True)
+    growth_percent: Mapped[float] = mapped_column(Float, nullable=True)
+    risk: Mapped[str] = mapped_column(String(32), nullable=False)
+
+    __table_args__ = (
+        Index("ix_trajectory_patient_track", "patient_id", "track_id", "position"),
+        Index("ix_trajectory_track", "track_id", "position"),
+        Index("ix_trajectory_nodule", "nodule_id"),
+    )
+
 
 class IngestionLog(Base, TimestampMixin):
     __tablename__ = "ingestion_logs"
@@ -162,11 +234,18 @@ class IngestionLog(Base, TimestampMixin):
     study_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("studies.id"))
     status: Mapped[str] = mapped_column(String(32), nullable=False)
     message: Mapped[str] = mapped_column(Text, nullable=False)
-    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Partition key, so it is part of the primary key (monthly partitions, migration 0007).
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     completed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
 
     study: Mapped[Study] = relationship(back_populates="ingestion_logs")
 
+    __table_args__ = (
+        Index("ix_ingestion_logs_study_id", "study_id"),
+        Index("ix_ingestion_logs_started_at", "started_at"),
+        {"postgresql_partition_by": "RANGE (started_at)"},
+    )
+
 
 class User(Base, TimestampMixin):
     __tablename__ = "users"
@@ -187,10 +266,54 @@ class AccessAudit(Base, TimestampMixin):
     study_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("studies.id"))
     action: Mapped[str] = mapped_column(String(32), nullable=False)
     ip_address: Mapped[str] = mapped_column(String(64), nullable=False)
-    accessed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Partition key, so it is part of the primary key (monthly partitions, migration 0007).
+    accessed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
 
     user: Mapped[User] = relationship(back_populates="access_audits")
     study: Mapped[Study] = relationship(back_populates="access_audits")
 
+    # Keyset pagination walks (accessed_at, id) backwards; the INCLUDE columns let
+    # a page be answered from the index alone (migration 0008).
+    __table_args__ = (
+        Index(
+            "ix_access_audits_accessed_id",
+            "accessed_at",
+            "id",
+            postgresql_include=["user_id", "study_id", "action", "ip_address"],
+        ),
+        Index(
+            "ix_access_audits_user_accessed",
+            "user_id",
+            "accessed_at",
+            "id",
+            postgresql_include=["study_id", "action", "ip_address"],
+        ),
+        Index(
+            "ix_access_audits_study_accessed",
+            "study_id",
+            "accessed_at",
+            "id",
+            postgresql_include=["user_id", "action", "ip_address"],
+        ),
+        {"postgresql_partition_by": "RANGE (accessed_at)"},
+    )
+
+
+class AccessAuditDaily(Base):
+    """Accesses per UTC day, user and study; kept current by ``record_access``."""
+
+    __tablename__ = "access_audit_daily"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    study_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("studies.id"), primary_key=True)
+    access_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_accessed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_access_audit_daily_user_day", "user_id", "day", postgresql_include=["study_id", "access_count"]),
+        Index("ix_access_audit_daily_study_day", "study_id", "day", postgresql_include=["user_id", "access_count"]),
+    )
+
 
 Index("ix_patient_uid", Patient.patient_uid)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import gzip
+import os
+import re
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Monthly RANGE partitions created by migration 0007: table -> partition key.
+PARTITIONED_TABLES = {"ingestion_logs": "started_at", "access_audits": "accessed_at"}
+
+_PARTITION_NAME = re.compile(r"^(?P<table>[a-z_]+)_(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def _bound(month: date) -> str:
+    # Explicit UTC so bounds do not depend on the session TimeZone.
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+def _month_tables(conn: Connection, table: str, attached: bool) -> dict[date, str]:
+    membership = "IN" if attached else "NOT IN"
+    names = conn.execute(
+        text(
+            f"""
+            SELECT c.relname FROM pg_class c
+            WHERE c.relkind = 'r' AND c.relname LIKE :pattern
+              AND c.oid {membership} (
+                SELECT i.inhrelid FROM pg_inherits i
+                JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table
+              )
+            """
+        ),
+        {"pattern": f"{table}\\_%", "table": table},
+    ).scalars()
+    tables = {}
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match and match["table"] == table:
+            tables[date(int(match["year"]), int(match["month"]), 1)] = name
+    return dict(sorted(tables.items()))
+
+
+def list_partitions(conn: Connection, table: str) -> dict[date, str]:
+    """Attached monthly partitions of ``table`` by month."""
+    return _month_tables(conn, table, attached=True)
+
+
+def list_detached(conn: Connection, table: str) -> dict[date, str]:
+    """Monthly tables already detached from ``table`` but not archived and dropped yet."""
+    return _month_tables(conn, table, attached=False)
+
+
+def count_default_rows(conn: Connection, table: str) -> int:
+    return int(conn.scalar(text(f'SELECT count(*) FROM "{default_partition_name(table)}"')) or 0)
+
+
+def create_month_partition(conn: Connection, table: str, month: date) -> str:
+    """Create and attach the partition for ``month``.
+
+    Rows of that month already caught by the default partition are moved into
+    the new table first; otherwise the attach would fail.
+    """
+    column = PARTITIONED_TABLES[table]
+    name = partition_name(table, month)
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+    conn.execute(text(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    conn.execute(
+        text(
+            f"""
+            WITH moved AS (
+                DELETE FROM "{default_partition_name(table)}"
+                WHERE {column} >= CAST(:lower AS timestamptz) AND {column} < CAST(:upper AS timestamptz)
+                RETURNING *
+            )
+            INSERT INTO "{name}" SELECT * FROM moved
+            """
+        ),
+        {"lower": lower, "upper": upper},
+    )
+    conn.execute(
+        text(f"""ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM ('{lower}') TO ('{upper}')""")
+    )
+    return name
+
+
+def ensure_partitions(conn: Connection, table: str, first: date, last: date) -> list[str]:
+    """Create missing monthly partitions between ``first`` and ``last`` (inclusive months)."""
+    existing = list_partitions(conn, table)
+    created = []
+    month = month_start(first)
+    while month <= month_start(last):
+        if month not in existing:
+            created.append(create_month_partition(conn, table, month))
+        month = add_months(month, 1)
+    return created
+
+
+def detach_partition(conn: Connection, table: str, name: str) -> None:
+    conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+
+
+def archive_table(conn: Connection, name: str, path: Path) -> int:
+    """Write ``name`` as gzip CSV (with header) to ``path``; returns the compressed size.
+
+    The file is written under a temporary name, fsynced and then renamed, so a
+    file at ``path`` is always complete.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".tmp-{path.name}")
+    cursor = conn.connection.driver_connection.cursor()
+    try:
+        with open(tmp, "wb") as raw:
+            with gzip.GzipFile(filename=path.name[: -len(".gz")], mode="wb", fileobj=raw) as compressed:
+                cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER)', compressed)
+            raw.flush()
+            os.fsync(raw.fileno())
+    finally:
+        cursor.close()
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+
+def drop_table(conn: Connection, name: str) -> None:
+    conn.execute(text(f'DROP TABLE "{name}"'))
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Sequence
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger("app.db")
+
+
+def ping_engine(engine: Engine) -> bool:
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception:
+        return False
+    return True
+
+
+def _checked_out(engine: Engine) -> int:
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return checkedout() if checkedout else 0
+
+
+class ReplicaRouter:
+    """Chooses the engine for read-only work.
+
+    Replicas are health-checked with the same ``SELECT 1`` probe as ``/_readyz``
+    at most every ``health_interval`` seconds; a replica that fails the probe or
+    raises a disconnect error is skipped until it passes again. With no healthy
+    replica the primary serves reads.
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: Sequence[Engine] = (),
+        strategy: str = "round_robin",
+        health_interval: float = 10.0,
+    ) -> None:
+        if strategy not in ("round_robin", "least_load"):
+            raise ValueError(f"Unsupported replica strategy: {strategy}")
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.strategy = strategy
+        self.health_interval = health_interval
+        self._healthy = {replica: True for replica in self.replicas}
+        self._checked_at = time.monotonic()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        for replica in self.replicas:
+            event.listen(replica, "handle_error", self._on_replica_error)
+
+    def read_engine(self) -> Engine:
+        if not self.replicas:
+            return self.primary
+        if time.monotonic() - self._checked_at >= self.health_interval:
+            self._refresh_health()
+        healthy = [replica for replica in self.replicas if self._healthy[replica]]
+        if not healthy:
+            return self.primary
+        if self.strategy == "least_load":
+            return min(healthy, key=_checked_out)
+        return healthy[next(self._counter) % len(healthy)]
+
+    def check_health(self) -> dict[str, bool]:
+        for replica in self.replicas:
+            self._set_health(replica, ping_engine(replica))
+        self._checked_at = time.monotonic()
+        return {replica.url.render_as_string(hide_password=True): ok for replica, ok in self._healthy.items()}
+
+    def _refresh_health(self) -> None:
+        # Only one request pays for the probe; the others keep the last known state.
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._checked_at >= self.health_interval:
+                self.check_health()
+        finally:
+            self._lock.release()
+
+    def _set_health(self, replica: Engine, healthy: bool) -> None:
+        if self._healthy.get(replica) != healthy:
+            logger.warning(
+                "read replica %s is %s",
+                replica.url.render_as_string(hide_password=True),
+                "healthy" if healthy else "unhealthy; routing reads elsewhere",
+            )
+        self._healthy[replica] = healthy
+
+    def _on_replica_error(self, context) -> None:
+        if context.is_disconnect or context.connection is None:
+            self._set_health(context.engine, False)
+
+
+class RoutingSession(Session):
+    """Session that sends reads to a replica and writes to the primary.
+
+    The replica is chosen once per session so a request reads from a single
+    snapshot source. Once the session writes (flush or DML statement) it stays
+    on the primary so later reads see its own writes.
+    """
+
+    def __init__(self, *args, router: ReplicaRouter, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.router = router
+        self._read_bind: Engine | None = None
+        self._use_primary = False
+
+    def use_primary(self) -> None:
+        self._use_primary = True
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._use_primary or self._flushing or isinstance(clause, UpdateBase):
+            self._use_primary = True
+            return self.router.primary
+        if self._read_bind is None:
+            self._read_bind = self.router.read_engine()
+        return self._read_bind
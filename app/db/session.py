@@ -1,24 +1,53 @@
 from __future__ import annotations
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.pool import PoolMonitor, TimedQueuePool
+from app.db.routing import ReplicaRouter, RoutingSession
 
-connect_args: dict[str, object] = {
-    "connect_timeout": settings.db_connect_timeout,
-}
-if settings.db_statement_timeout_ms > 0:
-    connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
 
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    pool_size=settings.db_pool_size,
-    max_overflow=settings.db_max_overflow,
-    pool_timeout=settings.db_pool_timeout,
-    pool_recycle=settings.db_pool_recycle,
-    connect_args=connect_args,
+def build_engine(url: str, name: str = "primary") -> Engine:
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        # Local stand-ins (tests, replica experiments) keep SQLAlchemy's default pool sizes;
+        # file databases are timed like PostgreSQL so tuning runs can be tried locally.
+        poolclass = TimedQueuePool if make_url(url).database not in (None, "", ":memory:") else None
+        return create_engine(url, pool_pre_ping=True, pool_logging_name=name, poolclass=poolclass)
+    connect_args: dict[str, object] = {
+        "connect_timeout": settings.db_connect_timeout,
+    }
+    if settings.db_statement_timeout_ms > 0:
+        connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+    return create_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_logging_name=name,
+        # PoolMonitor checks idle connections in the background instead; 0 keeps the per-checkout ping.
+        pool_pre_ping=settings.db_pool_liveness_interval <= 0,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args=connect_args,
+    )
+
+
+engine = build_engine(settings.database_url)
+replica_router = ReplicaRouter(
+    engine,
+    [
+        build_engine(url, f"replica{index}")
+        for index, url in enumerate(
+            (url.strip() for url in settings.database_replica_urls.split(",") if url.strip()), start=1
+        )
+    ],
+    strategy=settings.db_replica_strategy,
+    health_interval=settings.db_replica_health_interval,
 )
+engines = [engine, *replica_router.replicas]
+pool_monitor = PoolMonitor(engines, settings.db_pool_liveness_interval)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, router=replica_router)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# INSERT ... ON CONFLICT constructs; both dialects share the on_conflict_do_* API.
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _dialect(db: Session) -> str:
+    name = db.get_bind().dialect.name
+    if name not in _INSERTS:
+        raise NotImplementedError(f"upserts are not implemented for {name}")
+    return name
+
+
+def upsert(db: Session, model):
+    """``insert(model)`` for the session's dialect, with ``on_conflict_do_update``/``_nothing``."""
+    return _INSERTS[_dialect(db)](model)
+
+
+def greatest(db: Session, *values):
+    # SQLite's multi-argument max() is its GREATEST.
+    return (func.greatest if _dialect(db) == "postgresql" else func.max)(*values)
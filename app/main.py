@@ -1,23 +1,44 @@
 from __future__ import annotations
 
-import ipaddress
 import logging
 import time
 import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
 
+from anyio.to_thread import current_default_thread_limiter
 from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse
+from prometheus_client import REGISTRY
 from prometheus_fastapi_instrumentator import Instrumentator
-from fastapi.staticfiles import StaticFiles
-from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
-from app.api.routes import overview, scaffold, studies
+from app.api.admission import AdmissionMiddleware
+from app.api.compression import CompressionMiddleware
+from app.api.db_timing import DBTimingMiddleware
+from app.api.profiling import ProfileRequestMiddleware
+from app.api.routes import audit, overview, profiling, scaffold, studies, trajectories, tuning
+from app.api.staticfiles import (
+    IMMUTABLE_CACHE_CONTROL,
+    ImmutableStaticFiles,
+    PrecompressedStaticFiles,
+    static_root,
+)
+from app.api.templating import static_manifest
+from app.api.tuning import TuningMiddleware
 from app.core.config import settings
-from app.core.security import get_session_user, has_auth_users
-from app.db.session import engine
+from app.core.security import get_session_user, has_auth_users, is_private_address
+from app.db.instrumentation import RequestUsage, checkout_samples, instrument_engine, request_usage
+from app.db.pool import PoolCollector, dispose, prewarm
+from app.db.routing import ping_engine
+from app.db.session import engine, engines, pool_monitor
+from app.services.derivatives import DERIVED_SUBDIR
+from app.services.image_store import OBJECTS_SUBDIR
+from app.services.provider import provider_registry
+from app.services.streaming import ingestion_listener
 
 if not logging.getLogger().handlers:
     logging.basicConfig(
@@ -27,7 +48,24 @@ if not logging.getLogger().handlers:
 else:
     logging.getLogger().setLevel(settings.log_level.upper())
 
-app = FastAPI(title=settings.app_name)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Before the first request is accepted, so a deploy does not start on cold pools and caches.
+    # Sync routes and run_in_threadpool share anyio's default limiter.
+    current_default_thread_limiter().total_tokens = settings.resolved_threadpool_size
+    await run_in_threadpool(prewarm, engines)
+    pool_monitor.start()
+    app.state.provider = provider_registry.get()
+    await run_in_threadpool(provider_registry.warmup)
+    yield
+    # In-flight requests have drained (app.worker.UvicornWorker) by the time this runs.
+    ingestion_listener.stop()
+    pool_monitor.stop()
+    dispose(engines)
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 logger = logging.getLogger("app")
 if settings.environment == "prod" and settings.allow_phi:
     logger.warning("ALLOW_PHI is enabled in prod")
@@ -40,6 +78,7 @@ if not has_auth_users():
 
 if settings.metrics_enabled:
     Instrumentator().instrument(app).expose(app, endpoint=settings.metrics_path, include_in_schema=False)
+    REGISTRY.register(PoolCollector(engines))
 
 if settings.cors_allow_origins:
     app.add_middleware(
@@ -54,6 +93,8 @@ if settings.cors_allow_origins:
 @app.middleware("http")
 async def request_context_middleware(request: Request, call_next):
     request_id = request.headers.get(settings.request_id_header) or str(uuid.uuid4())
+    # Read by the slow-query log (app.db.instrumentation).
+    request.state.request_id = request_id
     start = time.monotonic()
     try:
         response = await call_next(request)
@@ -69,12 +110,15 @@ async def request_context_middleware(request: Request, call_next):
         raise
     duration_ms = (time.monotonic() - start) * 1000
     response.headers[settings.request_id_header] = request_id
+    usage = request_usage.get() or RequestUsage()
     logger.info(
-        "request completed method=%s path=%s status=%s duration_ms=%.2f request_id=%s",
+        "request completed method=%s path=%s status=%s duration_ms=%.2f db_queries=%s db_ms=%.2f request_id=%s",
         request.method,
         request.url.path,
         response.status_code,
         duration_ms,
+        usage.queries,
+        usage.db_seconds * 1000,
         request_id,
     )
     return response
@@ -85,13 +129,14 @@ class AuthMiddleware(BaseHTTPMiddleware):
         path = request.url.path
         if path in {"/_healthz", "/_readyz", "/login", "/logout"} or path.startswith("/static/") or path.startswith("/images/"):
             return await call_next(request)
-        if path == settings.metrics_path and request.client:
-            try:
-                client_ip = ipaddress.ip_address(request.client.host)
-                if client_ip.is_private or client_ip.is_loopback:
-                    return await call_next(request)
-            except ValueError:
-                pass
+        client_host = request.client.host if request.client else None
+        if path == settings.metrics_path and is_private_address(client_host):
+            return await call_next(request)
+        if path.startswith("/_profile"):
+            # Private networks only, signed in or not; elsewhere it does not exist.
+            if settings.profiling_enabled and is_private_address(client_host):
+                return await call_next(request)
+            return JSONResponse({"detail": "Not Found"}, status_code=status.HTTP_404_NOT_FOUND)
 
         auth_user = get_session_user(request)
         if auth_user:
@@ -113,6 +158,22 @@ app.add_middleware(
     same_site="lax",
     https_only=settings.environment == "prod",
 )
+if settings.db_instrumentation:
+    app.add_middleware(DBTimingMiddleware)
+if settings.profiling_enabled:
+    app.add_middleware(ProfileRequestMiddleware)
+app.add_middleware(AdmissionMiddleware)
+if settings.compression_enabled:
+    # Outside everything but TuningMiddleware, so it sees final headers (request id,
+    # session cookie, Server-Timing, profile name) and compresses every route's body.
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_bytes)
+if settings.tuning_mode:
+    # Added last, so it wraps compression too and its timings cover every middleware.
+    app.add_middleware(TuningMiddleware)
+    checkout_samples.enabled = True
+if settings.db_instrumentation or settings.tuning_mode:
+    for bound in engines:
+        instrument_engine(bound)
 
 
 @app.get("/_healthz", include_in_schema=False)
@@ -124,17 +185,34 @@ def healthcheck() -> dict[str, str]:
 def readiness(response: Response) -> dict[str, str]:
     if not settings.ready_check_db:
         return {"status": "ok"}
-    try:
-        with engine.connect() as connection:
-            connection.execute(text("SELECT 1"))
-    except Exception:
+    if not ping_engine(engine):
         response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
         return {"status": "error"}
     return {"status": "ok"}
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
-app.mount("/images", StaticFiles(directory="images"), name="images")
+app.mount(
+    "/static",
+    # Built assets have content-hashed names; the source fallback is versioned by ?v=.
+    PrecompressedStaticFiles(
+        directory=static_root(static_manifest),
+        cache_control=IMMUTABLE_CACHE_CONTROL if static_manifest else None,
+    ),
+    name="static",
+)
+# Store objects and derivatives are content-addressed, so they can be cached forever;
+# mounted before /images, which keeps serving legacy paths.
+for subdir, name in ((OBJECTS_SUBDIR, "image_objects"), (DERIVED_SUBDIR, "image_derivatives")):
+    directory = Path(settings.image_dir) / subdir
+    directory.mkdir(parents=True, exist_ok=True)
+    app.mount(f"/images/{subdir}", ImmutableStaticFiles(directory=directory), name=name)
+app.mount("/images", PrecompressedStaticFiles(directory=settings.image_dir), name="images")
 
 app.include_router(overview.router)
 app.include_router(studies.router)
-app.include_router(scaffold.router)
+app.include_router(scaffold.router)
+app.include_router(trajectories.router)
+app.include_router(audit.router)
+if settings.tuning_mode:
+    app.include_router(tuning.router)
+if settings.profiling_enabled:
+    app.include_router(profiling.router)
@@ -1,10 +1,20 @@
-from app.schemas.overview import OverviewResponse
+from app.schemas.audit import AccessAuditItem, AccessAuditPage, StudyDailyAccess, UserDailyAccess
+from app.schemas.overview import OverviewResponse, VolumeTrendResponse
 from app.schemas.study import NoduleItem, StudyDetail, StudyListItem, SummaryItem
+from app.schemas.trajectory import NoduleTrajectory, PatientTrajectories, TrajectoryPoint
 
 __all__ = [
+    "AccessAuditItem",
+    "AccessAuditPage",
     "NoduleItem",
+    "NoduleTrajectory",
     "OverviewResponse",
+    "PatientTrajectories",
+    "StudyDailyAccess",
     "StudyDetail",
     "StudyListItem",
     "SummaryItem",
-]
+    "TrajectoryPoint",
+    "UserDailyAccess",
+    "VolumeTrendResponse",
+]
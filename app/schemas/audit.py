@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+
+class AccessAuditItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    accessed_at: datetime
+    user_id: UUID
+    username: str
+    study_id: UUID
+    study_uid: str
+    action: str
+    ip_address: str
+
+
+class AccessAuditPage(BaseModel):
+    items: list[AccessAuditItem]
+    next_cursor: str | None = None
+
+
+class UserDailyAccess(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    day: date
+    user_id: UUID
+    username: str
+    accesses: int
+    studies: int
+
+
+class StudyDailyAccess(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    day: date
+    study_id: UUID
+    study_uid: str
+    accesses: int
+    users: int
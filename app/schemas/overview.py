@@ -31,4 +31,13 @@ class OverviewResponse(BaseModel):
 
     kpis: OverviewKpi
     risk_breakdown: list[RiskBreakdown]
-    volume_trend: list[VolumeTrendPoint]
+    volume_trend: list[VolumeTrendPoint]
+
+
+class VolumeTrendResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    bucket: str
+    points: list[VolumeTrendPoint]
+    by_site: dict[str, list[VolumeTrendPoint]]
+    by_risk: dict[str, list[VolumeTrendPoint]]
@@ -52,5 +52,7 @@ class StudyDetail(BaseModel):
     patient_uid: str
     anon_label: str
     image_path: str
-    summary: SummaryItem
+    thumbnail_path: str | None = None
+    preview_path: str | None = None
+    summary: SummaryItem | None = None
     nodules: list[NoduleItem]
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from datetime import date
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+
+class TrajectoryPoint(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    nodule_id: UUID
+    nodule_uid: str
+    study_id: UUID
+    study_uid: str
+    study_date: date
+    volume_mm3: float
+    diameter_mm: float
+    vdt_days: int | None = None
+    growth_percent: float | None = None
+    risk: str
+
+
+class NoduleTrajectory(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    track_id: UUID
+    patient_id: UUID
+    location: str
+    points: list[TrajectoryPoint]
+
+
+class PatientTrajectories(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    patient_id: UUID
+    tracks: list[NoduleTrajectory]
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import base64
+from datetime import date, datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import Date, cast, delete, func, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.db.models import AccessAudit, AccessAuditDaily, Study, User
+from app.db.upsert import greatest, upsert
+from app.services.date_range import time_window
+
+
+def utc_day(value: datetime) -> date:
+    # Naive timestamps are utcnow() values, as everywhere else in the app.
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def _utc_day_column(db: Session, column):
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.timezone("UTC", column), Date)
+    return func.date(column)
+
+
+def record_access(
+    db: Session,
+    user_id: UUID,
+    study_id: UUID,
+    action: str,
+    ip_address: str,
+    accessed_at: datetime | None = None,
+) -> AccessAudit:
+    """Add an audit row and count it in access_audit_daily. The caller owns the transaction.
+
+    The rollup is an upsert on (day, user, study), so concurrent views of the
+    same study only ever contend on that one row.
+    """
+    accessed_at = accessed_at or datetime.utcnow()
+    audit = AccessAudit(
+        user_id=user_id,
+        study_id=study_id,
+        action=action,
+        ip_address=ip_address,
+        accessed_at=accessed_at,
+    )
+    db.add(audit)
+
+    statement = upsert(db, AccessAuditDaily).values(
+        day=utc_day(accessed_at),
+        user_id=user_id,
+        study_id=study_id,
+        access_count=1,
+        last_accessed_at=accessed_at,
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["day", "user_id", "study_id"],
+            set_={
+                "access_count": AccessAuditDaily.access_count + 1,
+                "last_accessed_at": greatest(
+                    db, AccessAuditDaily.last_accessed_at, statement.excluded.last_accessed_at
+                ),
+            },
+        )
+    )
+    return audit
+
+
+def rebuild_access_rollup(db: Session, date_from: date | None = None, date_to: date | None = None) -> int:
+    """Recount access_audit_daily for the days in [date_from, date_to] from access_audits.
+
+    Only rebuild days whose audit partitions are still attached: archived
+    months exist only in the rollup. Returns the number of rows written. The
+    caller owns the transaction.
+    """
+    day = _utc_day_column(db, AccessAudit.accessed_at).label("day")
+    source = time_window(
+        select(
+            day,
+            AccessAudit.user_id,
+            AccessAudit.study_id,
+            func.count().label("access_count"),
+            func.max(AccessAudit.accessed_at).label("last_accessed_at"),
+        ),
+        AccessAudit.accessed_at,
+        date_from,
+        date_to,
+    ).group_by(day, AccessAudit.user_id, AccessAudit.study_id)
+
+    clear = delete(AccessAuditDaily)
+    if date_from:
+        clear = clear.where(AccessAuditDaily.day >= date_from)
+    if date_to:
+        clear = clear.where(AccessAuditDaily.day <= date_to)
+    db.execute(clear)
+    result = db.execute(
+        insert(AccessAuditDaily).from_select(
+            ["day", "user_id", "study_id", "access_count", "last_accessed_at"], source
+        )
+    )
+    return result.rowcount
+
+
+def encode_cursor(accessed_at: datetime, audit_id: UUID) -> str:
+    raw = f"{accessed_at.isoformat()}|{audit_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Inverse of ``encode_cursor``; raises ValueError for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        accessed_at, audit_id = raw.split("|")
+        return datetime.fromisoformat(accessed_at), UUID(audit_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def list_accesses(
+    db: Session,
+    user_id: UUID | None = None,
+    study_id: UUID | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    cursor: str | None = None,
+    limit: int = 100,
+) -> dict[str, object]:
+    """Newest-first page of audit rows after ``cursor``, plus the cursor of the next page.
+
+    Keyset on (accessed_at, id), so every page is an index range scan on
+    ix_access_audits_{accessed_id,user_accessed,study_accessed} however deep
+    the client has paged; the date bounds prune monthly partitions.
+    """
+    query = (
+        select(
+            AccessAudit.id,
+            AccessAudit.accessed_at,
+            AccessAudit.user_id,
+            User.username,
+            AccessAudit.study_id,
+            Study.study_uid,
+            AccessAudit.action,
+            AccessAudit.ip_address,
+        )
+        .join(User, User.id == AccessAudit.user_id)
+        .join(Study, Study.id == AccessAudit.study_id)
+        .order_by(AccessAudit.accessed_at.desc(), AccessAudit.id.desc())
+        .limit(limit + 1)
+    )
+    if user_id:
+        query = query.where(AccessAudit.user_id == user_id)
+    if study_id:
+        query = query.where(AccessAudit.study_id == study_id)
+    if cursor:
+        query = query.where(tuple_(AccessAudit.accessed_at, AccessAudit.id) < tuple_(*decode_cursor(cursor)))
+    rows = db.execute(time_window(query, AccessAudit.accessed_at, date_from, date_to)).all()
+    next_cursor = encode_cursor(rows[limit - 1].accessed_at, rows[limit - 1].id) if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+
+def _rollup_window(query, user_id: UUID | None, study_id: UUID | None, date_from: date | None, date_to: date | None):
+    if user_id:
+        query = query.where(AccessAuditDaily.user_id == user_id)
+    if study_id:
+        query = query.where(AccessAuditDaily.study_id == study_id)
+    if date_from:
+        query = query.where(AccessAuditDaily.day >= date_from)
+    if date_to:
+        query = query.where(AccessAuditDaily.day <= date_to)
+    return query
+
+
+def daily_user_counts(
+    db: Session,
+    user_id: UUID | None = None,
+    study_id: UUID | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: int = 1000,
+):
+    """Accesses and distinct studies per day and user, newest day first, from the rollup."""
+    query = (
+        select(
+            AccessAuditDaily.day,
+            AccessAuditDaily.user_id,
+            User.username,
+            func.sum(AccessAuditDaily.access_count).label("accesses"),
+            func.count(AccessAuditDaily.study_id).label("studies"),
+        )
+        .join(User, User.id == AccessAuditDaily.user_id)
+        .group_by(AccessAuditDaily.day, AccessAuditDaily.user_id, User.username)
+        .order_by(AccessAuditDaily.day.desc(), User.username)
+        .limit(limit)
+    )
+    return db.execute(_rollup_window(query, user_id, study_id, date_from, date_to)).all()
+
+
+def daily_study_counts(
+    db: Session,
+    user_id: UUID | None = None,
+    study_id: UUID | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    limit: int = 1000,
+):
+    """Accesses and distinct users per day and study, newest day first, from the rollup."""
+    query = (
+        select(
+            AccessAuditDaily.day,
+            AccessAuditDaily.study_id,
+            Study.study_uid,
+            func.sum(AccessAuditDaily.access_count).label("accesses"),
+            func.count(AccessAuditDaily.user_id).label("users"),
+        )
+        .join(Study, Study.id == AccessAuditDaily.study_id)
+        .group_by(AccessAuditDaily.day, AccessAuditDaily.study_id, Study.study_uid)
+        .order_by(AccessAuditDaily.day.desc(), Study.study_uid)
+        .limit(limit)
+    )
+    return db.execute(_rollup_window(query, user_id, study_id, date_from, date_to)).all()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+
+DATE_RANGE_PRESETS = {"last7": 7, "last30": 30, "last90": 90, "last365": 365}
+
+
+@dataclass(frozen=True)
+class DateRange:
+    preset: str | None = None
+    date_from: date | None = None
+    date_to: date | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.preset is None and self.date_from is None and self.date_to is None
+
+    def bounds(self, today: date | None = None) -> tuple[date | None, date | None]:
+        """Concrete inclusive bounds; explicit dates take precedence over the preset."""
+        date_from, date_to = self.date_from, self.date_to
+        if self.preset in DATE_RANGE_PRESETS:
+            today = today or date.today()
+            date_from = date_from or today - timedelta(days=DATE_RANGE_PRESETS[self.preset])
+            date_to = date_to or today
+        return date_from, date_to
+
+    def query_params(self) -> dict[str, str]:
+        params = {}
+        if self.preset:
+            params["range"] = self.preset
+        if self.date_from:
+            params["date_from"] = self.date_from.isoformat()
+        if self.date_to:
+            params["date_to"] = self.date_to.isoformat()
+        return params
+
+
+def time_window(query, column, date_from: date | None, date_to: date | None):
+    """Half-open UTC bounds on a timestamp partition key, so monthly partitions outside are pruned."""
+    if date_from:
+        query = query.where(column >= datetime.combine(date_from, time.min, tzinfo=timezone.utc))
+    if date_to:
+        query = query.where(
+            column < datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=timezone.utc)
+        )
+    return query
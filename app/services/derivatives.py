@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from io import BytesIO
+from pathlib import Path
+
+try:
+    import cairosvg
+except (ImportError, OSError):
+    # OSError: the package is installed but the cairo library (libcairo2) is not.
+    cairosvg = None
+
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
+
+from app.core.config import settings
+from app.services.image_store import content_digest, fanout_path, write_atomic
+
+logger = logging.getLogger("app.derivatives")
+
+# Derivatives live under the image root so they share the /images URL space.
+DERIVED_SUBDIR = "derived"
+VARIANTS = {"thumb": 320, "preview": 800}
+# Bump when rendering changes so stale derivatives get new names instead of being reused.
+RENDER_VERSION = 1
+
+_FILTER_BLOCK = re.compile(rb"<filter\b.*?</filter>", re.DOTALL)
+_FILTER_ATTR = re.compile(rb'\sfilter="[^"]*"')
+_SVG_ROOT = re.compile(rb"<svg\b[^>]*>")
+_SIZE_ATTR = re.compile(rb'\s(width|height)="[^"]*"')
+
+
+def output_suffix(source_suffix: str) -> str | None:
+    """Extension of the derivative for a source type with the installed backends."""
+    source_suffix = source_suffix.lower()
+    if source_suffix == ".svg":
+        if cairosvg is None:
+            return ".svg"
+        return ".webp" if PILImage is not None else ".png"
+    if PILImage is not None and source_suffix in {".png", ".jpg", ".jpeg", ".webp"}:
+        return ".webp"
+    return None
+
+
+def _lite_svg(source: bytes, width: int) -> bytes:
+    # Without a rasterizer, drop the filter effects (turbulence, blur) that make
+    # the originals slow to paint and let the viewBox scale to the target width.
+    data = _FILTER_BLOCK.sub(b"", source)
+    data = _FILTER_ATTR.sub(b"", data)
+    root = _SVG_ROOT.search(data)
+    if root:
+        tag = _SIZE_ATTR.sub(b"", root.group(0))
+        tag = tag[:4] + f' width="{width}"'.encode() + tag[4:]
+        data = data[: root.start()] + tag + data[root.end() :]
+    return data
+
+
+def _to_webp(image, width: int) -> bytes:
+    image.thumbnail((width, width * 4))
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    buffer = BytesIO()
+    image.save(buffer, format="WEBP", quality=80, method=4)
+    return buffer.getvalue()
+
+
+def render(source: bytes, source_suffix: str, width: int) -> bytes:
+    suffix = output_suffix(source_suffix)
+    if suffix is None:
+        raise ValueError(f"No derivative backend for {source_suffix}")
+    if suffix == ".svg":
+        return _lite_svg(source, width)
+    if source_suffix.lower() == ".svg":
+        png = cairosvg.svg2png(bytestring=source, output_width=width)
+        if PILImage is None:
+            return png
+        source = png
+    with PILImage.open(BytesIO(source)) as image:
+        image.load()
+        return _to_webp(image, width)
+
+
+class DerivativeCache:
+    """Content-addressed derivative files under ``root``, bounded by ``max_bytes``.
+
+    A hit refreshes the file's mtime; a write that pushes usage over the limit
+    deletes least-recently-used files until usage is back under 90% of it.
+    Usage is tracked per process and re-measured from disk on every eviction,
+    so several workers sharing the directory converge on the real total.
+    """
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._usage: int | None = None
+        self._lock = threading.Lock()
+
+    def get(self, relpath: Path) -> Path | None:
+        path = self.root / relpath
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, relpath: Path, data: bytes) -> Path:
+        path = self.root / relpath
+        write_atomic(path, data)
+        with self._lock:
+            if self._usage is None:
+                self._usage = self._measure()
+            else:
+                self._usage += len(data)
+            if self.max_bytes > 0 and self._usage > self.max_bytes:
+                self._evict(keep=path)
+        return path
+
+    def _files(self) -> list[tuple[float, int, Path]]:
+        files = []
+        for path in self.root.rglob("*"):
+            if not path.is_file() or path.name.startswith(".tmp-"):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _measure(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def _evict(self, keep: Path) -> None:
+        files = sorted(self._files())
+        usage = sum(size for _, size, _ in files)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in files:
+            if usage <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            usage -= size
+        self._usage = usage
+
+
+_cache = DerivativeCache(
+    Path(settings.image_dir) / DERIVED_SUBDIR,
+    settings.derivative_cache_max_mb * 1024 * 1024,
+)
+# (file_path, variant) -> (source mtime_ns, source size, derivative relpath)
+_index: dict[tuple[str, str], tuple[int, int, Path]] = {}
+
+
+def stored_derivative(relpath: str | None) -> str | None:
+    """``relpath`` if the derivative is still on disk (the LRU may have evicted it), else None."""
+    if relpath and (Path(settings.image_dir) / relpath).is_file():
+        return relpath
+    return None
+
+
+def derivative_path(file_path: str, variant: str) -> str | None:
+    """Path (relative to the image root) of a derivative, rendering it if it is missing.
+
+    Names hash the source digest, variant and renderer, so the URL changes
+    whenever the content would and can be cached as immutable. Returns None
+    when the source is missing or no backend can render its type. Ingest
+    (seeders, the Orthanc mirror, scripts/dedupe_images.py) stores the result
+    on the Image row; requests only read that column.
+    """
+    width = VARIANTS[variant]
+    source = Path(settings.image_dir) / file_path
+    suffix = output_suffix(source.suffix)
+    if suffix is None:
+        return None
+    try:
+        stat = source.stat()
+    except FileNotFoundError:
+        return None
+
+    indexed = _index.get((file_path, variant))
+    if indexed and indexed[:2] == (stat.st_mtime_ns, stat.st_size) and _cache.get(indexed[2]):
+        return f"{DERIVED_SUBDIR}/{indexed[2].as_posix()}"
+
+    # Store originals already carry their digest in the name; legacy paths are hashed.
+    data = None
+    source_digest = content_digest(file_path)
+    if source_digest is None:
+        data = source.read_bytes()
+        source_digest = hashlib.sha256(data).hexdigest()
+    digest = hashlib.sha256(f"{source_digest}|{variant}:{width}:{suffix}:{RENDER_VERSION}".encode())
+    relpath = fanout_path(digest.hexdigest(), suffix)
+    if _cache.get(relpath) is None:
+        try:
+            _cache.put(relpath, render(data or source.read_bytes(), source.suffix, width))
+        except Exception:
+            logger.exception("derivative rendering failed file=%s variant=%s", file_path, variant)
+            return None
+    _index[(file_path, variant)] = (stat.st_mtime_ns, stat.st_size, relpath)
+    return f"{DERIVED_SUBDIR}/{relpath.as_posix()}"
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+def lttb(points: Sequence[T], threshold: int, key: Callable[[T], tuple[float, float]]) -> list[T]:
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last point and, for every bucket in between, the point
+    forming the largest triangle with the previously kept point and the average
+    of the next bucket. ``key`` maps an item to its ``(x, y)`` coordinates.
+    """
+    size = len(points)
+    if threshold <= 0 or threshold >= size or size <= 2:
+        return list(points)
+    if threshold < 3:
+        return [points[0], points[-1]][:threshold]
+
+    coords = [key(point) for point in points]
+    sampled = [points[0]]
+    every = (size - 2) / (threshold - 2)
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_start = end
+        next_end = min(int((bucket + 2) * every) + 1, size)
+        if next_start >= next_end:
+            avg_x, avg_y = coords[-1]
+        else:
+            span = next_end - next_start
+            avg_x = sum(x for x, _ in coords[next_start:next_end]) / span
+            avg_y = sum(y for _, y in coords[next_start:next_end]) / span
+
+        anchor_x, anchor_y = coords[anchor]
+        best_area = -1.0
+        best = start
+        for index in range(start, min(end, size - 1)):
+            x, y = coords[index]
+            area = abs((anchor_x - avg_x) * (y - anchor_y) - (anchor_x - x) * (avg_y - anchor_y))
+            if area > best_area:
+                best_area = area
+                best = index
+        sampled.append(points[best])
+        anchor = best
+    sampled.append(points[-1])
+    return sampled
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import csv
+import io
+import zlib
+from collections.abc import Iterable, Iterator, Sequence
+
+# gzip container (header + CRC trailer) from a raw zlib stream.
+GZIP_WBITS = 31
+
+
+def iter_csv(
+    header: Sequence[str],
+    rows: Iterable[Sequence[object]],
+    compress: bool = False,
+    flush_rows: int = 500,
+) -> Iterator[bytes]:
+    """Encode rows as CSV chunks of roughly ``flush_rows`` lines each.
+
+    Only one chunk is buffered at a time; with ``compress`` the chunks are fed
+    through a single gzip stream so the output is one valid .gz member.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    compressor = zlib.compressobj(6, zlib.DEFLATED, GZIP_WBITS) if compress else None
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+        return compressor.compress(data) if compressor else data
+
+    writer.writerow(header)
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= flush_rows:
+            pending = 0
+            chunk = drain()
+            if chunk:
+                yield chunk
+    chunk = drain()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import math
+import os
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from uuid import UUID
+
+# Pairs costing more than this are left unmatched (new or resolved nodules).
+MAX_MATCH_COST = math.log(4)
+# Nodules in different lobes are never considered the same lesion.
+LOCATION_MISMATCH_COST = 10 * MAX_MATCH_COST
+GROWTH_MONITOR_PERCENT = 25.0
+
+
+@dataclass(frozen=True)
+class NoduleSnapshot:
+    id: UUID
+    location: str
+    volume_mm3: float
+
+
+@dataclass(frozen=True)
+class StudySnapshot:
+    id: UUID
+    study_date: date
+    nodules: tuple[NoduleSnapshot, ...]
+
+
+@dataclass(frozen=True)
+class FollowupMatch:
+    nodule_id: UUID
+    prior_nodule_id: UUID
+    prior_study_id: UUID
+    current_study_id: UUID
+    growth_percent: float
+    vdt_days: int | None
+    status: str
+
+
+def growth_percent(prior_volume: float, current_volume: float) -> float:
+    if prior_volume <= 0:
+        return 0.0
+    return (current_volume - prior_volume) / prior_volume * 100
+
+
+def volume_doubling_time(prior_volume: float, current_volume: float, interval_days: int) -> int | None:
+    """Schultz VDT; None when the nodule did not grow over a positive interval."""
+    if interval_days <= 0 or prior_volume <= 0 or current_volume <= prior_volume:
+        return None
+    return round(interval_days * math.log(2) / math.log(current_volume / prior_volume))
+
+
+def match_cost(prior: NoduleSnapshot, current: NoduleSnapshot) -> float:
+    cost = abs(math.log(max(current.volume_mm3, 1e-6) / max(prior.volume_mm3, 1e-6)))
+    if prior.location != current.location:
+        cost += LOCATION_MISMATCH_COST
+    return cost
+
+
+def _assign(cost: list[list[float]]) -> list[int]:
+    # Hungarian algorithm (Kuhn-Munkres) on a square matrix; returns row -> column.
+    size = len(cost)
+    u = [0.0] * (size + 1)
+    v = [0.0] * (size + 1)
+    owner = [0] * (size + 1)
+    way = [0] * (size + 1)
+    for row in range(1, size + 1):
+        owner[0] = row
+        col0 = 0
+        min_slack = [math.inf] * (size + 1)
+        used = [False] * (size + 1)
+        while True:
+            used[col0] = True
+            row0 = owner[col0]
+            delta = math.inf
+            col1 = 0
+            for col in range(1, size + 1):
+                if used[col]:
+                    continue
+                slack = cost[row0 - 1][col - 1] - u[row0] - v[col]
+                if slack < min_slack[col]:
+                    min_slack[col] = slack
+                    way[col] = col0
+                if min_slack[col] < delta:
+                    delta = min_slack[col]
+                    col1 = col
+            for col in range(size + 1):
+                if used[col]:
+                    u[owner[col]] += delta
+                    v[col] -= delta
+                else:
+                    min_slack[col] -= delta
+            col0 = col1
+            if owner[col0] == 0:
+                break
+        while col0:
+            col1 = way[col0]
+            owner[col0] = owner[col1]
+            col0 = col1
+    assignment = [-1] * size
+    for col in range(1, size + 1):
+        if owner[col]:
+            assignment[owner[col] - 1] = col - 1
+    return assignment
+
+
+def match_nodules(
+    prior: Sequence[NoduleSnapshot],
+    current: Sequence[NoduleSnapshot],
+) -> list[tuple[NoduleSnapshot, NoduleSnapshot]]:
+    if not prior or not current:
+        return []
+    size = max(len(prior), len(current))
+    # Padding cells cost MAX_MATCH_COST so "unmatched" beats any implausible pair.
+    matrix = [[MAX_MATCH_COST] * size for _ in range(size)]
+    for i, prior_nodule in enumerate(prior):
+        for j, current_nodule in enumerate(current):
+            matrix[i][j] = match_cost(prior_nodule, current_nodule)
+    pairs = []
+    for i, j in enumerate(_assign(matrix)):
+        if i >= len(prior) or j >= len(current):
+            continue
+        if matrix[i][j] > MAX_MATCH_COST:
+            continue
+        pairs.append((prior[i], current[j]))
+    return pairs
+
+
+def match_patient(studies: Sequence[StudySnapshot]) -> list[FollowupMatch]:
+    ordered = sorted(studies, key=lambda study: study.study_date)
+    matches = []
+    for prev, curr in zip(ordered, ordered[1:]):
+        interval_days = (curr.study_date - prev.study_date).days
+        for prior_nodule, current_nodule in match_nodules(prev.nodules, curr.nodules):
+            growth = growth_percent(prior_nodule.volume_mm3, current_nodule.volume_mm3)
+            matches.append(
+                FollowupMatch(
+                    nodule_id=current_nodule.id,
+                    prior_nodule_id=prior_nodule.id,
+                    prior_study_id=prev.id,
+                    current_study_id=curr.id,
+                    growth_percent=round(growth, 2),
+                    vdt_days=volume_doubling_time(
+                        prior_nodule.volume_mm3, current_nodule.volume_mm3, interval_days
+                    ),
+                    status="monitor" if growth >= GROWTH_MONITOR_PERCENT else "stable",
+                )
+            )
+    return matches
+
+
+def build_followups(
+    studies_by_patient: Mapping[object, Sequence[StudySnapshot]],
+    max_workers: int | None = None,
+) -> list[FollowupMatch]:
+    groups = [studies for studies in studies_by_patient.values() if len(studies) > 1]
+    if max_workers == 1 or len(groups) < 2:
+        results: Iterable[list[FollowupMatch]] = map(match_patient, groups)
+        return [match for matches in results for match in matches]
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(groups) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(match_patient, groups, chunksize=chunksize)
+        return [match for matches in results for match in matches]
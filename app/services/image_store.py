@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from app.core.config import settings
+
+# Originals live under the image root so they share the /images URL space.
+OBJECTS_SUBDIR = "objects"
+# Text formats get a .gz sibling at write time so serving never compresses.
+PRECOMPRESS_SUFFIXES = {".svg"}
+_DIGEST_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+
+def fanout_path(digest: str, suffix: str) -> Path:
+    return Path(digest[:2]) / digest[2:4] / f"{digest}{suffix}"
+
+
+def content_digest(relpath: str) -> str | None:
+    """SHA-256 encoded in a content-addressed path, or None for legacy paths."""
+    stem = Path(relpath).stem
+    return stem if _DIGEST_NAME.match(stem) else None
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+class ImageStore:
+    """Image originals keyed by SHA-256 in a two-level fan-out layout.
+
+    Writing content that is already stored is a no-op, so disk usage grows
+    with unique content only. Returned paths are relative to the image root
+    and embed the digest, which makes their URLs safe to cache forever.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def put(self, data: bytes, suffix: str) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        relpath = Path(OBJECTS_SUBDIR) / fanout_path(digest, suffix.lower())
+        path = self.root / relpath
+        if not path.exists():
+            write_atomic(path, data)
+        compressed = path.with_name(path.name + ".gz")
+        if path.suffix in PRECOMPRESS_SUFFIXES and not compressed.exists():
+            write_atomic(compressed, gzip.compress(data, compresslevel=9, mtime=0))
+        return relpath.as_posix()
+
+    def put_file(self, source: Path) -> str:
+        return self.put(source.read_bytes(), source.suffix)
+
+    def path(self, relpath: str) -> Path:
+        return self.root / relpath
+
+
+image_store = ImageStore(Path(settings.image_dir))
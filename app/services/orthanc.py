@@ -0,0 +1,400 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Client, Image, Patient, Series, Site, Study
+from app.db.session import SessionLocal
+from app.db.upsert import upsert
+from app.services.derivatives import derivative_path
+from app.services.image_store import image_store
+from app.services.site_stats import refresh_site_stats
+from app.services.trajectories import rebuild_trajectories
+
+logger = logging.getLogger("app.orthanc")
+
+# Mirrored studies carry no qCT results until the analysis pipeline writes them.
+MIRROR_STATUS = "received"
+MIRROR_RISK = "pending"
+UNKNOWN_INSTITUTION = "Unknown institution"
+
+
+@dataclass
+class OrthancSeries:
+    orthanc_id: str
+    series_uid: str
+    description: str
+    instance_id: str | None
+    preview: bytes | None = None
+
+
+@dataclass
+class OrthancStudy:
+    orthanc_id: str
+    study_uid: str
+    study_date: date
+    institution: str
+    patient_uid: str
+    birth_year: int
+    sex: str
+    series: list[OrthancSeries] = field(default_factory=list)
+
+
+def _dicom_date(value: str | None) -> date | None:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:8], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def parse_study(payload: dict) -> OrthancStudy | None:
+    """Expanded ``/tools/find`` study -> OrthancStudy; None without a StudyInstanceUID."""
+    tags = payload.get("MainDicomTags") or {}
+    patient = payload.get("PatientMainDicomTags") or {}
+    study_uid = (tags.get("StudyInstanceUID") or "").strip()
+    if not study_uid:
+        return None
+    birth = _dicom_date(patient.get("PatientBirthDate"))
+    return OrthancStudy(
+        orthanc_id=payload["ID"],
+        study_uid=study_uid[:64],
+        # StudyDate is optional in DICOM; the archive's last update is the next best date.
+        study_date=_dicom_date(tags.get("StudyDate"))
+        or _dicom_date(payload.get("LastUpdate"))
+        or date.today(),
+        institution=(tags.get("InstitutionName") or "").strip()[:200] or UNKNOWN_INSTITUTION,
+        patient_uid=(patient.get("PatientID") or payload.get("ParentPatient") or "")[:64],
+        birth_year=birth.year if birth else 0,
+        sex=(patient.get("PatientSex") or "").strip()[:16] or "U",
+    )
+
+
+def parse_series(payload: dict) -> OrthancSeries | None:
+    tags = payload.get("MainDicomTags") or {}
+    series_uid = (tags.get("SeriesInstanceUID") or "").strip()
+    if not series_uid:
+        return None
+    instances = payload.get("Instances") or []
+    return OrthancSeries(
+        orthanc_id=payload["ID"],
+        series_uid=series_uid[:64],
+        description=(tags.get("SeriesDescription") or tags.get("Modality") or "")[:200],
+        instance_id=instances[0] if instances else None,
+    )
+
+
+class OrthancClient:
+    """Orthanc REST client over one keep-alive connection pool.
+
+    At most ``max_connections`` requests are in flight; the rest wait on the
+    semaphore rather than in httpx's pool, where they would count against the
+    pool timeout.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        username: str = "",
+        password: str = "",
+        timeout: float = 10.0,
+        max_connections: int = 8,
+    ) -> None:
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            auth=httpx.BasicAuth(username, password) if username else None,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._slots = asyncio.Semaphore(max_connections)
+
+    @classmethod
+    def from_settings(cls) -> OrthancClient:
+        return cls(
+            settings.orthanc_url,
+            username=settings.orthanc_username,
+            password=settings.orthanc_password,
+            timeout=settings.orthanc_timeout_seconds,
+            max_connections=settings.orthanc_max_connections,
+        )
+
+    async def __aenter__(self) -> OrthancClient:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        async with self._slots:
+            response = await self._http.request(method, path, **kwargs)
+        response.raise_for_status()
+        return response
+
+    async def system(self) -> dict:
+        return (await self._request("GET", "/system")).json()
+
+    async def find_studies(
+        self, query: dict[str, str] | None = None, batch: int = 100
+    ) -> AsyncIterator[list[dict]]:
+        """Expanded studies matching ``query``, ``batch`` per ``/tools/find`` call."""
+        since = 0
+        while True:
+            page = (
+                await self._request(
+                    "POST",
+                    "/tools/find",
+                    json={"Level": "Study", "Query": query or {}, "Expand": True, "Since": since, "Limit": batch},
+                )
+            ).json()
+            if page:
+                yield page
+            if len(page) < batch:
+                return
+            since += batch
+
+    async def changes(self, since: int, limit: int) -> dict:
+        """One page of the change log: ``{"Changes": [...], "Done": bool, "Last": seq}``."""
+        return (await self._request("GET", "/changes", params={"since": since, "limit": limit})).json()
+
+    async def last_change(self) -> int:
+        return int((await self._request("GET", "/changes", params={"last": ""})).json()["Last"])
+
+    async def study(self, orthanc_id: str) -> dict:
+        return (await self._request("GET", f"/studies/{orthanc_id}")).json()
+
+    async def series(self, orthanc_id: str) -> dict:
+        return (await self._request("GET", f"/series/{orthanc_id}")).json()
+
+    async def study_series(self, orthanc_id: str) -> list[dict]:
+        return (await self._request("GET", f"/studies/{orthanc_id}/series")).json()
+
+    async def instance_preview(self, instance_id: str) -> bytes:
+        response = await self._request("GET", f"/instances/{instance_id}/preview", headers={"Accept": "image/png"})
+        return response.content
+
+
+async def load_studies(
+    client: OrthancClient, payloads: list[dict], previews: bool = True, tolerant: bool = True
+) -> list[OrthancStudy]:
+    """Parse a page of studies and fetch their series (and one preview per series) concurrently.
+
+    With ``tolerant``, a study whose series cannot be read is returned without
+    series and a failed preview is skipped; a full re-sync fills them in.
+    Otherwise the first HTTP error propagates, for callers that retry the page.
+    """
+    studies = [study for study in map(parse_study, payloads) if study is not None]
+
+    async def load_preview(series: OrthancSeries) -> None:
+        try:
+            series.preview = await client.instance_preview(series.instance_id)
+        except httpx.HTTPError as exc:
+            if not tolerant:
+                raise
+            logger.warning("Orthanc preview of instance %s failed: %s", series.instance_id, exc)
+
+    async def load(study: OrthancStudy) -> None:
+        try:
+            payloads = await client.study_series(study.orthanc_id)
+        except httpx.HTTPError as exc:
+            if not tolerant:
+                raise
+            logger.warning("Orthanc series of study %s failed: %s", study.orthanc_id, exc)
+            return
+        study.series = [series for series in map(parse_series, payloads) if series is not None]
+        if previews:
+            await asyncio.gather(*(load_preview(series) for series in study.series if series.instance_id))
+
+    await asyncio.gather(*(load(study) for study in studies))
+    return studies
+
+
+def _client_id(db: Session) -> uuid.UUID:
+    client_id = db.scalar(select(Client.id).where(Client.name == settings.orthanc_client_name))
+    if client_id is None:
+        client = Client(name=settings.orthanc_client_name)
+        db.add(client)
+        db.flush()
+        client_id = client.id
+    return client_id
+
+
+def _site_ids(db: Session, client_id: uuid.UUID, names: set[str]) -> dict[str, uuid.UUID]:
+    sites = dict(
+        db.execute(select(Site.name, Site.id).where(Site.client_id == client_id, Site.name.in_(names))).all()
+    )
+    missing = [Site(client_id=client_id, name=name, location="") for name in sorted(names - sites.keys())]
+    if missing:
+        db.add_all(missing)
+        db.flush()
+        sites.update({site.name: site.id for site in missing})
+    return sites
+
+
+def _upsert_rows(db: Session, model, key: str, rows: list[dict], update: tuple[str, ...]) -> dict[str, uuid.UUID]:
+    """Bulk INSERT ... ON CONFLICT (key) DO UPDATE; returns key -> id for every row."""
+    if not rows:
+        return {}
+    statement = upsert(db, model)
+    statement = statement.on_conflict_do_update(
+        index_elements=[key],
+        set_={column: getattr(statement.excluded, column) for column in (*update, "updated_at")},
+    ).returning(getattr(model, key), model.id)
+    return dict(db.execute(statement, rows).all())
+
+
+def anon_label(patient_uid: str) -> str:
+    return f"Anon-{hashlib.sha256(patient_uid.encode('utf-8')).hexdigest()[:8]}"
+
+
+def mirror_studies(db: Session, studies: list[OrthancStudy]) -> dict[str, uuid.UUID]:
+    """Upsert a batch of Orthanc studies into patients/studies/series/images.
+
+    One bulk statement per table. Existing studies keep their status, risk and
+    qCT results; only the DICOM-derived columns are refreshed, and the
+    trajectories of patients whose studies moved to another patient or date
+    are rebuilt. Returns the local id of every study by StudyInstanceUID. The
+    caller owns the transaction.
+    """
+    if not studies:
+        return {}
+    now = datetime.utcnow()
+    stamps = {"created_at": now, "updated_at": now}
+    client_id = _client_id(db)
+    site_ids = _site_ids(db, client_id, {study.institution for study in studies})
+
+    patients = {
+        study.patient_uid: {
+            "id": uuid.uuid4(),
+            "site_id": site_ids[study.institution],
+            "patient_uid": study.patient_uid,
+            "anon_label": anon_label(study.patient_uid),
+            "birth_year": study.birth_year,
+            "sex": study.sex,
+            **stamps,
+        }
+        for study in studies
+    }
+    patient_ids = _upsert_rows(db, Patient, "patient_uid", list(patients.values()), ("site_id", "birth_year", "sex"))
+
+    study_rows = {
+        study.study_uid: {
+            "id": uuid.uuid4(),
+            "patient_id": patient_ids[study.patient_uid],
+            "site_id": site_ids[study.institution],
+            "study_uid": study.study_uid,
+            "study_date": study.study_date,
+            "status": MIRROR_STATUS,
+            "overall_risk": MIRROR_RISK,
+            "nodule_count": 0,
+            **stamps,
+        }
+        for study in studies
+    }
+    previous = {
+        study_uid: (patient_id, study_date)
+        for study_uid, patient_id, study_date in db.execute(
+            select(Study.study_uid, Study.patient_id, Study.study_date).where(Study.study_uid.in_(list(study_rows)))
+        )
+    }
+    study_ids = _upsert_rows(
+        db, Study, "study_uid", list(study_rows.values()), ("patient_id", "site_id", "study_date")
+    )
+    # Trajectory points copy the patient and date of their study; new studies have no nodules yet.
+    moved: set[uuid.UUID] = set()
+    for study_uid, (patient_id, study_date) in previous.items():
+        row = study_rows[study_uid]
+        if (row["patient_id"], row["study_date"]) != (patient_id, study_date):
+            moved.update((patient_id, row["patient_id"]))
+    if moved:
+        rebuild_trajectories(db, moved)
+
+    series_rows, image_rows = {}, {}
+    for study in studies:
+        for series in study.series:
+            series_rows[series.series_uid] = {
+                "id": uuid.uuid4(),
+                "study_id": study_ids[study.study_uid],
+                "series_uid": series.series_uid,
+                "description": series.description,
+                **stamps,
+            }
+    series_ids = _upsert_rows(db, Series, "series_uid", list(series_rows.values()), ("study_id", "description"))
+
+    for study in studies:
+        for series in study.series:
+            if series.preview is None:
+                continue
+            image_rows[series.instance_id] = {
+                "id": uuid.uuid4(),
+                "series_id": series_ids[series.series_uid],
+                "image_uid": series.instance_id,
+                "file_path": image_store.put(series.preview, ".png"),
+                **stamps,
+            }
+    for row in image_rows.values():
+        # Rendered here so the detail view only reads the stored paths.
+        row["thumbnail_path"] = derivative_path(row["file_path"], "thumb")
+        row["preview_path"] = derivative_path(row["file_path"], "preview")
+    _upsert_rows(
+        db,
+        Image,
+        "image_uid",
+        list(image_rows.values()),
+        ("series_id", "file_path", "thumbnail_path", "preview_path"),
+    )
+    return study_ids
+
+
+def _store(studies: list[OrthancStudy]) -> int:
+    with SessionLocal() as db:
+        # Site lookups must see rows created by earlier batches.
+        db.use_primary()
+        written = mirror_studies(db, studies)
+        db.commit()
+    return len(written)
+
+
+def _refresh_stats() -> None:
+    with SessionLocal() as db:
+        db.use_primary()
+        refresh_site_stats(db)
+        db.commit()
+
+
+async def mirror_from_orthanc(
+    client: OrthancClient,
+    query: dict[str, str] | None = None,
+    previews: bool = True,
+    batch: int | None = None,
+) -> int:
+    """Copy every study matching ``query`` into the local tables, one transaction per page.
+
+    The next page is requested while the previous one is written, so the
+    database and Orthanc work overlap. Returns the number of studies mirrored.
+    """
+    total = 0
+    pending: asyncio.Task | None = None
+    async for page in client.find_studies(query, batch or settings.orthanc_find_batch):
+        studies = await load_studies(client, page, previews=previews)
+        if pending is not None:
+            total += await pending
+        pending = asyncio.create_task(asyncio.to_thread(_store, studies))
+    if pending is not None:
+        total += await pending
+    await asyncio.to_thread(_refresh_stats)
+    logger.info("mirrored %s Orthanc studies", total)
+    return total
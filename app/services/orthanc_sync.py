@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import uuid
+from datetime import datetime
+
+import httpx
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import IngestionLog, OrthancSyncState, Patient, Study
+from app.db.session import SessionLocal
+from app.db.upsert import upsert
+from app.services.orthanc import OrthancClient, OrthancStudy, load_studies, mirror_from_orthanc, mirror_studies
+from app.services.site_stats import refresh_site_stats
+
+logger = logging.getLogger("app.orthanc_sync")
+
+# orthanc_sync_state row of the /changes feed.
+CHECKPOINT = "changes"
+# Series changes are resolved to their study; instance changes are covered by
+# the StableStudy Orthanc emits once a study stops receiving instances.
+SERIES_CHANGES = {"NewSeries", "StableSeries"}
+# Deletions are not mirrored: audits and qCT results keep referencing the study.
+DELETED = "Deleted"
+
+
+def read_checkpoint() -> int | None:
+    with SessionLocal() as db:
+        db.use_primary()
+        return db.scalar(select(OrthancSyncState.last_seq).where(OrthancSyncState.name == CHECKPOINT))
+
+
+def _save_checkpoint(db: Session, seq: int) -> None:
+    statement = upsert(db, OrthancSyncState).values(name=CHECKPOINT, last_seq=seq, updated_at=datetime.utcnow())
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"last_seq": statement.excluded.last_seq, "updated_at": statement.excluded.updated_at},
+        )
+    )
+
+
+def save_checkpoint(seq: int) -> None:
+    with SessionLocal() as db:
+        _save_checkpoint(db, seq)
+        db.commit()
+
+
+def apply_changes(
+    expected_seq: int, last_seq: int, studies: list[OrthancStudy], reasons: dict[str, list[str]]
+) -> int:
+    """Write one page of the change feed and advance the checkpoint in the same transaction.
+
+    The checkpoint row is locked and compared with the sequence the page was
+    read after, so a worker that raced another on the same page drops its
+    copy instead of applying it twice. Each study gets an IngestionLog event
+    and only the touched sites (before and after the upsert) have their
+    overview stats refreshed. Returns the number of studies written.
+    """
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        db.use_primary()
+        current = db.scalar(
+            select(OrthancSyncState.last_seq).where(OrthancSyncState.name == CHECKPOINT).with_for_update()
+        )
+        if current != expected_seq:
+            logger.warning("checkpoint moved from %s to %s; another worker applied this page", expected_seq, current)
+            return 0
+        # The upsert can move a study and its patient to another site (InstitutionName
+        # changed); the sites they leave need their stats refreshed too.
+        previous_sites = set(
+            db.scalars(select(Study.site_id).where(Study.study_uid.in_([study.study_uid for study in studies])))
+        ) | set(
+            db.scalars(
+                select(Patient.site_id).where(Patient.patient_uid.in_([study.patient_uid for study in studies]))
+            )
+        )
+        study_ids = mirror_studies(db, studies)
+        if study_ids:
+            db.execute(
+                insert(IngestionLog),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "study_id": study_ids[study.study_uid],
+                        "status": "completed",
+                        "message": f"Orthanc {', '.join(reasons[study.orthanc_id])}: {len(study.series)} series",
+                        "started_at": now,
+                        "completed_at": now,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                    for study in studies
+                ],
+            )
+            site_ids = set(db.scalars(select(Study.site_id).where(Study.id.in_(list(study_ids.values())))))
+            refresh_site_stats(db, site_ids=site_ids | previous_sites)
+        _save_checkpoint(db, last_seq)
+        db.commit()
+    return len(study_ids)
+
+
+async def _unless_missing(request) -> dict | None:
+    # The resource may have been deleted after the change was logged.
+    try:
+        return await request
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code == 404:
+            return None
+        raise
+
+
+async def bootstrap(client: OrthancClient, previews: bool = True) -> int:
+    """First run: mirror the whole archive, then follow the feed from where it stood before the copy.
+
+    Changes logged while the copy runs are replayed afterwards; the upserts
+    make that harmless.
+    """
+    last = await client.last_change()
+    total = await mirror_from_orthanc(client, previews=previews)
+    await asyncio.to_thread(save_checkpoint, last)
+    logger.info("bootstrapped the Orthanc mirror with %s studies; following changes after %s", total, last)
+    return last
+
+
+async def sync_page(client: OrthancClient, batch: int, previews: bool = True) -> bool:
+    """Apply the next page of ``/changes`` after the checkpoint; True once the feed is caught up.
+
+    The work per page depends on the studies it mentions, never on the size
+    of the archive.
+    """
+    seq = await asyncio.to_thread(read_checkpoint)
+    if seq is None:
+        await bootstrap(client, previews)
+        return False
+    page = await client.changes(seq, batch)
+
+    reasons: dict[str, dict[str, None]] = {}
+    series_changes: dict[str, str] = {}
+    for change in page["Changes"]:
+        kind, level = change.get("ChangeType"), change.get("ResourceType")
+        if level == "Study" and kind != DELETED:
+            reasons.setdefault(change["ID"], {})[kind] = None
+        elif level == "Series" and kind in SERIES_CHANGES:
+            series_changes.setdefault(change["ID"], kind)
+    parents = await asyncio.gather(*(_unless_missing(client.series(series_id)) for series_id in series_changes))
+    for kind, parent in zip(series_changes.values(), parents):
+        if parent and parent.get("ParentStudy"):
+            reasons.setdefault(parent["ParentStudy"], {})[kind] = None
+
+    payloads = await asyncio.gather(*(_unless_missing(client.study(study_id)) for study_id in reasons))
+    studies = await load_studies(client, [payload for payload in payloads if payload], previews, tolerant=False)
+    written = await asyncio.to_thread(
+        apply_changes, seq, int(page["Last"]), studies, {key: list(kinds) for key, kinds in reasons.items()}
+    )
+    if page["Changes"]:
+        logger.info("applied Orthanc changes %s..%s (%s studies)", seq + 1, page["Last"], written)
+    return bool(page["Done"])
+
+
+async def _pause(stop: asyncio.Event, seconds: float) -> None:
+    try:
+        await asyncio.wait_for(stop.wait(), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def follow_changes(
+    client: OrthancClient, stop: asyncio.Event, previews: bool = True, until_caught_up: bool = False
+) -> None:
+    """Apply change pages until ``stop`` is set, polling every ORTHANC_SYNC_POLL_SECONDS once caught up.
+
+    Orthanc or database errors retry the same page (the checkpoint has not
+    moved) after an exponential, jittered backoff capped at
+    ORTHANC_SYNC_MAX_BACKOFF_SECONDS.
+    """
+    backoff = 1.0
+    while not stop.is_set():
+        try:
+            done = await sync_page(client, settings.orthanc_changes_batch, previews)
+        except (httpx.HTTPError, SQLAlchemyError) as exc:
+            delay = backoff * random.uniform(1.0, 1.5)
+            logger.warning("Orthanc sync failed (%s); retrying in %.1fs", exc, delay)
+            backoff = min(backoff * 2, settings.orthanc_sync_max_backoff_seconds)
+            await _pause(stop, delay)
+            continue
+        backoff = 1.0
+        if done:
+            if until_caught_up:
+                return
+            await _pause(stop, settings.orthanc_sync_poll_seconds)
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from functools import lru_cache
+from pathlib import Path
+
+from app.core.config import settings
+
+# Leaf frames of a thread with nothing to do; skipped unless idle stacks are asked for.
+IDLE_FUNCTIONS = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("runners.py", "run"),
+}
+# Set by app.api.profiling.ProfileRequestMiddleware to the profile of this request;
+# copied into the tasks and threadpool calls the request spawns.
+profiled_request: contextvars.ContextVar[object | None] = contextvars.ContextVar("profiled_request", default=None)
+
+# One profile at a time per worker: two samplers would each slow the other's subject.
+_busy = threading.Lock()
+
+Selector = Callable[[int, object], bool]
+
+
+@lru_cache(maxsize=None)
+def _short_path(filename: str) -> str:
+    for root in sorted({os.path.abspath(path) for path in sys.path}, key=len, reverse=True):
+        if filename.startswith(root + os.sep):
+            return filename[len(root) + 1 :]
+    return filename
+
+
+@lru_cache(maxsize=16384)
+def _label(code) -> str:
+    return f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FUNCTIONS
+
+
+class StackSampler:
+    """Samples the Python stack of every thread of this worker from a background thread.
+
+    Each sample walks ``sys._current_frames()``; nothing is installed in the
+    sampled threads, so the cost is the sampler's own (one GIL slice per
+    sample, smaller still when idle threads are skipped before their stacks
+    are walked). Counts are kept per collapsed stack, root first and the
+    thread name as the root frame: the format of flamegraph.pl, speedscope
+    and inferno.
+    """
+
+    def __init__(self, interval: float, include_idle: bool = False, select: Selector | None = None) -> None:
+        self.interval = interval
+        self.include_idle = include_idle
+        self.select = select
+        self.counts: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sample(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        self.samples += 1
+        for ident, frame in sys._current_frames().items():
+            if ident == own or (not self.include_idle and _is_idle(frame)):
+                continue
+            if self.select is not None and not self.select(ident, frame):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.counts[";".join(reversed(stack))] += 1
+
+    def run(self, seconds: float) -> None:
+        # The sampler needs the GIL to take a sample, so while a thread is busy in
+        # Python samples come at most every switch interval (5 ms by default). The
+        # interval is process-wide and left alone: lowering it would change GIL
+        # scheduling for every other request on the worker.
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline and not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self, seconds: float) -> None:
+        self._thread = threading.Thread(target=self.run, args=(seconds,), name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+def profile_worker(seconds: float, interval: float, include_idle: bool = False) -> StackSampler | None:
+    """Sample the whole worker for ``seconds``; None if another profile is running. Blocks."""
+    if not _busy.acquire(blocking=False):
+        return None
+    try:
+        sampler = StackSampler(interval, include_idle)
+        sampler.run(seconds)
+        return sampler
+    finally:
+        _busy.release()
+
+
+def request_selector(marker: object, loop: asyncio.AbstractEventLoop, loop_thread: int) -> Selector:
+    """Keep only the threads running on behalf of the request whose profiled_request is ``marker``.
+
+    On the event loop thread that is when the current task carries the
+    request's context; in the threadpool, when the anyio worker runs a call
+    in it (the ``context`` local of its run loop).
+    """
+
+    def select(ident: int, frame) -> bool:
+        if ident == loop_thread:
+            task = asyncio.current_task(loop)
+            return task is not None and task.get_context().get(profiled_request) is marker
+        while frame is not None:
+            if "context" in frame.f_code.co_varnames:
+                context = frame.f_locals.get("context")
+                if isinstance(context, contextvars.Context):
+                    return context.get(profiled_request) is marker
+            frame = frame.f_back
+        return False
+
+    return select
+
+
+def start_request_profile(marker: object) -> StackSampler | None:
+    """Sampler for one request, capped at PROFILE_MAX_SECONDS; None if another profile is running."""
+    if not _busy.acquire(blocking=False):
+        return None
+    sampler = StackSampler(
+        settings.profile_request_interval_ms / 1000,
+        include_idle=False,
+        select=request_selector(marker, asyncio.get_running_loop(), threading.get_ident()),
+    )
+    sampler.start(settings.profile_max_seconds)
+    return sampler
+
+
+def finish_request_profile(sampler: StackSampler, name: str) -> None:
+    """Stop the sampler and write its collapsed stacks to PROFILE_DIR/<name>.folded. Blocks."""
+    try:
+        sampler.stop()
+    finally:
+        _busy.release()
+    directory = Path(settings.profile_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{name}.folded").write_text(sampler.collapsed(), encoding="utf-8")
+    # Keep the newest PROFILE_KEEP files; workers share the directory and may delete concurrently.
+    try:
+        profiles = sorted(directory.glob("*.folded"), key=lambda path: path.stat().st_mtime, reverse=True)
+        for stale in profiles[settings.profile_keep :]:
+            stale.unlink(missing_ok=True)
+    except FileNotFoundError:
+        pass
+
+
+def request_profile_path(name: str) -> Path | None:
+    path = Path(settings.profile_dir) / f"{name}.folded"
+    return path if path.is_file() else None
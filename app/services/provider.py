@@ -1,23 +1,69 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import logging
-from typing import Protocol
+import threading
+import time
+from datetime import date
+from typing import Iterator, Protocol
+from uuid import UUID
 
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.services import queries
+from app.db.session import SessionLocal
+from app.schemas.study import StudyListItem
+from app.services import derivatives, orthanc_sync, queries
+from app.services.cache import TTLCache
+from app.services.orthanc import OrthancClient, mirror_from_orthanc
+from app.services.scope import GLOBAL_SCOPE, TenantScope
 
 
 class DataProvider(Protocol):
-    def get_overview_kpis(self, db: Session) -> dict[str, int]:
+    """Read API behind every page.
+
+    Implementations may also define ``warmup()``, which ProviderRegistry runs
+    once per worker before it serves traffic.
+    """
+
+    def get_overview_generation(self, db: Session) -> str | None:
+        ...
+
+    def get_overview_kpis(self, db: Session, scope: TenantScope | None = None) -> dict[str, int]:
         ...
 
-    def get_risk_breakdown(self, db: Session) -> list[dict[str, int]]:
+    def get_risk_breakdown(
+        self, db: Session, scope: TenantScope | None = None
+    ) -> list[dict[str, int]]:
         ...
 
-    def get_volume_trend(self, db: Session) -> list[dict[str, float]]:
+    def get_overview_summary(self, db: Session, scope: TenantScope | None = None) -> dict[str, object]:
+        ...
+
+    def get_volume_trend(
+        self,
+        db: Session,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        bucket: str = "day",
+        max_points: int | None = None,
+        scope: TenantScope | None = None,
+    ) -> list[dict[str, float]]:
+        ...
+
+    def get_volume_trend_splits(
+        self,
+        db: Session,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        bucket: str = "day",
+        max_points: int | None = None,
+        scope: TenantScope | None = None,
+    ) -> dict[str, object]:
+        ...
+
+    def list_sites(self, db: Session) -> list[dict[str, object]]:
         ...
 
     def list_studies(
@@ -28,7 +74,10 @@ class DataProvider(Protocol):
         search: str | None = None,
         limit: int | None = None,
         offset: int | None = None,
-    ) -> list[dict[str, object]]:
+        scope: TenantScope | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> list[StudyListItem]:
         ...
 
     def count_studies(
@@ -37,9 +86,24 @@ class DataProvider(Protocol):
         status: str | None = None,
         risk: str | None = None,
         search: str | None = None,
+        scope: TenantScope | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
     ) -> int:
         ...
 
+    def iter_study_export(
+        self,
+        db: Session,
+        status: str | None = None,
+        risk: str | None = None,
+        search: str | None = None,
+        scope: TenantScope | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> Iterator[tuple[object, ...]]:
+        ...
+
     def get_study_detail(self, db: Session, study_id: str) -> dict[str, object] | None:
         ...
 
@@ -49,10 +113,23 @@ class DataProvider(Protocol):
         limit: int = 20,
         offset: int = 0,
         search: str | None = None,
+        scope: TenantScope | None = None,
     ) -> list[dict[str, object]]:
         ...
 
-    def count_followups(self, db: Session, search: str | None = None) -> int:
+    def count_followups(
+        self, db: Session, search: str | None = None, scope: TenantScope | None = None
+    ) -> int:
+        ...
+
+    def get_patient_trajectories(
+        self, db: Session, patient_id: UUID, scope: TenantScope | None = None
+    ) -> list[dict[str, object]]:
+        ...
+
+    def get_nodule_trajectory(
+        self, db: Session, nodule_id: UUID, scope: TenantScope | None = None
+    ) -> dict[str, object] | None:
         ...
 
     def get_ingestion_logs(
@@ -61,12 +138,33 @@ class DataProvider(Protocol):
         limit: int = 30,
         offset: int = 0,
         search: str | None = None,
+        scope: TenantScope | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
     ) -> list[dict[str, object]]:
         ...
 
-    def count_ingestion_logs(self, db: Session, search: str | None = None) -> int:
+    def count_ingestion_logs(
+        self,
+        db: Session,
+        search: str | None = None,
+        scope: TenantScope | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> int:
         ...
 
+    def get_ingestion_events(self, db: Session, log_ids: list[UUID]) -> list[dict[str, object]]:
+        ...
+
+
+# Per-worker cache of overview aggregates; keys are partitioned by tenant scope.
+_overview_cache = TTLCache(settings.overview_cache_ttl_seconds)
+
+
+def clear_overview_cache() -> None:
+    _overview_cache.clear()
+
 
 def _mask_patient_id(patient_uid: str | None, anon_label: str | None) -> str:
     if settings.allow_phi:
@@ -79,15 +177,87 @@ def _mask_patient_id(patient_uid: str | None, anon_label: str | None) -> str:
     return f"Anon-{digest}"
 
 
-class MockProvider:
-    def get_overview_kpis(self, db: Session) -> dict[str, int]:
-        return queries.get_overview_kpis(db)
+class DatabaseProvider:
+    """DataProvider over the local tables; patient ids are masked unless ALLOW_PHI."""
+
+    def warmup(self) -> None:
+        """Run the landing-page queries once on the pre-opened pool.
+
+        That fills the global overview cache and SQLAlchemy's compiled
+        statement cache, so the first requests after a deploy pay for neither.
+        """
+        with SessionLocal() as db:
+            self.get_overview_generation(db)
+            self.get_overview_summary(db)
+            self.get_volume_trend(db, max_points=settings.trend_max_points)
+            self.list_sites(db)
+            self.count_studies(db)
+            self.list_studies(db, limit=10, offset=0)
+            self.count_ingestion_logs(db)
+            self.get_ingestion_logs(db)
+
+    def get_overview_generation(self, db: Session) -> str | None:
+        return queries.get_overview_generation(db)
+
+    def get_overview_kpis(self, db: Session, scope: TenantScope | None = None) -> dict[str, int]:
+        return self.get_overview_summary(db, scope)["kpis"]
+
+    def get_risk_breakdown(
+        self, db: Session, scope: TenantScope | None = None
+    ) -> list[dict[str, int]]:
+        return self.get_overview_summary(db, scope)["risk_breakdown"]
+
+    def get_overview_summary(self, db: Session, scope: TenantScope | None = None) -> dict[str, object]:
+        # One cache entry for both, so the rollup is read once per scope.
+        return _overview_cache.get_or_set(
+            ("overview_summary", (scope or GLOBAL_SCOPE).cache_key),
+            lambda: queries.get_overview_summary(db, scope=scope),
+        )
+
+    def get_volume_trend(
+        self,
+        db: Session,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        bucket: str = "day",
+        max_points: int | None = None,
+        scope: TenantScope | None = None,
+    ) -> list[dict[str, float]]:
+        return _overview_cache.get_or_set(
+            ("volume_trend", (scope or GLOBAL_SCOPE).cache_key, date_from, date_to, bucket, max_points),
+            lambda: queries.get_volume_trend(
+                db,
+                date_from=date_from,
+                date_to=date_to,
+                bucket=bucket,
+                max_points=max_points,
+                scope=scope,
+            ),
+        )
 
-    def get_risk_breakdown(self, db: Session) -> list[dict[str, int]]:
-        return queries.get_risk_breakdown(db)
+    def get_volume_trend_splits(
+        self,
+        db: Session,
+        date_from: date | None = None,
+        date_to: date | None = None,
+        bucket: str = "day",
+        max_points: int | None = None,
+        scope: TenantScope | None = None,
+    ) -> dict[str, object]:
+        return _overview_cache.get_or_set(
+            ("volume_trend_splits", (scope or GLOBAL_SCOPE).cache_key, date_from, date_to, bucket, max_points),
+            lambda: queries.get_volume_trend_splits(
+                db,
+                date_from=date_from,
+                date_to=date_to,
+                bucket=bucket,
+                max_points=max_points,
+                scope=scope,
+            ),
+        )
 
-    def get_volume_trend(self, db: Session) -> list[dict[str, float]]:
-        return queries.get_volume_trend(db)
+    def list_sites(self, db: Session) -> list[dict[str, object]]:
+        return queries.list_sites(db)
 
     def list_studies(
         self,
@@ -97,26 +267,34 @@ class MockProvider:
         search: str | None = None,
         limit: int | None = None,
         offset: int | None = None,
-    ) -> list[dict[str, object]]:
-        studies = queries.list_studies(
-            db, status=status, risk=risk, search=search, limit=limit, offset=offset
+        scope: TenantScope | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> list[StudyListItem]:
+        rows = queries.list_studies(
+            db,
+            status=status,
+            risk=risk,
+            search=search,
+            limit=limit,
+            offset=offset,
+            scope=scope,
+            date_from=date_from,
+            date_to=date_to,
         )
-        rows = []
-        for study in studies:
-            rows.append(
-                {
-                    "id": study.id,
-                    "study_uid": study.study_uid,
-                    "patient_uid": _mask_patient_id(
-                        study.patient.patient_uid, study.patient.anon_label
-                    ),
-                    "study_date": study.study_date,
-                    "status": study.status,
-                    "overall_risk": study.overall_risk,
-                    "nodule_count": study.nodule_count,
-                }
+        # Column types already match the schema, so build the items without validating.
+        return [
+            StudyListItem.model_construct(
+                id=study_id,
+                study_uid=study_uid,
+                patient_uid=_mask_patient_id(patient_uid, anon_label),
+                study_date=study_date,
+                status=status_,
+                overall_risk=risk_,
+                nodule_count=nodule_count,
             )
-        return rows
+            for study_id, study_uid, patient_uid, anon_label, study_date, status_, risk_, nodule_count in rows
+        ]
 
     def count_studies(
         self,
@@ -124,8 +302,48 @@ class MockProvider:
         status: str | None = None,
         risk: str | None = None,
         search: str | None = None,
+        scope: TenantScope | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
     ) -> int:
-        return queries.count_studies(db, status=status, risk=risk, search=search)
+        return queries.count_studies(
+            db,
+            status=status,
+            risk=risk,
+            search=search,
+            scope=scope,
+            date_from=date_from,
+            date_to=date_to,
+        )
+
+    def iter_study_export(
+        self,
+        db: Session,
+        status: str | None = None,
+        risk: str | None = None,
+        search: str | None = None,
+        scope: TenantScope | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> Iterator[tuple[object, ...]]:
+        rows = queries.iter_study_export_rows(
+            db,
+            status=status,
+            risk=risk,
+            search=search,
+            scope=scope,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        for study_uid, patient_uid, anon_label, study_date, status_, risk_, nodule_count in rows:
+            yield (
+                study_uid,
+                _mask_patient_id(patient_uid, anon_label),
+                study_date,
+                status_,
+                risk_,
+                nodule_count,
+            )
 
     def get_study_detail(self, db: Session, study_id: str) -> dict[str, object] | None:
         detail = queries.get_study_detail(db, study_id)
@@ -134,6 +352,9 @@ class MockProvider:
         detail["patient_uid"] = _mask_patient_id(
             detail.get("patient_uid"), detail.get("anon_label")
         )
+        # Rendered at ingest; one the LRU evicted falls back to the original until re-rendered.
+        detail["thumbnail_path"] = derivatives.stored_derivative(detail["thumbnail_path"])
+        detail["preview_path"] = derivatives.stored_derivative(detail["preview_path"])
         return detail
 
     def get_followup_timeline(
@@ -142,16 +363,31 @@ class MockProvider:
         limit: int = 20,
         offset: int = 0,
         search: str | None = None,
+        scope: TenantScope | None = None,
     ) -> list[dict[str, object]]:
-        timeline = queries.get_followup_timeline(db, limit=limit, offset=offset, search=search)
+        timeline = queries.get_followup_timeline(
+            db, limit=limit, offset=offset, search=search, scope=scope
+        )
         for item in timeline:
             item["patient_uid"] = _mask_patient_id(
                 item.get("patient_uid"), item.get("anon_label")
             )
         return timeline
 
-    def count_followups(self, db: Session, search: str | None = None) -> int:
-        return queries.count_followups(db, search=search)
+    def count_followups(
+        self, db: Session, search: str | None = None, scope: TenantScope | None = None
+    ) -> int:
+        return queries.count_followups(db, search=search, scope=scope)
+
+    def get_patient_trajectories(
+        self, db: Session, patient_id: UUID, scope: TenantScope | None = None
+    ) -> list[dict[str, object]]:
+        return queries.get_patient_trajectories(db, patient_id, scope=scope)
+
+    def get_nodule_trajectory(
+        self, db: Session, nodule_id: UUID, scope: TenantScope | None = None
+    ) -> dict[str, object] | None:
+        return queries.get_nodule_trajectory(db, nodule_id, scope=scope)
 
     def get_ingestion_logs(
         self,
@@ -159,100 +395,122 @@ class MockProvider:
         limit: int = 30,
         offset: int = 0,
         search: str | None = None,
+        scope: TenantScope | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
     ) -> list[dict[str, object]]:
-        logs = queries.get_ingestion_logs(db, limit=limit, offset=offset, search=search)
+        logs = queries.get_ingestion_logs(
+            db,
+            limit=limit,
+            offset=offset,
+            search=search,
+            scope=scope,
+            date_from=date_from,
+            date_to=date_to,
+        )
         for log in logs:
             log["patient_uid"] = _mask_patient_id(
                 log.get("patient_uid"), log.get("anon_label")
             )
         return logs
 
-    def count_ingestion_logs(self, db: Session, search: str | None = None) -> int:
-        return queries.count_ingestion_logs(db, search=search)
+    def count_ingestion_logs(
+        self,
+        db: Session,
+        search: str | None = None,
+        scope: TenantScope | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> int:
+        return queries.count_ingestion_logs(
+            db, search=search, scope=scope, date_from=date_from, date_to=date_to
+        )
 
+    def get_ingestion_events(self, db: Session, log_ids: list[UUID]) -> list[dict[str, object]]:
+        logs = queries.get_ingestion_logs_by_id(db, log_ids)
+        for log in logs:
+            log["patient_uid"] = _mask_patient_id(
+                log.get("patient_uid"), log.get("anon_label")
+            )
+        return logs
 
-class OrthancProvider:
-    def get_overview_kpis(self, db: Session) -> dict[str, int]:
-        return {
-            "total_patients": 0,
-            "total_studies": 0,
-            "total_nodules": 0,
-            "high_risk": 0,
-        }
 
-    def get_risk_breakdown(self, db: Session) -> list[dict[str, int]]:
-        return [{"label": risk, "value": 0} for risk in queries.RISK_ORDER]
+class MockProvider(DatabaseProvider):
+    """Simulated data written by scripts/seed_fake_data.py."""
 
-    def get_volume_trend(self, db: Session) -> list[dict[str, float]]:
-        return []
 
-    def list_studies(
-        self,
-        db: Session,
-        status: str | None = None,
-        risk: str | None = None,
-        search: str | None = None,
-        limit: int | None = None,
-        offset: int | None = None,
-    ) -> list[dict[str, object]]:
-        return []
+class OrthancProvider(DatabaseProvider):
+    """Local mirror of Orthanc study/series metadata.
 
-    def count_studies(
-        self,
-        db: Session,
-        status: str | None = None,
-        risk: str | None = None,
-        search: str | None = None,
-    ) -> int:
-        return 0
+    Requests never call Orthanc: scripts/sync_orthanc.py (``sync``) copies the
+    archive into the same tables the mock data uses, so every query, index
+    and cache above is shared, and scripts/orthanc_sync_worker.py
+    (``follow_changes``) keeps it current from the ``/changes`` feed.
+    """
 
-    def get_study_detail(self, db: Session, study_id: str) -> dict[str, object] | None:
-        return None
+    def client(self) -> OrthancClient:
+        return OrthancClient.from_settings()
 
-    def get_followup_timeline(
-        self,
-        db: Session,
-        limit: int = 20,
-        offset: int = 0,
-        search: str | None = None,
-    ) -> list[dict[str, object]]:
-        return []
+    async def sync(self, query: dict[str, str] | None = None, previews: bool = True) -> int:
+        async with self.client() as client:
+            return await mirror_from_orthanc(client, query=query, previews=previews)
 
-    def count_followups(self, db: Session, search: str | None = None) -> int:
-        return 0
+    async def follow_changes(
+        self, stop: asyncio.Event, previews: bool = True, until_caught_up: bool = False
+    ) -> None:
+        async with self.client() as client:
+            await orthanc_sync.follow_changes(client, stop, previews=previews, until_caught_up=until_caught_up)
 
-    def get_ingestion_logs(
-        self,
-        db: Session,
-        limit: int = 30,
-        offset: int = 0,
-        search: str | None = None,
-    ) -> list[dict[str, object]]:
-        return []
-
-    def count_ingestion_logs(self, db: Session, search: str | None = None) -> int:
-        return 0
-
-
-def get_provider() -> DataProvider:
-    global _mock_notice_emitted
-    source = settings.data_source.lower()
-    if source == "orthanc":
-        if not _mock_notice_emitted:
-            if settings.mock_data:
-                logger.warning(
-                    "DATA_SOURCE=orthanc is configured as MOCK; no real Orthanc integration is enabled."
-                )
-            else:
-                logger.error(
-                    "DATA_SOURCE=orthanc requires MOCK_DATA=true in this build; "
-                    "no real Orthanc integration exists."
-                )
-            _mock_notice_emitted = True
-        return OrthancProvider()
-    if settings.mock_data and not _mock_notice_emitted:
-        logger.info("MOCK_DATA is enabled; serving simulated data.")
-        _mock_notice_emitted = True
-    return MockProvider()
+
+PROVIDERS: dict[str, type[DatabaseProvider]] = {"mock": MockProvider, "orthanc": OrthancProvider}
+
+
+class ProviderRegistry:
+    """The DataProvider for DATA_SOURCE, built once per worker.
+
+    The app lifespan builds and warms it before the worker accepts traffic and
+    keeps it in ``app.state.provider``, from where routes receive it through
+    ``app.api.deps.get_provider``. Work outside a request (stream threads)
+    calls ``get()``.
+    """
+
+    def __init__(self) -> None:
+        self._provider: DataProvider | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> DataProvider:
+        if self._provider is None:
+            with self._lock:
+                if self._provider is None:
+                    self._provider = self._build()
+        return self._provider
+
+    @staticmethod
+    def _build() -> DataProvider:
+        if settings.data_source == "orthanc":
+            logger.info("DATA_SOURCE=orthanc; serving the local mirror of %s.", settings.orthanc_url)
+        elif settings.mock_data:
+            logger.info("MOCK_DATA is enabled; serving simulated data.")
+        return PROVIDERS[settings.data_source]()
+
+    def warmup(self) -> None:
+        """Run the provider's optional ``warmup()`` hook; a failure is logged, not raised.
+
+        A worker whose database is still down starts cold rather than not at
+        all; /_readyz reports the outage.
+        """
+        provider = self.get()
+        warmup = getattr(provider, "warmup", None)
+        if warmup is None:
+            return
+        start = time.monotonic()
+        try:
+            warmup()
+        except Exception:
+            logger.warning("%s warmup failed; serving cold", type(provider).__name__, exc_info=True)
+            return
+        logger.info("%s warmed up in %.0f ms", type(provider).__name__, (time.monotonic() - start) * 1000)
+
+
+provider_registry = ProviderRegistry()
 logger = logging.getLogger("app.provider")
-_mock_notice_emitted = False
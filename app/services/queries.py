@@ -1,86 +1,299 @@
 from __future__ import annotations
 
-from typing import Sequence
+from datetime import date
+from typing import Iterator, Sequence
+from uuid import UUID
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import Date, Row, cast, func, or_, select
 from sqlalchemy.orm import Session, aliased
 
 from app.db.models import (
     Image,
     IngestionLog,
+    NoduleTrajectoryPoint,
     Patient,
     QCTFollowup,
     QCTNodule,
     QCTSummary,
     Site,
+    Series,
+    SiteOverviewStats,
     Study,
 )
+from app.services.date_range import time_window
+from app.services.downsampling import lttb
+from app.services.scope import TenantScope, apply_site_scope
+from app.services.site_stats import SITE_STAT_FIELDS, compute_site_stats
 
 
 RISK_ORDER = ["low", "medium", "high"]
 
 
-def get_overview_kpis(db: Session) -> dict[str, int]:
-    total_patients = db.scalar(select(func.count(Patient.id))) or 0
-    total_studies = db.scalar(select(func.count(Study.id))) or 0
-    total_nodules = db.scalar(select(func.count(QCTNodule.id))) or 0
-    high_risk = db.scalar(select(func.count(Study.id)).where(Study.overall_risk == "high")) or 0
+def _scope_studies(query, scope: TenantScope | None, study=Study):
+    return apply_site_scope(query, study.site_id, scope)
+
+
+def _overview_stats(db: Session, scope: TenantScope | None = None) -> dict[str, int]:
+    row = db.execute(
+        apply_site_scope(
+            select(
+                func.count(Site.id),
+                func.count(SiteOverviewStats.site_id),
+                *(
+                    func.coalesce(func.sum(getattr(SiteOverviewStats, field)), 0)
+                    for field in SITE_STAT_FIELDS
+                ),
+            )
+            .select_from(Site)
+            .outerjoin(SiteOverviewStats, SiteOverviewStats.site_id == Site.id),
+            Site.id,
+            scope,
+        )
+    ).one()
+    sites, rolled_up = row[0], row[1]
+    totals = {field: int(value) for field, value in zip(SITE_STAT_FIELDS, row[2:])}
+    if rolled_up == sites:
+        return totals
+    # Sites without a rollup row yet (fresh database or new site): aggregate those live.
+    missing = db.scalars(
+        apply_site_scope(
+            select(Site.id)
+            .outerjoin(SiteOverviewStats, SiteOverviewStats.site_id == Site.id)
+            .where(SiteOverviewStats.site_id.is_(None)),
+            Site.id,
+            scope,
+        )
+    ).all()
+    for values in compute_site_stats(db, scope, missing).values():
+        for field in SITE_STAT_FIELDS:
+            totals[field] += values[field]
+    return totals
+
+
+def get_overview_generation(db: Session) -> str | None:
+    """Marker that changes whenever the site_overview_stats rollup is rewritten."""
+    refreshed_at = db.scalar(select(func.max(SiteOverviewStats.refreshed_at)))
+    return refreshed_at.isoformat() if refreshed_at else None
+
+
+def _kpis(stats: dict[str, int]) -> dict[str, int]:
     return {
-        "total_patients": total_patients,
-        "total_studies": total_studies,
-        "total_nodules": total_nodules,
-        "high_risk": high_risk,
+        "total_patients": stats["total_patients"],
+        "total_studies": stats["total_studies"],
+        "total_nodules": stats["total_nodules"],
+        "high_risk": stats["high_risk"],
     }
 
 
-def get_risk_breakdown(db: Session) -> list[dict[str, int]]:
+def _risk_breakdown(stats: dict[str, int]) -> list[dict[str, int]]:
+    return [{"label": risk, "value": stats[f"{risk}_risk"]} for risk in RISK_ORDER]
+
+
+def get_overview_kpis(db: Session, scope: TenantScope | None = None) -> dict[str, int]:
+    return _kpis(_overview_stats(db, scope))
+
+
+def get_risk_breakdown(db: Session, scope: TenantScope | None = None) -> list[dict[str, int]]:
+    return _risk_breakdown(_overview_stats(db, scope))
+
+
+def get_overview_summary(db: Session, scope: TenantScope | None = None) -> dict[str, object]:
+    """KPIs and risk breakdown from one read of the site rollup, for views that show both."""
+    stats = _overview_stats(db, scope)
+    return {"kpis": _kpis(stats), "risk_breakdown": _risk_breakdown(stats)}
+
+
+def list_sites(db: Session) -> list[dict[str, object]]:
     rows = db.execute(
-        select(Study.overall_risk, func.count(Study.id)).group_by(Study.overall_risk)
+        select(Site.id, Site.name, Site.location, Site.client_id).order_by(Site.name)
     ).all()
-    counts = {risk: count for risk, count in rows}
-    return [{"label": risk, "value": counts.get(risk, 0)} for risk in RISK_ORDER]
+    return [
+        {"id": site_id, "name": name, "location": location, "client_id": client_id}
+        for site_id, name, location, client_id in rows
+    ]
 
 
-def get_volume_trend(db: Session) -> list[dict[str, float]]:
-    rows = (
-        db.execute(
-            select(Study.study_date, func.avg(QCTSummary.volume_total_mm3))
-            .join(QCTSummary, QCTSummary.study_id == Study.id)
-            .group_by(Study.study_date)
-            .order_by(Study.study_date)
+TREND_BUCKETS = ("day", "week", "month")
+
+
+def _trend_bucket(bucket: str):
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(f"Unsupported trend bucket: {bucket}")
+    if bucket == "day":
+        return Study.study_date
+    return cast(func.date_trunc(bucket, Study.study_date), Date)
+
+
+def _trend_query(
+    columns, date_from: date | None, date_to: date | None, scope: TenantScope | None = None
+):
+    query = _scope_studies(select(*columns).join(QCTSummary, QCTSummary.study_id == Study.id), scope)
+    if date_from:
+        query = query.where(Study.study_date >= date_from)
+    if date_to:
+        query = query.where(Study.study_date <= date_to)
+    return query
+
+
+def _trend_points(
+    totals: dict[date, list[float]], max_points: int | None
+) -> list[dict[str, float]]:
+    points = [
+        {"label": label.isoformat(), "value": total / count}
+        for label, (total, count) in sorted(totals.items())
+    ]
+    if max_points:
+        points = lttb(
+            points,
+            max_points,
+            key=lambda point: (date.fromisoformat(point["label"]).toordinal(), point["value"]),
         )
-        .all()
-    )
-    return [{"label": row[0].isoformat(), "value": float(row[1])} for row in rows]
+    return points
 
 
-def list_studies(
+def get_volume_trend(
     db: Session,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    bucket: str = "day",
+    max_points: int | None = None,
+    scope: TenantScope | None = None,
+) -> list[dict[str, float]]:
+    bucket_col = _trend_bucket(bucket).label("bucket")
+    rows = db.execute(
+        _trend_query(
+            [bucket_col, func.sum(QCTSummary.volume_total_mm3), func.count(QCTSummary.id)],
+            date_from,
+            date_to,
+            scope,
+        )
+        .group_by(bucket_col)
+        .order_by(bucket_col)
+    ).all()
+    totals = {label: [float(total), count] for label, total, count in rows}
+    return _trend_points(totals, max_points)
+
+
+def get_volume_trend_splits(
+    db: Session,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    bucket: str = "day",
+    max_points: int | None = None,
+    scope: TenantScope | None = None,
+) -> dict[str, object]:
+    """Overall, per-site and per-risk trend series from one grouped scan."""
+    bucket_col = _trend_bucket(bucket).label("bucket")
+    rows = db.execute(
+        _trend_query(
+            [
+                bucket_col,
+                Site.name,
+                Study.overall_risk,
+                func.sum(QCTSummary.volume_total_mm3),
+                func.count(QCTSummary.id),
+            ],
+            date_from,
+            date_to,
+            scope,
+        )
+        .join(Site, Study.site_id == Site.id)
+        .group_by(bucket_col, Site.name, Study.overall_risk)
+    ).all()
+    overall: dict[date, list[float]] = {}
+    by_site: dict[str, dict[date, list[float]]] = {}
+    by_risk: dict[str, dict[date, list[float]]] = {}
+    for label, site_name, risk, total, count in rows:
+        for totals in (overall, by_site.setdefault(site_name, {}), by_risk.setdefault(risk, {})):
+            entry = totals.setdefault(label, [0.0, 0])
+            entry[0] += float(total)
+            entry[1] += count
+    return {
+        "bucket": bucket,
+        "points": _trend_points(overall, max_points),
+        "by_site": {name: _trend_points(totals, max_points) for name, totals in sorted(by_site.items())},
+        "by_risk": {
+            risk: _trend_points(by_risk[risk], max_points) for risk in RISK_ORDER if risk in by_risk
+        },
+    }
+
+
+def _filter_studies(
+    query,
     status: str | None = None,
     risk: str | None = None,
     search: str | None = None,
-    limit: int | None = None,
-    offset: int | None = None,
-) -> Sequence[Study]:
-    query = select(Study).order_by(Study.study_date.desc())
+    date_from: date | None = None,
+    date_to: date | None = None,
+    patient_joined: bool = False,
+):
     if status:
         query = query.where(Study.status == status)
     if risk:
         query = query.where(Study.overall_risk == risk)
+    # Plain comparisons on study_date so ix_study_date / ix_studies_site_*_date apply.
+    if date_from:
+        query = query.where(Study.study_date >= date_from)
+    if date_to:
+        query = query.where(Study.study_date <= date_to)
     if search:
         pattern = f"%{search.strip()}%"
-        query = query.join(Study.patient).where(
+        if not patient_joined:
+            query = query.join(Study.patient)
+        query = query.where(
             or_(
                 Study.study_uid.ilike(pattern),
                 Patient.patient_uid.ilike(pattern),
                 Patient.anon_label.ilike(pattern),
             )
         )
+    return query
+
+
+def list_studies(
+    db: Session,
+    status: str | None = None,
+    risk: str | None = None,
+    search: str | None = None,
+    limit: int | None = None,
+    offset: int | None = None,
+    scope: TenantScope | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> Sequence[Row]:
+    """Column rows for a studies page, with the patient joined in the same query.
+
+    Selecting only the listed columns skips ORM object construction and the
+    per-row lazy load of ``Study.patient``.
+    """
+    query = _filter_studies(
+        _scope_studies(
+            select(
+                Study.id,
+                Study.study_uid,
+                Patient.patient_uid,
+                Patient.anon_label,
+                Study.study_date,
+                Study.status,
+                Study.overall_risk,
+                Study.nodule_count,
+            )
+            .join(Study.patient)
+            .order_by(Study.study_date.desc()),
+            scope,
+        ),
+        status=status,
+        risk=risk,
+        search=search,
+        date_from=date_from,
+        date_to=date_to,
+        patient_joined=True,
+    )
     if limit is not None:
         query = query.limit(limit)
     if offset is not None:
         query = query.offset(offset)
-    return db.scalars(query).all()
+    return db.execute(query).all()
 
 
 def count_studies(
@@ -88,53 +301,128 @@ def count_studies(
     status: str | None = None,
     risk: str | None = None,
     search: str | None = None,
+    scope: TenantScope | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
 ) -> int:
-    query = select(func.count(Study.id))
-    if status:
-        query = query.where(Study.status == status)
-    if risk:
-        query = query.where(Study.overall_risk == risk)
-    if search:
-        pattern = f"%{search.strip()}%"
-        query = query.join(Study.patient).where(
-            or_(
-                Study.study_uid.ilike(pattern),
-                Patient.patient_uid.ilike(pattern),
-                Patient.anon_label.ilike(pattern),
-            )
-        )
+    query = _filter_studies(
+        _scope_studies(select(func.count(Study.id)), scope),
+        status=status,
+        risk=risk,
+        search=search,
+        date_from=date_from,
+        date_to=date_to,
+    )
     return int(db.scalar(query) or 0)
 
 
-def get_study_detail(db: Session, study_id: str) -> dict[str, object] | None:
-    study = db.get(Study, study_id)
+def iter_study_export_rows(
+    db: Session,
+    status: str | None = None,
+    risk: str | None = None,
+    search: str | None = None,
+    scope: TenantScope | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    batch_size: int = 1000,
+) -> Iterator[Row]:
+    """Stream column rows for the export through a server-side cursor.
+
+    ``stream_results`` keeps psycopg from buffering the whole result and
+    ``yield_per`` fetches ``batch_size`` rows at a time, so memory stays flat
+    regardless of how many studies match.
+    """
+    query = _filter_studies(
+        _scope_studies(
+            select(
+                Study.study_uid,
+                Patient.patient_uid,
+                Patient.anon_label,
+                Study.study_date,
+                Study.status,
+                Study.overall_risk,
+                Study.nodule_count,
+            )
+            .join(Study.patient)
+            .order_by(Study.study_date.desc(), Study.id),
+            scope,
+        ),
+        status=status,
+        risk=risk,
+        search=search,
+        date_from=date_from,
+        date_to=date_to,
+        patient_joined=True,
+    )
+    result = db.execute(query.execution_options(stream_results=True, yield_per=batch_size))
+    try:
+        yield from result
+    finally:
+        result.close()
+
+
+def get_study_detail(db: Session, study_id: str | UUID) -> dict[str, object] | None:
+    """Detail of one study as column rows (summary and nodules are Rows, not ORM objects)."""
+    try:
+        study_id = study_id if isinstance(study_id, UUID) else UUID(str(study_id))
+    except ValueError:
+        return None
+    study = db.execute(
+        select(
+            Study.id,
+            Study.study_uid,
+            Study.study_date,
+            Study.status,
+            Study.overall_risk,
+            Study.nodule_count,
+            Patient.patient_uid,
+            Patient.anon_label,
+        )
+        .join(Study.patient)
+        .where(Study.id == study_id)
+    ).first()
     if not study:
         return None
 
-    patient = study.patient
-    image_path = (
-        db.execute(
-            select(Image.file_path)
-            .join(Image.series)
-            .where(Image.series.has(study_id=study.id))
-            .limit(1)
+    image = db.execute(
+        select(Image.file_path, Image.thumbnail_path, Image.preview_path)
+        .join(Image.series)
+        .where(Series.study_id == study_id)
+        .limit(1)
+    ).first()
+    image_path, thumbnail_path, preview_path = image if image else (None, None, None)
+    summary = db.execute(
+        select(
+            QCTSummary.volume_total_mm3,
+            QCTSummary.mean_diameter_mm,
+            QCTSummary.vdt_days,
+            QCTSummary.lung_rads,
+            QCTSummary.algo_version,
+            QCTSummary.overall_risk,
+            QCTSummary.notes,
         )
-        .scalars()
-        .first()
-    )
-    summary = study.summary
-    nodules = list(study.nodules)
+        .where(QCTSummary.study_id == study_id)
+        .limit(1)
+    ).first()
+    nodules = db.execute(
+        select(
+            QCTNodule.id,
+            QCTNodule.nodule_uid,
+            QCTNodule.location,
+            QCTNodule.volume_mm3,
+            QCTNodule.diameter_mm,
+            QCTNodule.vdt_days,
+            QCTNodule.texture,
+            QCTNodule.risk,
+            QCTNodule.is_followup,
+        ).where(QCTNodule.study_id == study_id)
+    ).all()
 
     return {
-        "id": study.id,
-        "study_uid": study.study_uid,
-        "study_date": study.study_date,
-        "status": study.status,
-        "overall_risk": study.overall_risk,
-        "nodule_count": study.nodule_count,
-        "patient_uid": patient.patient_uid,
-        "anon_label": patient.anon_label,
+        **study._asdict(),
         "image_path": image_path or "",
+        "thumbnail_path": thumbnail_path,
+        "preview_path": preview_path,
         "summary": summary,
         "nodules": nodules,
     }
@@ -153,6 +441,7 @@ def get_followup_timeline(
     limit: int = 20,
     offset: int = 0,
     search: str | None = None,
+    scope: TenantScope | None = None,
 ) -> list[dict[str, object]]:
     prior_study = aliased(Study)
     current_study = aliased(Study)
@@ -172,6 +461,7 @@ def get_followup_timeline(
         .join(Site, current_study.site)
         .order_by(current_study.study_date.desc())
     )
+    query = _scope_studies(query, scope, current_study)
     if search:
         pattern = f"%{search.strip()}%"
         query = query.where(
@@ -189,7 +479,9 @@ def get_followup_timeline(
         timeline.append(
             {
                 "id": str(followup.id),
+                "nodule_id": str(nodule.id),
                 "nodule_uid": nodule.nodule_uid,
+                "patient_id": str(patient.id),
                 "patient_uid": patient.patient_uid,
                 "anon_label": patient.anon_label,
                 "site_name": site.name,
@@ -206,7 +498,73 @@ def get_followup_timeline(
     return timeline
 
 
-def count_followups(db: Session, search: str | None = None) -> int:
+def _group_trajectory_points(points: Sequence[NoduleTrajectoryPoint]) -> list[dict[str, object]]:
+    tracks: dict[object, dict[str, object]] = {}
+    for point in points:
+        track = tracks.get(point.track_id)
+        if track is None:
+            track = tracks[point.track_id] = {
+                "track_id": point.track_id,
+                "patient_id": point.patient_id,
+                "location": point.location,
+                "points": [],
+            }
+        track["points"].append(
+            {
+                "nodule_id": point.nodule_id,
+                "nodule_uid": point.nodule_uid,
+                "study_id": point.study_id,
+                "study_uid": point.study_uid,
+                "study_date": point.study_date,
+                "volume_mm3": point.volume_mm3,
+                "diameter_mm": point.diameter_mm,
+                "vdt_days": point.vdt_days,
+                "growth_percent": point.growth_percent,
+                "risk": point.risk,
+            }
+        )
+    # Earliest track first; track ids are random UUIDs and say nothing about order.
+    return sorted(
+        tracks.values(),
+        key=lambda track: (track["points"][0]["study_date"], track["points"][0]["nodule_uid"]),
+    )
+
+
+def get_patient_trajectories(
+    db: Session, patient_id: UUID, scope: TenantScope | None = None
+) -> list[dict[str, object]]:
+    query = (
+        select(NoduleTrajectoryPoint)
+        .join(Study, Study.id == NoduleTrajectoryPoint.study_id)
+        .where(NoduleTrajectoryPoint.patient_id == patient_id)
+        .order_by(NoduleTrajectoryPoint.track_id, NoduleTrajectoryPoint.position)
+    )
+    points = db.scalars(_scope_studies(query, scope)).all()
+    return _group_trajectory_points(points)
+
+
+def get_nodule_trajectory(
+    db: Session, nodule_id: UUID, scope: TenantScope | None = None
+) -> dict[str, object] | None:
+    track_id = (
+        select(NoduleTrajectoryPoint.track_id)
+        .where(NoduleTrajectoryPoint.nodule_id == nodule_id)
+        .scalar_subquery()
+    )
+    query = (
+        select(NoduleTrajectoryPoint)
+        .join(Study, Study.id == NoduleTrajectoryPoint.study_id)
+        .where(NoduleTrajectoryPoint.track_id == track_id)
+        .order_by(NoduleTrajectoryPoint.position)
+    )
+    points = db.scalars(_scope_studies(query, scope)).all()
+    tracks = _group_trajectory_points(points)
+    return tracks[0] if tracks else None
+
+
+def count_followups(
+    db: Session, search: str | None = None, scope: TenantScope | None = None
+) -> int:
     prior_study = aliased(Study)
     current_study = aliased(Study)
     query = (
@@ -216,6 +574,7 @@ def count_followups(db: Session, search: str | None = None) -> int:
         .join(current_study, QCTFollowup.current_study)
         .join(Patient, current_study.patient)
     )
+    query = _scope_studies(query, scope, current_study)
     if search:
         pattern = f"%{search.strip()}%"
         query = query.where(
@@ -230,19 +589,44 @@ def count_followups(db: Session, search: str | None = None) -> int:
     return int(db.scalar(query) or 0)
 
 
-def get_ingestion_logs(
-    db: Session,
-    limit: int = 30,
-    offset: int = 0,
-    search: str | None = None,
-) -> list[dict[str, object]]:
-    query = (
+def _ingestion_log_query():
+    return (
         select(IngestionLog, Study, Patient, Site)
         .join(IngestionLog.study)
         .join(Study.patient)
         .join(Study.site)
         .order_by(IngestionLog.started_at.desc())
     )
+
+
+def _ingestion_log_item(log: IngestionLog, study: Study, patient: Patient, site: Site) -> dict[str, object]:
+    return {
+        "id": str(log.id),
+        "status": log.status,
+        "message": log.message,
+        "started_at": log.started_at,
+        "completed_at": log.completed_at,
+        "study_uid": study.study_uid,
+        "study_id": str(study.id),
+        "patient_uid": patient.patient_uid,
+        "anon_label": patient.anon_label,
+        "site_name": site.name,
+        "site_id": site.id,
+        "client_id": site.client_id,
+    }
+
+
+def get_ingestion_logs(
+    db: Session,
+    limit: int = 30,
+    offset: int = 0,
+    search: str | None = None,
+    scope: TenantScope | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list[dict[str, object]]:
+    query = _scope_studies(_ingestion_log_query(), scope)
+    query = time_window(query, IngestionLog.started_at, date_from, date_to)
     if search:
         pattern = f"%{search.strip()}%"
         query = query.where(
@@ -254,31 +638,31 @@ def get_ingestion_logs(
             )
         )
     rows = db.execute(query.limit(limit).offset(offset)).all()
-    logs = []
-    for log, study, patient, site in rows:
-        logs.append(
-            {
-                "id": str(log.id),
-                "status": log.status,
-                "message": log.message,
-                "started_at": log.started_at,
-                "completed_at": log.completed_at,
-                "study_uid": study.study_uid,
-                "study_id": str(study.id),
-                "patient_uid": patient.patient_uid,
-                "anon_label": patient.anon_label,
-                "site_name": site.name,
-            }
-        )
-    return logs
+    return [_ingestion_log_item(*row) for row in rows]
+
 
+def get_ingestion_logs_by_id(db: Session, log_ids: Sequence[UUID]) -> list[dict[str, object]]:
+    """Ingestion log items for notified ids, oldest first."""
+    if not log_ids:
+        return []
+    rows = db.execute(_ingestion_log_query().where(IngestionLog.id.in_(log_ids))).all()
+    return [_ingestion_log_item(*row) for row in reversed(rows)]
 
-def count_ingestion_logs(db: Session, search: str | None = None) -> int:
+
+def count_ingestion_logs(
+    db: Session,
+    search: str | None = None,
+    scope: TenantScope | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> int:
     query = (
         select(func.count(IngestionLog.id))
         .join(IngestionLog.study)
         .join(Study.patient)
     )
+    query = _scope_studies(query, scope)
+    query = time_window(query, IngestionLog.started_at, date_from, date_to)
     if search:
         pattern = f"%{search.strip()}%"
         query = query.where(
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.db.models import Site
+
+
+@dataclass(frozen=True)
+class TenantScope:
+    site_id: UUID | None = None
+    client_id: UUID | None = None
+
+    @property
+    def is_global(self) -> bool:
+        return self.site_id is None and self.client_id is None
+
+    @property
+    def cache_key(self) -> str:
+        if self.site_id is not None:
+            return f"site:{self.site_id}"
+        if self.client_id is not None:
+            return f"client:{self.client_id}"
+        return "global"
+
+    def includes(self, site_id: UUID | None, client_id: UUID | None) -> bool:
+        """Whether a row of ``site_id`` (belonging to ``client_id``) is visible in this scope."""
+        if self.site_id is not None and site_id != self.site_id:
+            return False
+        return self.client_id is None or client_id == self.client_id
+
+    def query_params(self) -> dict[str, str]:
+        params = {}
+        if self.site_id is not None:
+            params["site_id"] = str(self.site_id)
+        if self.client_id is not None:
+            params["client_id"] = str(self.client_id)
+        return params
+
+
+GLOBAL_SCOPE = TenantScope()
+
+
+def apply_site_scope(query, site_column, scope: TenantScope | None):
+    """Restrict ``query`` to the scope's sites through ``site_column``."""
+    if scope is None:
+        return query
+    if scope.site_id is not None:
+        query = query.where(site_column == scope.site_id)
+    if scope.client_id is not None:
+        query = query.where(site_column.in_(select(Site.id).where(Site.client_id == scope.client_id)))
+    return query
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from collections.abc import Collection
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Patient, QCTNodule, Site, SiteOverviewStats, Study
+from app.services.scope import TenantScope, apply_site_scope
+
+SITE_STAT_FIELDS = (
+    "total_patients",
+    "total_studies",
+    "total_nodules",
+    "low_risk",
+    "medium_risk",
+    "high_risk",
+)
+
+
+def _restrict(query, site_column, scope: TenantScope | None, site_ids: Collection[UUID] | None):
+    query = apply_site_scope(query, site_column, scope)
+    return query if site_ids is None else query.where(site_column.in_(list(site_ids)))
+
+
+def compute_site_stats(
+    db: Session, scope: TenantScope | None = None, site_ids: Collection[UUID] | None = None
+) -> dict[UUID, dict[str, object]]:
+    """Live per-site aggregates; each grouped query is restricted to the scope's sites (and ``site_ids``)."""
+    stats: dict[UUID, dict[str, object]] = {}
+    if site_ids is not None and not site_ids:
+        return stats
+    site_rows = db.execute(_restrict(select(Site.id, Site.client_id), Site.id, scope, site_ids)).all()
+    for site_id, client_id in site_rows:
+        stats[site_id] = {"client_id": client_id, **{field: 0 for field in SITE_STAT_FIELDS}}
+
+    patient_rows = db.execute(
+        _restrict(
+            select(Patient.site_id, func.count(Patient.id)).group_by(Patient.site_id),
+            Patient.site_id,
+            scope,
+            site_ids,
+        )
+    ).all()
+    for site_id, count in patient_rows:
+        if site_id in stats:
+            stats[site_id]["total_patients"] = count
+
+    study_rows = db.execute(
+        _restrict(
+            select(Study.site_id, Study.overall_risk, func.count(Study.id)).group_by(
+                Study.site_id, Study.overall_risk
+            ),
+            Study.site_id,
+            scope,
+            site_ids,
+        )
+    ).all()
+    for site_id, risk, count in study_rows:
+        if site_id not in stats:
+            continue
+        stats[site_id]["total_studies"] += count
+        if f"{risk}_risk" in stats[site_id]:
+            stats[site_id][f"{risk}_risk"] = count
+
+    nodule_rows = db.execute(
+        _restrict(
+            select(Study.site_id, func.count(QCTNodule.id))
+            .join(QCTNodule, QCTNodule.study_id == Study.id)
+            .group_by(Study.site_id),
+            Study.site_id,
+            scope,
+            site_ids,
+        )
+    ).all()
+    for site_id, count in nodule_rows:
+        if site_id in stats:
+            stats[site_id]["total_nodules"] = count
+    return stats
+
+
+def refresh_site_stats(
+    db: Session, scope: TenantScope | None = None, site_ids: Collection[UUID] | None = None
+) -> int:
+    """Rewrite the site_overview_stats rows for the scope (and ``site_ids``). The caller owns the transaction.
+
+    Every writer of studies, patients or nodules calls this for the sites it
+    touched, in the same transaction; the rollup is not maintained otherwise.
+    """
+    if site_ids is not None and not site_ids:
+        return 0
+    stats = compute_site_stats(db, scope, site_ids)
+    now = datetime.utcnow()
+    db.execute(_restrict(delete(SiteOverviewStats), SiteOverviewStats.site_id, scope, site_ids))
+    if stats:
+        db.execute(
+            insert(SiteOverviewStats),
+            [{"site_id": site_id, "refreshed_at": now, **values} for site_id, values in stats.items()],
+        )
+    return len(stats)
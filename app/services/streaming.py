@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections.abc import AsyncIterator, Hashable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from uuid import UUID
+
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.services.provider import clear_overview_cache, provider_registry
+from app.services.scope import GLOBAL_SCOPE, TenantScope
+
+logger = logging.getLogger("app.streaming")
+
+# Events a subscriber may still have to read before it is considered slow.
+SUBSCRIBER_QUEUE_SIZE = 8
+# Channel the 0006 trigger notifies on every ingestion_logs insert/update.
+INGESTION_CHANNEL = "ingestion_logs"
+# Notified ids loaded per query.
+INGESTION_FETCH_BATCH = 500
+
+
+def format_event(event: str, data: object) -> bytes:
+    # Dates and ids render as str(), the same text the templates print.
+    payload = json.dumps(data, separators=(",", ":"), default=str)
+    return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+async def sse_body(subscription: AbstractAsyncContextManager[asyncio.Queue]) -> AsyncIterator[bytes]:
+    """Event-stream bytes for a subscription queue of ``(event, data)`` pairs.
+
+    Unsubscribes when the client goes away (the response cancels the iterator).
+    """
+    yield b"retry: 5000\n\n"
+    async with subscription as queue:
+        while True:
+            try:
+                event, data = await asyncio.wait_for(
+                    queue.get(), timeout=settings.sse_keepalive_seconds
+                )
+            except asyncio.TimeoutError:
+                # Comment line so proxies do not close an idle stream.
+                yield b": keepalive\n\n"
+                continue
+            yield format_event(event, data)
+
+
+def overview_delta(previous: dict[str, object], current: dict[str, object]) -> dict[str, object]:
+    """Parts of the overview that changed: KPI fields, the risk breakdown, trend points by label."""
+    delta: dict[str, object] = {}
+    kpis = {key: value for key, value in current["kpis"].items() if previous["kpis"].get(key) != value}
+    if kpis:
+        delta["kpis"] = kpis
+    if current["risk_breakdown"] != previous["risk_breakdown"]:
+        delta["risk_breakdown"] = current["risk_breakdown"]
+    before = {point["label"]: point["value"] for point in previous["volume_trend"]}
+    after = {point["label"] for point in current["volume_trend"]}
+    upsert = [point for point in current["volume_trend"] if before.get(point["label"]) != point["value"]]
+    remove = [label for label in before if label not in after]
+    if upsert or remove:
+        delta["volume_trend"] = {"upsert": upsert, "remove": remove}
+    return delta
+
+
+def _compute_overview(scope: TenantScope) -> tuple[str | None, dict[str, object]]:
+    provider = provider_registry.get()
+    with SessionLocal() as db:
+        generation = provider.get_overview_generation(db)
+        payload = {
+            **provider.get_overview_summary(db, scope=scope),
+            "volume_trend": provider.get_volume_trend(
+                db, max_points=settings.trend_max_points, scope=scope
+            ),
+        }
+    return generation, payload
+
+
+def _read_generation() -> str | None:
+    with SessionLocal() as db:
+        return provider_registry.get().get_overview_generation(db)
+
+
+class OverviewBroadcaster:
+    """Per-worker fan-out of overview updates to SSE subscribers.
+
+    One task polls the data generation (a single cheap query) while anyone is
+    subscribed. When it moves, the overview is recomputed once per subscribed
+    scope and the delta is queued for every subscriber of that scope, so the
+    cost of a change does not grow with the number of open dashboards. A
+    subscriber that falls SUBSCRIBER_QUEUE_SIZE events behind has its queue
+    replaced by a fresh snapshot.
+    """
+
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self._subscribers: dict[Hashable, set[asyncio.Queue]] = {}
+        self._scopes: dict[Hashable, TenantScope] = {}
+        self._snapshots: dict[Hashable, dict[str, object]] = {}
+        self._generation: str | None = None
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    @asynccontextmanager
+    async def subscribe(self, scope: TenantScope | None = None) -> AsyncIterator[asyncio.Queue]:
+        """Queue of ``(event, data)`` pairs, starting with a ``snapshot`` of the scope."""
+        scope = scope or GLOBAL_SCOPE
+        key = scope.cache_key
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        async with self._lock:
+            if key not in self._snapshots:
+                generation, payload = await run_in_threadpool(_compute_overview, scope)
+                self._snapshots[key] = payload
+                self._scopes[key] = scope
+                if not self._subscribers:
+                    self._generation = generation
+            self._subscribers.setdefault(key, set()).add(queue)
+            queue.put_nowait(("snapshot", {"generation": self._generation, **self._snapshots[key]}))
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._run())
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[key]
+                    self._scopes.pop(key, None)
+                    self._snapshots.pop(key, None)
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.interval_seconds)
+            if not self._subscribers:
+                break
+            try:
+                await self._poll()
+            except Exception:
+                logger.exception("overview stream refresh failed")
+
+    async def _poll(self) -> None:
+        generation = await run_in_threadpool(_read_generation)
+        if generation == self._generation:
+            return
+        async with self._lock:
+            self._generation = generation
+            # The per-worker TTL cache would otherwise hand back pre-change aggregates.
+            clear_overview_cache()
+            for key, scope in list(self._scopes.items()):
+                _, payload = await run_in_threadpool(_compute_overview, scope)
+                previous = self._snapshots.get(key)
+                if previous is None or key not in self._subscribers:
+                    continue
+                self._snapshots[key] = payload
+                delta = overview_delta(previous, payload)
+                if delta:
+                    self._publish(key, ("delta", {"generation": generation, **delta}))
+
+    def _publish(self, key: Hashable, message: tuple[str, dict[str, object]]) -> None:
+        for queue in self._subscribers.get(key, ()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Deltas only apply in order, so a lagging client restarts from a snapshot.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("snapshot", {"generation": self._generation, **self._snapshots[key]}))
+
+
+class IngestionListener:
+    """One ``LISTEN`` connection per worker fanning ingestion events out to SSE subscribers.
+
+    The 0006 trigger notifies with the log id only; the listener thread loads
+    each batch of notified rows once (masked through the provider) and hands
+    them to the event loop, which copies them into the bounded queue of every
+    subscriber whose scope includes the row's site. A subscriber whose queue
+    is full has its backlog dropped and receives ``resync`` instead, as does
+    everyone after the listener reconnects, since notifications sent while it
+    was disconnected are lost.
+    """
+
+    def __init__(self, engine: Engine, channel: str, buffer_size: int) -> None:
+        self.engine = engine
+        self.channel = channel
+        self.buffer_size = buffer_size
+        self._subscribers: dict[asyncio.Queue, TenantScope] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self.engine.dialect.name == "postgresql"
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @asynccontextmanager
+    async def subscribe(self, scope: TenantScope | None = None) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.buffer_size)
+        self._loop = asyncio.get_running_loop()
+        self._subscribers[queue] = scope or GLOBAL_SCOPE
+        self._ensure_started()
+        try:
+            yield queue
+        finally:
+            self._subscribers.pop(queue, None)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="ingestion-listener", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        backoff = 1.0
+        reconnect = False
+
+        def listening() -> None:
+            nonlocal backoff
+            backoff = 1.0
+            if reconnect:
+                self._call_soon(self._broadcast, ("resync", {}))
+
+        while not self._stop.is_set():
+            try:
+                self._listen(listening)
+            except Exception:
+                logger.exception("ingestion listener failed; reconnecting in %.0fs", backoff)
+                reconnect = True
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def _listen(self, listening) -> None:
+        raw = self.engine.raw_connection()
+        # A dedicated connection: it never goes back to the pool while listening.
+        raw.detach()
+        try:
+            connection = raw.driver_connection
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.channel}")
+            listening()
+            while not self._stop.is_set():
+                if not select.select([connection], [], [], 1.0)[0]:
+                    continue
+                connection.poll()
+                log_ids: dict[UUID, None] = {}
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    try:
+                        log_ids[UUID(json.loads(notify.payload)["id"])] = None
+                    except (ValueError, KeyError, TypeError):
+                        logger.warning("ignoring malformed %s payload: %r", self.channel, notify.payload)
+                if log_ids:
+                    self._publish(list(log_ids))
+        finally:
+            raw.close()
+
+    def _publish(self, log_ids: list[UUID]) -> None:
+        if not self._subscribers:
+            return
+        provider = provider_registry.get()
+        events = []
+        with SessionLocal() as db:
+            # NOTIFY is delivered as soon as the primary commits; a lagging
+            # replica would not have the rows yet and the events would be lost.
+            db.use_primary()
+            for start in range(0, len(log_ids), INGESTION_FETCH_BATCH):
+                events.extend(provider.get_ingestion_events(db, log_ids[start : start + INGESTION_FETCH_BATCH]))
+        if events:
+            self._call_soon(self._dispatch, events)
+
+    def _call_soon(self, callback, *args) -> None:
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(callback, *args)
+
+    def _dispatch(self, events: list[dict[str, object]]) -> None:
+        for queue, scope in list(self._subscribers.items()):
+            for event in events:
+                if not scope.includes(event["site_id"], event["client_id"]):
+                    continue
+                try:
+                    queue.put_nowait(("log", event))
+                except asyncio.QueueFull:
+                    self._resync(queue)
+                    break
+
+    def _broadcast(self, message: tuple[str, dict[str, object]]) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._resync(queue)
+
+    @staticmethod
+    def _resync(queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(("resync", {}))
+
+
+overview_broadcaster = OverviewBroadcaster(settings.overview_stream_interval_seconds)
+ingestion_listener = IngestionListener(engine, INGESTION_CHANNEL, settings.ingestion_stream_buffer)
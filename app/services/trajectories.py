@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.models import NoduleTrajectoryPoint, QCTFollowup, QCTNodule, Study
+
+
+def rebuild_trajectories(db: Session, patient_ids: Iterable[UUID] | None = None) -> int:
+    """Recompute the per-nodule series for the given patients (all when None).
+
+    Tracks are chains of QCTFollowup.prior_nodule_id -> nodule_id links; a
+    nodule without a matched predecessor starts a new track. Returns the
+    number of points written. The caller owns the transaction.
+    """
+    patient_filter = list(patient_ids) if patient_ids is not None else None
+
+    nodule_query = (
+        select(
+            QCTNodule.id,
+            QCTNodule.nodule_uid,
+            QCTNodule.location,
+            QCTNodule.volume_mm3,
+            QCTNodule.diameter_mm,
+            QCTNodule.risk,
+            Study.id,
+            Study.study_uid,
+            Study.study_date,
+            Study.patient_id,
+        )
+        .join(Study, QCTNodule.study_id == Study.id)
+        .order_by(Study.patient_id, Study.study_date)
+    )
+    followup_query = (
+        select(
+            QCTFollowup.prior_nodule_id,
+            QCTFollowup.nodule_id,
+            QCTFollowup.growth_percent,
+            QCTFollowup.vdt_days,
+        )
+        .join(Study, QCTFollowup.current_study_id == Study.id)
+        .where(QCTFollowup.prior_nodule_id.is_not(None))
+    )
+    if patient_filter is not None:
+        nodule_query = nodule_query.where(Study.patient_id.in_(patient_filter))
+        followup_query = followup_query.where(Study.patient_id.in_(patient_filter))
+
+    nodules = {row[0]: row for row in db.execute(nodule_query).all()}
+    successor: dict[UUID, UUID] = {}
+    link_metrics: dict[UUID, tuple[float, int | None]] = {}
+    for prior_id, current_id, growth, vdt_days in db.execute(followup_query).all():
+        if prior_id in nodules and current_id in nodules:
+            successor[prior_id] = current_id
+            link_metrics[current_id] = (growth, vdt_days)
+
+    now = datetime.utcnow()
+    rows = []
+    for root_id in nodules:
+        if root_id in link_metrics:
+            continue
+        position = 0
+        nodule_id: UUID | None = root_id
+        while nodule_id is not None:
+            (
+                _,
+                nodule_uid,
+                location,
+                volume_mm3,
+                diameter_mm,
+                risk,
+                study_id,
+                study_uid,
+                study_date,
+                patient_id,
+            ) = nodules[nodule_id]
+            growth, vdt_days = link_metrics.get(nodule_id, (None, None))
+            rows.append(
+                {
+                    "patient_id": patient_id,
+                    "track_id": root_id,
+                    "nodule_id": nodule_id,
+                    "study_id": study_id,
+                    "position": position,
+                    "study_uid": study_uid,
+                    "study_date": study_date,
+                    "nodule_uid": nodule_uid,
+                    "location": location,
+                    "volume_mm3": volume_mm3,
+                    "diameter_mm": diameter_mm,
+                    "vdt_days": vdt_days,
+                    "growth_percent": growth,
+                    "risk": risk,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+            position += 1
+            nodule_id = successor.get(nodule_id)
+
+    clear = delete(NoduleTrajectoryPoint)
+    if patient_filter is not None:
+        clear = clear.where(NoduleTrajectoryPoint.patient_id.in_(patient_filter))
+    db.execute(clear)
+    if rows:
+        db.execute(insert(NoduleTrajectoryPoint), rows)
+    return len(rows)
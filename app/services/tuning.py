@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.instrumentation import CHECKOUT_SAMPLES, RequestUsage, checkout_samples
+
+# Sizes are set this much above the observed p95/peak.
+HEADROOM = 1.25
+# A worker runs Python on one core at a time; above this share it is CPU-bound.
+CPU_TARGET = 0.6
+# Pool wait (seconds, p95) and threadpool saturation (share of requests) worth a note.
+POOL_WAIT_NOTE = 0.01
+SATURATION_NOTE = 0.05
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+class LoadObserver:
+    """Per-worker record of request timings, threadpool use and CPU time since the last reset.
+
+    Fed by app.api.tuning.TuningMiddleware; every series is a bounded window,
+    so a long-running tuning mode keeps constant memory.
+    """
+
+    def __init__(self, size: int = CHECKOUT_SAMPLES) -> None:
+        self.size = size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes: dict[str, deque[tuple[float, float, float, int]]] = {}
+            self._threads: deque[int] = deque(maxlen=self.size)
+            self._saturated = 0
+            self._requests = 0
+            self._in_flight = 0
+            self._peak_in_flight = 0
+            self._threadpool_size = 0
+            self._started = time.monotonic()
+            self._cpu_started = time.process_time()
+        checkout_samples.clear()
+
+    def request_started(self, threads_busy: int, threadpool_size: int) -> None:
+        with self._lock:
+            self._requests += 1
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            self._threads.append(threads_busy)
+            self._threadpool_size = threadpool_size
+            if threads_busy >= threadpool_size:
+                self._saturated += 1
+
+    def request_finished(self, route: str | None, seconds: float, usage: RequestUsage) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if route is not None:
+                self._routes.setdefault(route, deque(maxlen=self.size)).append(
+                    (seconds, usage.db_seconds, usage.pool_wait_seconds, usage.queries)
+                )
+
+    def snapshot(self) -> dict[str, object]:
+        with self._lock:
+            elapsed = max(time.monotonic() - self._started, 1e-9)
+            routes = {route: list(samples) for route, samples in self._routes.items()}
+            threads = list(self._threads)
+            snapshot = {
+                "window_seconds": round(elapsed, 1),
+                "requests": self._requests,
+                "peak_in_flight": self._peak_in_flight,
+                "cpu_utilization": round((time.process_time() - self._cpu_started) / elapsed, 3),
+                "threadpool": {
+                    "size": self._threadpool_size,
+                    "busy_p95": percentile(threads, 0.95),
+                    "busy_peak": max(threads, default=0),
+                    "saturated_share": round(self._saturated / self._requests, 3) if self._requests else 0.0,
+                },
+            }
+        snapshot["routes"] = {
+            route: {
+                "count": len(samples),
+                "p50_ms": round(percentile([s[0] for s in samples], 0.5) * 1000, 2),
+                "p95_ms": round(percentile([s[0] for s in samples], 0.95) * 1000, 2),
+                "db_p95_ms": round(percentile([s[1] for s in samples], 0.95) * 1000, 2),
+                "pool_wait_p95_ms": round(percentile([s[2] for s in samples], 0.95) * 1000, 2),
+                "queries_avg": round(sum(s[3] for s in samples) / len(samples), 1),
+                "db_share": round(sum(s[1] for s in samples) / max(sum(s[0] for s in samples), 1e-9), 3),
+            }
+            for route, samples in sorted(routes.items())
+        }
+        snapshot["pools"] = {
+            pool: {"checked_out_p95": percentile(samples, 0.95), "checked_out_peak": peak}
+            for pool, (samples, peak) in checkout_samples.snapshot().items()
+        }
+        return snapshot
+
+
+observer = LoadObserver()
+
+
+def database_limits(db: Session) -> dict[str, int] | None:
+    """Connection limits of the primary; None on backends without them (SQLite)."""
+    db.use_primary()
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    return {
+        "max_connections": int(db.scalar(text("SHOW max_connections"))),
+        "superuser_reserved_connections": int(db.scalar(text("SHOW superuser_reserved_connections"))),
+        "in_use": int(
+            db.scalar(text("SELECT count(*) FROM pg_stat_activity WHERE backend_type = 'client backend'"))
+        ),
+    }
+
+
+def current_sizes() -> dict[str, int]:
+    return {
+        "web_concurrency": settings.web_concurrency,
+        "db_pool_size": settings.db_pool_size,
+        "db_max_overflow": settings.db_max_overflow,
+        "threadpool_size": settings.resolved_threadpool_size,
+    }
+
+
+def recommend(
+    snapshot: dict[str, object], limits: dict[str, int] | None, cpu_count: int | None = None
+) -> tuple[dict[str, int], list[str]]:
+    """Worker, pool and threadpool sizes for the observed load, within the primary's max_connections.
+
+    Workers follow CPU use (each is one GIL); the pool follows the connections
+    in use at checkout and the busy threads, rescaled to the new worker count;
+    every worker's pool, overflow and LISTEN connection, plus
+    TUNING_RESERVED_CONNECTIONS, must fit in max_connections; and the
+    threadpool matches the connections, which also bound the requests
+    app.api.admission lets in at once.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    notes: list[str] = []
+    workers = settings.web_concurrency
+    cpu = float(snapshot["cpu_utilization"])
+    target_workers = workers
+    if cpu > CPU_TARGET + 0.15:
+        target_workers = min(cpu_count, math.ceil(workers * cpu / CPU_TARGET))
+        notes.append(f"workers use {cpu:.0%} of a core each; more workers spread the Python work")
+    elif cpu < CPU_TARGET / 3 and workers > 1:
+        target_workers = max(1, math.ceil(workers * cpu / CPU_TARGET))
+        notes.append(f"workers use {cpu:.0%} of a core each; fewer workers leave more connections per pool")
+
+    primary = snapshot["pools"].get("primary", {"checked_out_p95": 0, "checked_out_peak": 0})
+    threads = snapshot["threadpool"]
+    scale = workers / target_workers
+    pool_size = max(2, math.ceil(primary["checked_out_p95"] * scale * HEADROOM))
+    # Busy threads count too: with more connections they would have run instead of queueing.
+    peak = max(primary["checked_out_peak"], threads["busy_peak"])
+    max_overflow = max(2, math.ceil(peak * scale * HEADROOM) - pool_size)
+
+    if limits:
+        available = (
+            limits["max_connections"] - limits["superuser_reserved_connections"] - settings.tuning_reserved_connections
+        )
+        # One LISTEN connection per worker for /ingestion/stream.
+        per_worker = available // target_workers - 1
+        if per_worker < 2:
+            target_workers = max(1, available // (pool_size + max_overflow + 1))
+            per_worker = available // target_workers - 1
+            notes.append(f"max_connections={limits['max_connections']} caps the workers at {target_workers}")
+        if pool_size + max_overflow > per_worker:
+            max_overflow = max(0, per_worker - pool_size)
+            pool_size = min(pool_size, per_worker)
+            notes.append(
+                f"max_connections={limits['max_connections']} caps each worker at {per_worker} connections; "
+                "consider PgBouncer or raising max_connections"
+            )
+
+    # AdmissionMiddleware runs as many requests as there are connections; more threads would idle.
+    threadpool_size = pool_size + max_overflow
+
+    slow_waits = [
+        route for route, stats in snapshot["routes"].items() if stats["pool_wait_p95_ms"] > POOL_WAIT_NOTE * 1000
+    ]
+    if slow_waits:
+        notes.append(f"requests waited for a connection on {', '.join(slow_waits)}")
+    admitted = settings.db_pool_size + settings.db_max_overflow
+    if snapshot["peak_in_flight"] > admitted:
+        notes.append(
+            f"up to {snapshot['peak_in_flight']} requests were in flight; past {admitted} they queued for admission"
+        )
+    if threads["saturated_share"] > SATURATION_NOTE:
+        notes.append(f"{threads['saturated_share']:.0%} of requests arrived with every thread busy")
+
+    return {
+        "web_concurrency": target_workers,
+        "db_pool_size": pool_size,
+        "db_max_overflow": max_overflow,
+        "threadpool_size": threadpool_size,
+    }, notes
+
+
+def tuning_report(limits: dict[str, int] | None) -> dict[str, object]:
+    snapshot = observer.snapshot()
+    recommended, notes = recommend(snapshot, limits)
+    return {
+        "pid": os.getpid(),
+        **snapshot,
+        "database": limits,
+        "current": current_sizes(),
+        "recommended": recommended,
+        "notes": notes,
+    }
@@ -69,23 +69,36 @@ const initCharts = () => {
     `;
   };
 
+  let riskBreakdown = window.QCT_DATA.riskBreakdown;
+  let volumeTrend = window.QCT_DATA.volumeTrend;
+  let riskChart = null;
+  let volumeChart = null;
+
   const riskCtx = document.getElementById('riskChart');
-  if (riskCtx) {
-    const labels = window.QCT_DATA.riskBreakdown.map(
-      (item) => riskLabels[item.label] || item.label
-    );
-    const values = window.QCT_DATA.riskBreakdown.map((item) => item.value);
-    const colorKeys = window.QCT_DATA.riskBreakdown.map((item) => item.label);
+  const renderRisk = () => {
+    if (!riskCtx) {
+      return;
+    }
+    const labels = riskBreakdown.map((item) => riskLabels[item.label] || item.label);
+    const values = riskBreakdown.map((item) => item.value);
+    const colorKeys = riskBreakdown.map((item) => item.label);
+    const colors = colorKeys.map((label) => riskColors[label] || '#94a3b8');
     const fallback = document.getElementById('riskFallback');
-    if (typeof Chart !== 'undefined') {
-      new Chart(riskCtx, {
+    if (riskChart) {
+      // Patch the existing instance so the chart animates instead of being rebuilt.
+      riskChart.data.labels = labels;
+      riskChart.data.datasets[0].data = values;
+      riskChart.data.datasets[0].backgroundColor = colors;
+      riskChart.update();
+    } else if (typeof Chart !== 'undefined') {
+      riskChart = new Chart(riskCtx, {
         type: 'doughnut',
         data: {
           labels,
           datasets: [
             {
               data: values,
-              backgroundColor: colorKeys.map((label) => riskColors[label] || '#94a3b8'),
+              backgroundColor: colors,
             },
           ],
         },
@@ -100,15 +113,24 @@ const initCharts = () => {
       riskCtx.style.display = 'none';
       fallback.innerHTML = buildRiskFallback(labels, values, colorKeys);
     }
-  }
+  };
 
   const volumeCtx = document.getElementById('volumeChart');
-  if (volumeCtx) {
-    const labels = window.QCT_DATA.volumeTrend.map((item) => item.label);
-    const values = window.QCT_DATA.volumeTrend.map((item) => item.value);
+  const renderVolume = () => {
+    if (!volumeCtx) {
+      return;
+    }
+    const labels = volumeTrend.map((item) => item.label);
+    const values = volumeTrend.map((item) => item.value);
     const fallback = document.getElementById('volumeFallback');
-    if (typeof Chart !== 'undefined') {
-      new Chart(volumeCtx, {
+    if (volumeChart) {
+      const dataset = volumeChart.data.datasets[0];
+      volumeChart.data.labels = labels;
+      dataset.data = values;
+      dataset.pointRadius = values.length > 60 ? 0 : 3;
+      volumeChart.update();
+    } else if (typeof Chart !== 'undefined') {
+      volumeChart = new Chart(volumeCtx, {
         type: 'line',
         data: {
           labels,
@@ -120,6 +142,8 @@ const initCharts = () => {
               backgroundColor: 'rgba(31, 157, 150, 0.2)',
               tension: 0.35,
               fill: true,
+              // Dense series (server-capped via TREND_MAX_POINTS) render without markers.
+              pointRadius: values.length > 60 ? 0 : 3,
             },
           ],
         },
@@ -137,10 +161,136 @@ const initCharts = () => {
       volumeCtx.style.display = 'none';
       fallback.innerHTML = buildTrendFallback(labels, values);
     }
+  };
+
+  renderRisk();
+  renderVolume();
+
+  const applyOverview = (data) => {
+    if (data.kpis) {
+      Object.entries(data.kpis).forEach(([key, value]) => {
+        const element = document.querySelector(`[data-kpi="${key}"]`);
+        if (element) {
+          element.textContent = value;
+        }
+      });
+    }
+    if (data.risk_breakdown) {
+      riskBreakdown = data.risk_breakdown;
+      renderRisk();
+    }
+    if (Array.isArray(data.volume_trend)) {
+      volumeTrend = data.volume_trend;
+      renderVolume();
+    } else if (data.volume_trend) {
+      // Deltas carry changed points by label; ISO date labels sort chronologically.
+      const points = new Map(volumeTrend.map((item) => [item.label, item]));
+      data.volume_trend.remove.forEach((label) => points.delete(label));
+      data.volume_trend.upsert.forEach((item) => points.set(item.label, item));
+      volumeTrend = Array.from(points.values()).sort((a, b) => a.label.localeCompare(b.label));
+      renderVolume();
+    }
+    const updated = document.getElementById('overviewUpdated');
+    if (updated) {
+      updated.textContent = new Date().toLocaleTimeString();
+    }
+  };
+
+  if (window.QCT_DATA.streamUrl && typeof EventSource !== 'undefined') {
+    const source = new EventSource(window.QCT_DATA.streamUrl);
+    source.addEventListener('snapshot', (event) => applyOverview(JSON.parse(event.data)));
+    source.addEventListener('delta', (event) => applyOverview(JSON.parse(event.data)));
   }
 };
 
-const updateMetaIndicators = (uiState = {}) => {
+const INGESTION_STATUS_LABELS = {
+  completed: 'Completado',
+  processing: 'En proceso',
+};
+
+const buildIngestionItem = (log) => {
+  const statusLabel = INGESTION_STATUS_LABELS[log.status] || log.status;
+  const item = document.createElement('div');
+  item.className = 'timeline-item';
+  item.dataset.logId = log.id;
+  item.innerHTML = `
+    <div class="timeline-date">
+      <strong></strong>
+      <span class="muted"></span>
+    </div>
+    <div class="timeline-card">
+      <div class="timeline-card-header">
+        <div class="timeline-title"><strong></strong></div>
+        <span class="pill"></span>
+      </div>
+      <div class="timeline-meta">
+        <div><span>Estudio</span><strong data-field="study_uid"></strong></div>
+        <div><span>Sitio</span><strong data-field="site_name"></strong></div>
+        <div><span>Mensaje</span><strong data-field="message"></strong></div>
+      </div>
+      <div class="timeline-links">
+        <a></a>
+        <span class="muted"></span>
+      </div>
+    </div>
+  `;
+  // Text goes in through textContent so event fields are never parsed as HTML.
+  item.querySelector('.timeline-date strong').textContent = log.started_at;
+  item.querySelector('.timeline-date .muted').textContent = log.completed_at
+    ? `Finalizado ${log.completed_at}`
+    : 'En proceso';
+  item.querySelector('.timeline-title strong').textContent = log.anon_label;
+  const pill = item.querySelector('.pill');
+  pill.classList.add(log.status);
+  pill.textContent = statusLabel;
+  ['study_uid', 'site_name', 'message'].forEach((field) => {
+    item.querySelector(`[data-field="${field}"]`).textContent = log[field];
+  });
+  const link = item.querySelector('.timeline-links a');
+  link.href = `/studies/${encodeURIComponent(log.study_id)}`;
+  link.textContent = 'Ver estudio';
+  item.querySelector('.timeline-links .muted').textContent = `Estado: ${statusLabel}`;
+  return item;
+};
+
+const initIngestionStream = () => {
+  const timeline = document.getElementById('ingestionTimeline');
+  const empty = document.getElementById('ingestionEmpty');
+  const streamUrl = (timeline || empty)?.dataset.streamUrl;
+  if (!streamUrl || typeof EventSource === 'undefined') {
+    return;
+  }
+  const source = new EventSource(streamUrl);
+  // The server dropped events for this client (slow reader or listener reconnect).
+  source.addEventListener('resync', () => window.location.reload());
+  source.addEventListener('log', (event) => {
+    if (!timeline) {
+      window.location.reload();
+      return;
+    }
+    const log = JSON.parse(event.data);
+    const item = buildIngestionItem(log);
+    const existing = timeline.querySelector(`[data-log-id="${CSS.escape(log.id)}"]`);
+    if (existing) {
+      existing.replaceWith(item);
+      return;
+    }
+    timeline.prepend(item);
+    const limit = Number(timeline.dataset.limit) || 10;
+    while (timeline.children.length > limit) {
+      timeline.lastElementChild.remove();
+    }
+  });
+};
+
+const RANGE_PRESET_LABELS = {
+  last7: 'Ultimos 7 dias',
+  last30: 'Ultimos 30 dias',
+  last90: 'Ultimos 90 dias',
+  last365: 'Ultimos 365 dias',
+};
+
+const updateMetaIndicators = () => {
   const metaRefresh = document.getElementById('metaRefresh');
   const metaFilters = document.getElementById('metaFilters');
   const metaDateRange = document.getElementById('metaDateRange');
@@ -148,7 +298,7 @@ const updateMetaIndicators = (uiState = {}) => {
     metaRefresh.textContent = new Date().toLocaleString();
   }
   const params = new URLSearchParams(window.location.search);
-  const filterKeys = ['status', 'risk', 'q', 'start_date', 'end_date'];
+  const filterKeys = ['status', 'risk', 'q', 'site_id', 'range', 'date_from', 'date_to'];
   let activeFilters = 0;
   filterKeys.forEach((key) => {
     const value = params.get(key);
@@ -156,19 +306,17 @@ const updateMetaIndicators = (uiState = {}) => {
       activeFilters += 1;
     }
   });
-  if (uiState.quickLast30) {
-    activeFilters += 1;
-  }
   if (metaFilters) {
     metaFilters.textContent = String(activeFilters);
   }
   if (metaDateRange) {
-    const start = params.get('start_date');
-    const end = params.get('end_date');
+    const start = params.get('date_from');
+    const end = params.get('date_to');
+    const preset = params.get('range');
     if (start || end) {
       metaDateRange.textContent = `${start || '...'} a ${end || '...'}`;
-    } else if (uiState.quickLast30) {
-      metaDateRange.textContent = 'Ultimos 30 dias (pagina)';
+    } else if (preset && RANGE_PRESET_LABELS[preset]) {
+      metaDateRange.textContent = RANGE_PRESET_LABELS[preset];
     } else {
       metaDateRange.textContent = 'Todo el periodo';
     }
@@ -219,108 +367,11 @@ const updateQualitySummary = () => {
   }
 };
 
-const initStudyQuickFilters = () => {
-  const last30Button = document.querySelector('[data-quick-filter="last30"]');
-  if (!last30Button) {
-    return;
-  }
-  const clientEmptyState = document.getElementById('clientEmptyState');
-  const clearQuickFilter = document.querySelector('[data-clear-quick-filter]');
-  const uiState = {
-    quickLast30: false,
-  };
-
-  const parseDate = (value) => {
-    const date = new Date(value);
-    return Number.isNaN(date.getTime()) ? null : date;
-  };
-
-  const applyLast30Filter = () => {
-    const table = document.querySelector('table.table');
-    if (!table) {
-      return;
-    }
-    // Client-side preset: filters only the currently loaded page.
-    const rows = Array.from(table.querySelectorAll('tbody tr[data-study-date]'));
-    const cutoff = new Date();
-    cutoff.setDate(cutoff.getDate() - 30);
-    let visibleCount = 0;
-    rows.forEach((row) => {
-      const dateValue = parseDate(row.dataset.studyDate);
-      const isVisible = !uiState.quickLast30 || !dateValue || dateValue >= cutoff;
-      row.style.display = isVisible ? '' : 'none';
-      if (isVisible) {
-        visibleCount += 1;
-      }
-    });
-    if (clientEmptyState) {
-      clientEmptyState.classList.toggle(
-        'is-hidden',
-        !uiState.quickLast30 || visibleCount > 0
-      );
-    }
-    updateQualitySummary();
-    updateMetaIndicators(uiState);
-  };
-
-  last30Button.addEventListener('click', () => {
-    uiState.quickLast30 = !uiState.quickLast30;
-    last30Button.classList.toggle('active', uiState.quickLast30);
-    applyLast30Filter();
-  });
-
-  if (clearQuickFilter) {
-    clearQuickFilter.addEventListener('click', () => {
-      uiState.quickLast30 = false;
-      last30Button.classList.remove('active');
-      applyLast30Filter();
-    });
-  }
-
-  applyLast30Filter();
-};
-
-const initCsvExport = () => {
-  const exportButton = document.querySelector('[data-export="studies"]');
-  if (!exportButton) {
-    return;
-  }
-  exportButton.addEventListener('click', () => {
-    const table = document.querySelector('table.table');
-    if (!table) {
-      return;
-    }
-    const headers = Array.from(table.querySelectorAll('thead th')).map((th) =>
-      th.textContent.trim()
-    );
-    const rows = Array.from(table.querySelectorAll('tbody tr'))
-      .filter((row) => row.style.display !== 'none')
-      .map((row) =>
-        Array.from(row.querySelectorAll('td')).map((cell) =>
-          cell.textContent.trim().replace(/\s+/g, ' ')
-        )
-      );
-    const escapeCell = (value) => `"${value.replace(/"/g, '""')}"`;
-    const csv = [headers, ...rows].map((row) => row.map(escapeCell).join(',')).join('\n');
-    const blob = new Blob([csv], { type: 'text/csv;charset=utf-8;' });
-    const url = URL.createObjectURL(blob);
-    const link = document.createElement('a');
-    const timestamp = new Date().toISOString().slice(0, 10);
-    link.href = url;
-    link.download = `studies_export_${timestamp}.csv`;
-    document.body.appendChild(link);
-    link.click();
-    document.body.removeChild(link);
-    URL.revokeObjectURL(url);
-  });
-};
-
 const initUiEnhancements = () => {
+  initIngestionStream();
   updateBanner();
   updateMetaIndicators();
   updateQualitySummary();
-  initStudyQuickFilters();
-  initCsvExport();
 };
 
 if (document.readyState === 'loading') {
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from uvicorn.workers import UvicornWorker as _UvicornWorker
+
+from app.core.config import settings
+
+
+class UvicornWorker(_UvicornWorker):
+    """Gunicorn worker that drains before the app lifespan shuts down.
+
+    On SIGTERM uvicorn stops accepting connections and waits up to
+    SHUTDOWN_DRAIN_SECONDS for in-flight requests (open event streams
+    included) before cancelling them; only then does the lifespan dispose the
+    connection pools. GUNICORN_GRACEFUL_TIMEOUT must be longer.
+    """
+
+    CONFIG_KWARGS = {**_UvicornWorker.CONFIG_KWARGS, "timeout_graceful_shutdown": settings.shutdown_drain_seconds}
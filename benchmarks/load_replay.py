@@ -0,0 +1,210 @@
+"""Replay dashboard traffic against a running app and print latency plus the tuning recommendation.
+
+Open loop: requests start on the recorded (or Poisson) schedule whatever the
+latency, so queueing in the pool or threadpool shows up as latency instead of
+a lower request rate. With --log, the "request completed" lines of an app log
+are replayed at their original spacing (divided by --speed); otherwise a
+weighted mix of the main pages and APIs arrives at --rate requests/s. Start
+the app with TUNING_MODE=true to get /_tuning; --write-env applies its
+recommendation to an env file.
+
+    python benchmarks/load_replay.py --base-url http://127.0.0.1:8000 [--rate 50 --duration 60]
+    python benchmarks/load_replay.py --log app.log --speed 4 [--write-env .env]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import random
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+# Path and relative weight of the synthetic mix.
+DEFAULT_MIX = [
+    ("/", 20),
+    ("/api/overview", 10),
+    ("/api/overview/trend?bucket=week", 5),
+    ("/studies", 20),
+    ("/studies/api?per_page=100", 15),
+    ("/ingestion", 10),
+    ("/followups", 10),
+    ("/studies/export.csv", 1),
+]
+LOG_LINE = re.compile(
+    r"^(?P<at>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) .*request completed method=GET path=(?P<path>\S+) status=2"
+)
+# Never replayed: event streams never finish and the rest are not dashboard traffic.
+SKIPPED = ("/api/overview/stream", "/ingestion/stream", "/login", "/logout", "/metrics", "/_")
+ENV_KEYS = {
+    "web_concurrency": "WEB_CONCURRENCY",
+    "db_pool_size": "DB_POOL_SIZE",
+    "db_max_overflow": "DB_MAX_OVERFLOW",
+    "threadpool_size": "THREADPOOL_SIZE",
+}
+
+
+def synthetic_schedule(rate: float, duration: float, seed: int) -> list[tuple[float, str]]:
+    rng = random.Random(seed)
+    paths, weights = zip(*DEFAULT_MIX)
+    schedule, at = [], 0.0
+    while True:
+        at += rng.expovariate(rate)
+        if at >= duration:
+            return schedule
+        schedule.append((at, rng.choices(paths, weights)[0]))
+
+
+def log_schedule(path: Path, speed: float) -> list[tuple[float, str]]:
+    schedule, first = [], None
+    with path.open(encoding="utf-8", errors="replace") as handle:
+        for line in handle:
+            match = LOG_LINE.match(line)
+            if not match or match["path"].startswith(SKIPPED) or match["path"].startswith("/static/"):
+                continue
+            at = datetime.strptime(match["at"], "%Y-%m-%d %H:%M:%S,%f").timestamp()
+            first = at if first is None else first
+            schedule.append(((at - first) / speed, match["path"]))
+    return schedule
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)] if ordered else 0.0
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> None:
+    response = await client.post("/login", data={"username": username, "password": password})
+    if response.status_code >= 400 or not client.cookies:
+        raise SystemExit(f"login as {username!r} failed ({response.status_code})")
+
+
+async def replay(
+    client: httpx.AsyncClient, schedule: list[tuple[float, str]], max_in_flight: int
+) -> tuple[dict[str, list[float]], dict[str, int], float]:
+    latencies: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    reasons: dict[str, int] = {}
+    slots = asyncio.Semaphore(max_in_flight)
+
+    async def fetch(path: str) -> None:
+        route = path.split("?", 1)[0]
+        async with slots:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                failure = str(response.status_code) if response.status_code >= 400 else None
+            except httpx.HTTPError as exc:
+                failure = type(exc).__name__
+            elapsed = time.perf_counter() - start
+        latencies.setdefault(route, []).append(elapsed)
+        if failure:
+            errors[route] = errors.get(route, 0) + 1
+            reasons[failure] = reasons.get(failure, 0) + 1
+
+    started = time.perf_counter()
+    tasks = []
+    for at, path in schedule:
+        delay = at - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fetch(path)))
+    await asyncio.gather(*tasks)
+    if reasons:
+        print("errors by status/exception:", ", ".join(f"{key} x{count}" for key, count in sorted(reasons.items())))
+    return latencies, errors, time.perf_counter() - started
+
+
+def print_latencies(latencies: dict[str, list[float]], errors: dict[str, int], elapsed: float) -> None:
+    total = sum(map(len, latencies.values()))
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f}/s), {sum(errors.values())} errors\n")
+    print(f"{'route':<32} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for route, values in sorted(latencies.items()):
+        print(
+            f"{route:<32} {len(values):>6} {percentile(values, 0.5) * 1000:>8.1f} "
+            f"{percentile(values, 0.95) * 1000:>8.1f} {percentile(values, 0.99) * 1000:>8.1f} {errors.get(route, 0):>6}"
+        )
+
+
+def print_tuning(report: dict) -> None:
+    threads = report["threadpool"]
+    print(f"\nworker {report['pid']}: {report['requests']} requests in {report['window_seconds']}s, "
+          f"cpu {report['cpu_utilization']:.0%}, peak in flight {report['peak_in_flight']}")
+    print(f"threadpool {threads['size']}: busy p95 {threads['busy_p95']}, peak {threads['busy_peak']}, "
+          f"saturated {threads['saturated_share']:.0%}")
+    for pool, stats in report["pools"].items():
+        print(f"pool {pool}: in use p95 {stats['checked_out_p95']}, peak {stats['checked_out_peak']}")
+    print(f"\n{'route':<32} {'p95 ms':>8} {'db p95':>8} {'wait p95':>9} {'db share':>9} {'queries':>8}")
+    for route, stats in report["routes"].items():
+        print(
+            f"{route:<32} {stats['p95_ms']:>8.1f} {stats['db_p95_ms']:>8.1f} {stats['pool_wait_p95_ms']:>9.1f} "
+            f"{stats['db_share']:>9.0%} {stats['queries_avg']:>8.1f}"
+        )
+    if report["database"]:
+        print(f"\ndatabase: {report['database']}")
+    print(f"\n{'setting':<20} {'current':>8} {'recommended':>12}")
+    for key, env in ENV_KEYS.items():
+        print(f"{env:<20} {report['current'][key]:>8} {report['recommended'][key]:>12}")
+    for note in report["notes"]:
+        print(f"- {note}")
+
+
+def write_env(path: Path, recommended: dict[str, int]) -> None:
+    lines = path.read_text(encoding="utf-8").splitlines() if path.exists() else []
+    pending = {ENV_KEYS[key]: value for key, value in recommended.items()}
+    for index, line in enumerate(lines):
+        name = line.split("=", 1)[0].strip()
+        if name in pending:
+            lines[index] = f"{name}={pending.pop(name)}"
+    lines.extend(f"{name}={value}" for name, value in pending.items())
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    print(f"\nwrote {', '.join(ENV_KEYS[key] for key in recommended)} to {path}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.log:
+        schedule = log_schedule(Path(args.log), args.speed)
+    else:
+        schedule = synthetic_schedule(args.rate, args.duration, args.seed)
+    if not schedule:
+        raise SystemExit("nothing to replay")
+    # Idle connections are dropped before uvicorn's 5 s keep-alive timeout closes them mid-reuse.
+    limits = httpx.Limits(
+        max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight, keepalive_expiry=4.0
+    )
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        await login(client, args.username, args.password)
+        tuning = (await client.post("/_tuning/reset")).status_code == 200
+        latencies, errors, elapsed = await replay(client, schedule, args.max_in_flight)
+        print_latencies(latencies, errors, elapsed)
+        if not tuning:
+            print("\n/_tuning is not available; start the app with TUNING_MODE=true for recommendations")
+            return
+        report = (await client.get("/_tuning")).json()
+    print_tuning(report)
+    if args.write_env:
+        write_env(Path(args.write_env), report["recommended"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", default="demo")
+    parser.add_argument("--password", default="demo")
+    parser.add_argument("--log", help="app log whose 'request completed' lines are replayed")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay the log this many times faster")
+    parser.add_argument("--rate", type=float, default=30.0, help="synthetic requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="synthetic run length in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--max-in-flight", type=int, default=256, help="client-side cap on concurrent requests")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--write-env", help="env file to update with the recommended sizes")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
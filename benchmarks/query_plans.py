@@ -0,0 +1,256 @@
+"""Snapshot the PostgreSQL plans of app/services/queries.py and fail when they regress.
+
+Every public function of app.services.queries runs through at least one
+case (filters, search, deep offsets and a site scope where they take them)
+against a database seeded with benchmarks/seed_scale.py. Each SELECT a case
+issues is captured and re-run as EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON).
+The snapshot keeps, per statement:
+
+- the plan shape: node types with their relation and index;
+- the shared buffers touched (hit + read), which do not depend on the cache;
+- the temp blocks written (sorts, hashes or aggregates spilling to disk).
+
+Checking against a snapshot fails (exit 1) when a shape changed (a seq scan
+replacing an index scan, a new sort), when a statement starts spilling, or
+when its buffers grow by more than --tolerance. A public function without a
+case also fails. After an intended change, re-run with --update and commit
+the new snapshot with it. Plans depend on the PostgreSQL version and the
+dataset, so keep one snapshot per scale.
+
+    python benchmarks/seed_scale.py --studies 100k
+    python benchmarks/query_plans.py --snapshot benchmarks/plans/100k.json --update
+    python benchmarks/query_plans.py --snapshot benchmarks/plans/100k.json [--tolerance 0.25]
+"""
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import sys
+from collections.abc import Callable
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.db.instrumentation import statement_fingerprint
+from app.db.models import IngestionLog, Patient, QCTNodule, Site, Study
+from app.db.session import SessionLocal, engine
+from app.services import queries
+from app.services.scope import TenantScope
+
+# Public functions that never touch the database.
+NO_QUERIES = {"risk_palette"}
+# Buffer growth below this many blocks is noise whatever the tolerance.
+BUFFER_SLACK = 16
+
+
+class Fixtures:
+    """Ids the cases need, picked deterministically from the seeded data."""
+
+    def __init__(self, db: Session) -> None:
+        self.study_id = db.scalar(select(Study.id).order_by(Study.study_uid).limit(1))
+        self.patient_id = db.scalar(select(Patient.id).order_by(Patient.patient_uid).limit(1))
+        self.nodule_id = db.scalar(select(QCTNodule.id).order_by(QCTNodule.nodule_uid).limit(1))
+        self.site_id = db.scalar(select(Site.id).order_by(Site.name).limit(1))
+        self.log_ids = db.scalars(select(IngestionLog.id).order_by(IngestionLog.started_at.desc()).limit(20)).all()
+        self.last30 = date.today() - timedelta(days=30)
+        if self.study_id is None:
+            raise SystemExit("no studies; seed the database with benchmarks/seed_scale.py first")
+
+    @property
+    def site(self) -> TenantScope:
+        return TenantScope(site_id=self.site_id)
+
+
+def cases(f: Fixtures) -> dict[str, Callable[[Session], object]]:
+    q = queries
+    return {
+        "get_overview_generation": lambda db: q.get_overview_generation(db),
+        "get_overview_kpis": lambda db: q.get_overview_kpis(db),
+        "get_overview_kpis[site]": lambda db: q.get_overview_kpis(db, scope=f.site),
+        "get_risk_breakdown": lambda db: q.get_risk_breakdown(db),
+        "get_overview_summary": lambda db: q.get_overview_summary(db),
+        "get_overview_summary[site]": lambda db: q.get_overview_summary(db, scope=f.site),
+        "list_sites": lambda db: q.list_sites(db),
+        "get_volume_trend[week]": lambda db: q.get_volume_trend(db, bucket="week", max_points=180),
+        "get_volume_trend[site,last30]": lambda db: q.get_volume_trend(db, date_from=f.last30, scope=f.site),
+        "get_volume_trend_splits[month]": lambda db: q.get_volume_trend_splits(db, bucket="month", max_points=180),
+        "list_studies": lambda db: q.list_studies(db, limit=10, offset=0),
+        "list_studies[filtered]": lambda db: q.list_studies(db, status="review", risk="high", limit=10, offset=0),
+        "list_studies[search]": lambda db: q.list_studies(db, search="P-00012", limit=10, offset=0),
+        "list_studies[deep]": lambda db: q.list_studies(db, limit=10, offset=5000),
+        "list_studies[site,last30]": lambda db: q.list_studies(db, scope=f.site, date_from=f.last30, limit=10),
+        "count_studies": lambda db: q.count_studies(db),
+        "count_studies[filtered]": lambda db: q.count_studies(db, status="review", risk="high"),
+        "count_studies[search]": lambda db: q.count_studies(db, search="P-00012"),
+        "iter_study_export_rows": lambda db: next(q.iter_study_export_rows(db, risk="high"), None),
+        "get_study_detail": lambda db: q.get_study_detail(db, f.study_id),
+        "get_followup_timeline": lambda db: q.get_followup_timeline(db),
+        "get_followup_timeline[search]": lambda db: q.get_followup_timeline(db, search="P-00012"),
+        "get_followup_timeline[deep]": lambda db: q.get_followup_timeline(db, offset=2000),
+        "count_followups": lambda db: q.count_followups(db),
+        "get_patient_trajectories": lambda db: q.get_patient_trajectories(db, f.patient_id),
+        "get_nodule_trajectory": lambda db: q.get_nodule_trajectory(db, f.nodule_id),
+        "get_ingestion_logs[last30]": lambda db: q.get_ingestion_logs(db, date_from=f.last30),
+        "get_ingestion_logs[search]": lambda db: q.get_ingestion_logs(db, search="ST-0000"),
+        "get_ingestion_logs_by_id": lambda db: q.get_ingestion_logs_by_id(db, f.log_ids),
+        "count_ingestion_logs[last30]": lambda db: q.count_ingestion_logs(db, date_from=f.last30),
+    }
+
+
+def uncovered(names: set[str]) -> list[str]:
+    public = {
+        name
+        for name, value in inspect.getmembers(queries, inspect.isfunction)
+        if not name.startswith("_") and value.__module__ == queries.__name__
+    }
+    covered = {name.split("[", 1)[0] for name in names}
+    return sorted(public - covered - NO_QUERIES)
+
+
+def capture(run: Callable[[Session], object]) -> list[tuple[str, object]]:
+    """The SELECT statements (with parameters) a case executes."""
+    statements: list[tuple[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with SessionLocal() as db:
+            # Only the primary engine is listened to; replicas would record nothing.
+            db.use_primary()
+            run(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def _walk(node: dict, depth: int = 0):
+    yield depth, node
+    for child in node.get("Plans", []):
+        yield from _walk(child, depth + 1)
+
+
+def summarize(plan: dict) -> dict[str, object]:
+    root = plan["Plan"]
+    shape = []
+    for depth, node in _walk(root):
+        label = node["Node Type"]
+        if "Relation Name" in node:
+            label += f" on {node['Relation Name']}"
+        if "Index Name" in node:
+            label += f" using {node['Index Name']}"
+        shape.append("  " * depth + label)
+    # BUFFERS counts on the root include every child node.
+    return {
+        "shape": shape,
+        "shared_blocks": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+        "temp_blocks": root.get("Temp Written Blocks", 0),
+        "execution_ms": round(plan.get("Execution Time", 0.0), 2),
+    }
+
+
+def explain(statement: str, parameters) -> dict[str, object]:
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+        # psycopg2 decodes the json column; other drivers may hand back text.
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        return summarize(plan[0])
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+def snapshot() -> dict[str, object]:
+    with SessionLocal() as db:
+        db.use_primary()
+        fixtures = Fixtures(db)
+        total_studies = queries.count_studies(db)
+    selected = cases(fixtures)
+    missing = uncovered(set(selected))
+    if missing:
+        raise SystemExit(f"no plan case for {', '.join(missing)}; add one to cases()")
+    with engine.connect() as conn:
+        version = conn.exec_driver_sql("SHOW server_version").scalar()
+    plans = {}
+    for name, run in selected.items():
+        statements = capture(run)
+        if not statements:
+            raise SystemExit(f"{name} ran no SELECT on the primary engine; nothing to compare")
+        plans[name] = [
+            {"statement": statement_fingerprint(statement), **explain(statement, parameters)}
+            for statement, parameters in statements
+        ]
+    return {"server_version": version, "total_studies": total_studies, "cases": plans}
+
+
+def compare(current: dict[str, object], baseline: dict[str, object], tolerance: float) -> list[str]:
+    """Regressions of ``current`` against ``baseline``, one line each."""
+    failures = []
+    for key in ("server_version", "total_studies"):
+        if current[key] != baseline[key]:
+            print(f"warning: {key} is {current[key]}, the snapshot was taken with {baseline[key]}")
+    for name, plans in current["cases"].items():
+        expected = baseline["cases"].get(name)
+        if expected is None:
+            failures.append(f"{name}: no snapshot (run with --update)")
+            continue
+        if len(plans) != len(expected):
+            failures.append(f"{name}: {len(plans)} statements, snapshot has {len(expected)}")
+            continue
+        for index, (plan, base) in enumerate(zip(plans, expected)):
+            where = f"{name} #{index + 1}"
+            if plan["shape"] != base["shape"]:
+                lines = "\n".join(f"    {line}" for line in plan["shape"])
+                seq_scans = [line.strip() for line in plan["shape"] if "Seq Scan" in line and line not in base["shape"]]
+                hint = f" (new: {', '.join(seq_scans)})" if seq_scans else ""
+                failures.append(f"{where}: plan changed{hint}\n{lines}")
+            if plan["temp_blocks"] and not base["temp_blocks"]:
+                failures.append(f"{where}: spills to disk ({plan['temp_blocks']} temp blocks written)")
+            limit = max(base["shared_blocks"] * (1 + tolerance), base["shared_blocks"] + BUFFER_SLACK)
+            if plan["shared_blocks"] > limit:
+                failures.append(f"{where}: {plan['shared_blocks']} buffers, snapshot {base['shared_blocks']}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--snapshot", default="benchmarks/plans/snapshot.json", help="snapshot JSON file")
+    parser.add_argument("--update", action="store_true", help="write the current plans as the snapshot")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed buffer growth (0.25 = 25%%)")
+    args = parser.parse_args()
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("query plans are only snapshotted on PostgreSQL; point DATABASE_URL at a seeded database")
+
+    current = snapshot()
+    for name, plans in current["cases"].items():
+        blocks = sum(plan["shared_blocks"] for plan in plans)
+        print(f"{name:<36} {len(plans):>2} statements {blocks:>8} buffers")
+    path = Path(args.snapshot)
+    if args.update:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+        print(f"wrote {path}")
+        return
+    if not path.exists():
+        raise SystemExit(f"{path} does not exist; create it with --update")
+    failures = compare(current, json.loads(path.read_text(encoding="utf-8")), args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"no plan regressions against {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Drive every dashboard route at fixed concurrency and compare against a stored baseline.
+
+Each scenario runs --concurrency clients in a closed loop (next request as
+soon as the previous answers) for --duration seconds after --warmup
+requests, and reports p50/p95/p99 latency, requests/s and statements per
+request (from the Server-Timing header, DB_INSTRUMENTATION). Seed the
+database with benchmarks/seed_scale.py first; the dataset size is read from
+/api/overview and stored with the results.
+
+--save-baseline writes the run to a JSON file. --compare fails (exit 1) when
+a scenario's p95 grew or its requests/s dropped by more than --tolerance,
+when it runs more statements per request than the baseline, or when it
+errors. Baselines only compare on the same machine, scale and concurrency.
+
+    python benchmarks/route_suite.py --base-url http://127.0.0.1:8000 --save-baseline benchmarks/baselines/100k.json
+    python benchmarks/route_suite.py --compare benchmarks/baselines/100k.json [--tolerance 0.2]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def scenarios(study_id: str, deep_page: int) -> dict[str, str]:
+    return {
+        "home": "/",
+        "overview_api": "/api/overview",
+        "studies": "/studies",
+        "studies_filtered": "/studies?status=review&risk=high",
+        "studies_search": "/studies?q=P-00012",
+        "studies_deep_page": f"/studies?page={deep_page}",
+        "studies_api_100": "/studies/api?per_page=100",
+        "study_detail": f"/studies/{study_id}",
+        "followups": "/followups",
+        "ingestion": "/ingestion",
+    }
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)] if ordered else 0.0
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> None:
+    response = await client.post("/login", data={"username": username, "password": password})
+    if response.status_code >= 400 or not client.cookies:
+        raise SystemExit(f"login as {username!r} failed ({response.status_code})")
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, path: str, concurrency: int, duration: float, warmup: int
+) -> dict[str, object]:
+    for _ in range(warmup):
+        await client.get(path)
+    latencies: list[float] = []
+    queries: list[int] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            match = QUERIES.search(response.headers.get("server-timing", ""))
+            if match:
+                queries.append(int(match[1]))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict[str, object]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        await login(client, args.username, args.password)
+        overview = (await client.get("/api/overview")).json()
+        first = (await client.get("/studies/api?per_page=1")).json()
+        if not first:
+            raise SystemExit("no studies; seed the database with benchmarks/seed_scale.py first")
+        selected = scenarios(str(first[0]["id"]), args.deep_page)
+        if args.scenario:
+            selected = {name: path for name, path in selected.items() if name in args.scenario}
+        results = {}
+        for name, path in selected.items():
+            results[name] = await run_scenario(client, path, args.concurrency, args.duration, args.warmup)
+            print_result(name, results[name])
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "total_studies": overview.get("kpis", {}).get("total_studies"),
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "scenarios": results,
+    }
+
+
+def print_header() -> None:
+    print(f"{'scenario':<20} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>6}")
+
+
+def print_result(name: str, result: dict[str, object]) -> None:
+    queries = result["queries_per_request"]
+    print(
+        f"{name:<20} {result['rps']:>8.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+        f"{result['p99_ms']:>8.1f} {'-' if queries is None else queries:>8} {result['errors']:>6}"
+    )
+
+
+def compare(current: dict[str, object], baseline: dict[str, object], tolerance: float) -> list[str]:
+    """Regressions of ``current`` against ``baseline``, one line each."""
+    failures = []
+    for key in ("total_studies", "concurrency"):
+        if current[key] != baseline[key]:
+            print(f"warning: {key} is {current[key]}, the baseline was taken with {baseline[key]}")
+    for name, result in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            continue
+        if result["errors"]:
+            failures.append(f"{name}: {result['errors']} errors")
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            failures.append(f"{name}: p95 {result['p95_ms']:.1f} ms, baseline {base['p95_ms']:.1f} ms")
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            failures.append(f"{name}: {result['rps']:.1f} req/s, baseline {base['rps']:.1f} req/s")
+        queries, base_queries = result["queries_per_request"], base["queries_per_request"]
+        # Statement counts are deterministic: any increase is a new query (or an N+1).
+        if queries is not None and base_queries is not None and queries > base_queries:
+            failures.append(f"{name}: {queries} statements per request, baseline {base_queries}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", default="demo")
+    parser.add_argument("--password", default="demo")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per scenario")
+    parser.add_argument("--deep-page", type=int, default=500, help="page of /studies for the deep-page scenario")
+    parser.add_argument("--scenario", action="append", help="run only these scenarios (repeatable)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="write this run's results to a JSON file")
+    parser.add_argument("--save-baseline", help="write this run as the baseline JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 growth / req/s drop (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    print_header()
+    current = asyncio.run(run(args))
+    for path in filter(None, (args.output, args.save_baseline)):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+        print(f"wrote {path}")
+    if args.compare:
+        failures = compare(current, json.loads(Path(args.compare).read_text(encoding="utf-8")), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+        print(f"no regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""Seed a reproducible dataset of 10k, 100k or 1M studies for benchmarks/route_suite.py.
+
+Rows are generated in Python from --seed (ids included), so the same scale
+always yields the same data and plans, and loaded with COPY on PostgreSQL
+(batched executemany elsewhere). Each patient has --studies-per-patient
+studies a few months apart, with one to three nodules tracked across them:
+followups, trajectory points, summaries, a series with one image and an
+ingestion event per study. Site overview stats are refreshed and the tables
+analyzed at the end. Replaces every clinical table's contents (users and
+audits included).
+
+    python benchmarks/seed_scale.py --studies 100k [--sites 20] [--seed 7]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import random
+import sys
+import time
+import uuid
+from collections.abc import Iterable, Sequence
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Connection
+
+from app.db.base import Base
+from app.db.partitions import PARTITIONED_TABLES, ensure_partitions, month_start
+from app.db.session import SessionLocal, engine
+from app.services.derivatives import derivative_path
+from app.services.followups import GROWTH_MONITOR_PERCENT, growth_percent, volume_doubling_time
+from app.services.site_stats import refresh_site_stats
+from scripts.seed_fake_data import diameter_from_volume, ensure_images, risk_from_metrics
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+# Children first, so DELETE (non-PostgreSQL) respects the foreign keys.
+TABLES = [
+    "access_audit_daily",
+    "access_audits",
+    "ingestion_logs",
+    "nodule_trajectory_points",
+    "qct_followups",
+    "qct_nodules",
+    "qct_summaries",
+    "images",
+    "series",
+    "studies",
+    "patients",
+    "site_overview_stats",
+    "sites",
+    "clients",
+    "users",
+]
+STATUSES = ["ready", "ready", "ready", "processing", "review"]
+LOCATIONS = ["RUL", "RML", "RLL", "LUL", "LLL"]
+TEXTURES = ["Solid", "Part-Solid", "Ground Glass"]
+RISK_ORDER = ["low", "medium", "high"]
+# Studies fall within this many days before today.
+SPAN_DAYS = 3 * 365
+
+
+def parse_scale(value: str) -> int:
+    return SCALES.get(value.lower()) or int(value.replace("_", ""))
+
+
+class Loader:
+    """Buffers rows per table and writes them in batches: COPY on PostgreSQL, executemany elsewhere.
+
+    When any table's buffer fills, every table is flushed, parents first, so
+    no row reaches the database before the rows it references.
+    """
+
+    def __init__(self, conn: Connection, batch: int) -> None:
+        self.conn = conn
+        self.batch = batch
+        self.postgres = conn.dialect.name == "postgresql"
+        self.pending: dict[str, list[tuple]] = {}
+        self.columns: dict[str, Sequence[str]] = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, table: str, columns: Sequence[str], row: tuple) -> None:
+        self.columns.setdefault(table, columns)
+        rows = self.pending.setdefault(table, [])
+        rows.append(row)
+        if len(rows) >= self.batch:
+            self.flush()
+
+    def flush(self) -> None:
+        for name in reversed(TABLES):
+            rows = self.pending.pop(name, None)
+            if rows:
+                self._write(name, self.columns[name], rows)
+                self.counts[name] = self.counts.get(name, 0) + len(rows)
+
+    def _write(self, table: str, columns: Sequence[str], rows: list[tuple]) -> None:
+        if not self.postgres:
+            self.conn.execute(insert(Base.metadata.tables[table]), [dict(zip(columns, row)) for row in rows])
+            return
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(rows)
+        buffer.seek(0)
+        cursor = self.conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+
+def generate(loader: Loader, studies: int, sites: int, per_patient: int, seed: int) -> None:
+    rng = random.Random(seed)
+
+    def new_id() -> uuid.UUID:
+        return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+    now = datetime.now(timezone.utc)
+    today = now.date()
+    image_path = ensure_images()[0]
+    thumbnail_path = derivative_path(image_path, "thumb")
+    preview_path = derivative_path(image_path, "preview")
+
+    client_id = new_id()
+    loader.add("clients", ("id", "name", "created_at", "updated_at"), (client_id, "Benchmark Client", now, now))
+    site_ids = [new_id() for _ in range(sites)]
+    for index, site_id in enumerate(site_ids):
+        loader.add(
+            "sites",
+            ("id", "client_id", "name", "location", "created_at", "updated_at"),
+            (site_id, client_id, f"Site {index + 1:03d}", f"City {index + 1:03d}", now, now),
+        )
+
+    written = 0
+    patient_index = 0
+    while written < studies:
+        patient_index += 1
+        count = min(per_patient, studies - written)
+        patient_id, site_id = new_id(), site_ids[patient_index % sites]
+        loader.add(
+            "patients",
+            ("id", "site_id", "patient_uid", "anon_label", "birth_year", "sex", "created_at", "updated_at"),
+            (
+                patient_id,
+                site_id,
+                f"P-{patient_index:07d}",
+                f"Anon-{patient_index:07d}",
+                rng.randint(1940, 1995),
+                rng.choice("FM"),
+                now,
+                now,
+            ),
+        )
+        tracks = [(new_id(), rng.choice(LOCATIONS), rng.uniform(50, 1500)) for _ in range(rng.randint(1, 3))]
+        previous: list[tuple[uuid.UUID, float]] = []
+        prior_study: tuple[uuid.UUID, date] | None = None
+        study_date = today - timedelta(days=rng.randint(count * 120, SPAN_DAYS))
+        for position in range(count):
+            written += 1
+            study_id = new_id()
+            study_uid = f"ST-{written:08d}"
+            nodules = []
+            for track, (track_id, location, volume) in enumerate(tracks):
+                volume *= rng.uniform(0.95, 1.45)
+                tracks[track] = (track_id, location, volume)
+                vdt_days = rng.randint(30, 600)
+                risk = risk_from_metrics(volume, vdt_days)
+                nodules.append((new_id(), track_id, location, round(volume, 2), vdt_days, risk))
+            overall_risk = max((nodule[5] for nodule in nodules), key=RISK_ORDER.index)
+            status = "review" if overall_risk == "high" else rng.choice(STATUSES)
+            loader.add(
+                "studies",
+                (
+                    "id", "patient_id", "site_id", "study_uid", "study_date", "status", "overall_risk",
+                    "nodule_count", "created_at", "updated_at",
+                ),
+                (study_id, patient_id, site_id, study_uid, study_date, status, overall_risk, len(nodules), now, now),
+            )
+            series_id = new_id()
+            loader.add(
+                "series",
+                ("id", "study_id", "series_uid", "description", "created_at", "updated_at"),
+                (series_id, study_id, f"SR-{study_uid}", "Chest CT", now, now),
+            )
+            loader.add(
+                "images",
+                (
+                    "id", "series_id", "image_uid", "file_path", "thumbnail_path", "preview_path",
+                    "created_at", "updated_at",
+                ),
+                (new_id(), series_id, f"IM-{study_uid}", image_path, thumbnail_path, preview_path, now, now),
+            )
+            volumes = [nodule[3] for nodule in nodules]
+            diameters = [round(diameter_from_volume(volume), 2) for volume in volumes]
+            loader.add(
+                "qct_summaries",
+                (
+                    "id", "study_id", "volume_total_mm3", "mean_diameter_mm", "vdt_days", "lung_rads",
+                    "algo_version", "overall_risk", "notes", "created_at", "updated_at",
+                ),
+                (
+                    new_id(),
+                    study_id,
+                    round(sum(volumes), 2),
+                    round(sum(diameters) / len(diameters), 2),
+                    round(sum(nodule[4] for nodule in nodules) / len(nodules)),
+                    {"low": "2", "medium": "3", "high": "4A"}[overall_risk],
+                    "qCT v2.1",
+                    overall_risk,
+                    None,
+                    now,
+                    now,
+                ),
+            )
+            for index, (nodule_id, track_id, location, volume, vdt_days, risk) in enumerate(nodules):
+                nodule_uid = f"ND-{study_uid}-{index + 1}"
+                loader.add(
+                    "qct_nodules",
+                    (
+                        "id", "study_id", "nodule_uid", "location", "volume_mm3", "diameter_mm", "vdt_days",
+                        "texture", "risk", "is_followup", "created_at", "updated_at",
+                    ),
+                    (
+                        nodule_id, study_id, nodule_uid, location, volume, diameters[index], vdt_days,
+                        rng.choice(TEXTURES), risk, position > 0, now, now,
+                    ),
+                )
+                growth = link_vdt = None
+                if prior_study is not None:
+                    prior_id, prior_volume = previous[index]
+                    growth = round(growth_percent(prior_volume, volume), 2)
+                    link_vdt = volume_doubling_time(prior_volume, volume, (study_date - prior_study[1]).days)
+                    loader.add(
+                        "qct_followups",
+                        (
+                            "id", "nodule_id", "prior_nodule_id", "prior_study_id", "current_study_id",
+                            "growth_percent", "vdt_days", "status", "created_at", "updated_at",
+                        ),
+                        (
+                            new_id(), nodule_id, prior_id, prior_study[0], study_id, growth, link_vdt,
+                            "monitor" if growth >= GROWTH_MONITOR_PERCENT else "stable", now, now,
+                        ),
+                    )
+                loader.add(
+                    "nodule_trajectory_points",
+                    (
+                        "id", "patient_id", "track_id", "nodule_id", "study_id", "position", "study_uid",
+                        "study_date", "nodule_uid", "location", "volume_mm3", "diameter_mm", "vdt_days",
+                        "growth_percent", "risk", "created_at", "updated_at",
+                    ),
+                    (
+                        new_id(), patient_id, track_id, nodule_id, study_id, position, study_uid, study_date,
+                        nodule_uid, location, volume, diameters[index], link_vdt, growth, risk, now, now,
+                    ),
+                )
+            started_at = datetime.combine(study_date, datetime.min.time(), timezone.utc) + timedelta(
+                minutes=rng.randint(0, 24 * 60)
+            )
+            loader.add(
+                "ingestion_logs",
+                ("id", "study_id", "status", "message", "started_at", "completed_at", "created_at", "updated_at"),
+                (
+                    new_id(), study_id, "processing" if status == "processing" else "completed",
+                    "Benchmark ingestion event.", started_at, started_at + timedelta(minutes=5), now, now,
+                ),
+            )
+            previous = [(nodule[0], nodule[3]) for nodule in nodules]
+            prior_study = (study_id, study_date)
+            study_date += timedelta(days=rng.randint(90, 120))
+
+
+def reset(conn: Connection) -> None:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"TRUNCATE {', '.join(TABLES)} CASCADE"))
+    else:
+        for table in TABLES:
+            conn.execute(text(f"DELETE FROM {table}"))
+
+
+def progress(counts: dict[str, int]) -> Iterable[str]:
+    return (f"{table}={counts[table]}" for table in reversed(TABLES) if table in counts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--studies", default="10k", help="10k, 100k, 1M or a number")
+    parser.add_argument("--sites", type=int, default=20)
+    parser.add_argument("--studies-per-patient", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--batch", type=int, default=50_000, help="rows per COPY/executemany batch")
+    args = parser.parse_args()
+    studies = parse_scale(args.studies)
+
+    start = time.monotonic()
+    with engine.begin() as conn:
+        reset(conn)
+        if conn.dialect.name == "postgresql":
+            first = month_start(date.today() - timedelta(days=SPAN_DAYS))
+            for table in PARTITIONED_TABLES:
+                ensure_partitions(conn, table, first, month_start(date.today()))
+        loader = Loader(conn, args.batch)
+        generate(loader, studies, args.sites, args.studies_per_patient, args.seed)
+        loader.flush()
+    print(f"loaded in {time.monotonic() - start:.1f}s: {', '.join(progress(loader.counts))}")
+
+    with SessionLocal() as db:
+        # The aggregates run before any write; a replica may not have the load yet.
+        db.use_primary()
+        refresh_site_stats(db)
+        db.commit()
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE"))
+    print(f"done in {time.monotonic() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Serialized bytes/sec for large study pages and bulk study-detail payloads.
+
+Compares FastAPI's default response path (model construction, response_model
+re-validation, jsonable_encoder, json.dumps) with app.api.responses.model_response
+(one validation, pydantic-core dump_json), then the cost of compressing the output.
+
+    python benchmarks/serialization.py [--rows 100] [--pages 50] [--details 200]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+import zlib
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.api.compression import brotli
+from app.api.responses import model_response
+from app.schemas.study import StudyDetail, StudyListItem
+
+
+def study_rows(count: int) -> list[dict[str, object]]:
+    start = date(2024, 1, 1)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "study_uid": f"ST-{index:08d}",
+            "patient_uid": f"Anon-{random.getrandbits(32):08x}",
+            "study_date": start + timedelta(days=index % 700),
+            "status": random.choice(["ready", "processing", "review"]),
+            "overall_risk": random.choice(["low", "medium", "high"]),
+            "nodule_count": random.randint(0, 6),
+        }
+        for index in range(count)
+    ]
+
+
+def study_detail(nodules: int) -> dict[str, object]:
+    return {
+        "id": uuid.uuid4(),
+        "study_uid": "ST-00000001",
+        "study_date": date(2024, 5, 1),
+        "status": "ready",
+        "overall_risk": "medium",
+        "patient_uid": "Anon-1234abcd",
+        "anon_label": "Anon-1234abcd",
+        "image_path": "objects/ab/cd/" + "0" * 64 + ".svg",
+        "thumbnail_path": "derived/ab/cd/" + "1" * 64 + ".svg",
+        "preview_path": "derived/ab/cd/" + "2" * 64 + ".svg",
+        "summary": {
+            "volume_total_mm3": 1234.5,
+            "mean_diameter_mm": 8.2,
+            "vdt_days": 320,
+            "overall_risk": "medium",
+            "notes": "Simulated summary",
+        },
+        "nodules": [
+            {
+                "id": uuid.uuid4(),
+                "nodule_uid": f"N-{index}",
+                "location": random.choice(["RUL", "RML", "RLL", "LUL", "LLL"]),
+                "volume_mm3": random.uniform(50, 2000),
+                "diameter_mm": random.uniform(3, 20),
+                "vdt_days": random.randint(60, 900),
+                "risk": random.choice(["low", "medium", "high"]),
+                "is_followup": bool(index % 2),
+            }
+            for index in range(nodules)
+        ],
+    }
+
+
+def default_path(response_type, content, build) -> bytes:
+    # What the routes did before: build models, let FastAPI re-validate and encode.
+    adapter = TypeAdapter(response_type)
+    value = adapter.validate_python(build(content), from_attributes=True)
+    return json.dumps(
+        jsonable_encoder(value), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_path(response_type, content, build) -> bytes:
+    return model_response(response_type, content).body
+
+
+def measure(fn, payloads) -> tuple[float, int]:
+    start = time.perf_counter()
+    total = sum(len(fn(payload)) for payload in payloads)
+    return time.perf_counter() - start, total
+
+
+def report(label: str, elapsed: float, total: int, ops: int) -> None:
+    print(f"{label:<34} {total / elapsed / 1e6:8.1f} MB/s {elapsed / ops * 1000:8.3f} ms/op")
+
+
+def gzip_compress(body: bytes) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def compressors():
+    yield "gzip level 6", gzip_compress
+    if brotli is not None:
+        yield "brotli quality 4", lambda body: brotli.compress(body, quality=4)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--details", type=int, default=200)
+    parser.add_argument("--nodules", type=int, default=30)
+    args = parser.parse_args()
+    random.seed(7)
+
+    pages = [study_rows(args.rows) for _ in range(args.pages)]
+    details = [study_detail(args.nodules) for _ in range(args.details)]
+    cases = [
+        (f"study page x{args.rows}", list[StudyListItem], pages, lambda rows: [StudyListItem(**row) for row in rows]),
+        (f"study detail ({args.nodules} nodules)", StudyDetail, details, lambda detail: detail),
+    ]
+    for name, response_type, payloads, build in cases:
+        print(f"\n{name}, {len(payloads)} payloads")
+        for label, path in (("default (validate x2 + json.dumps)", default_path), ("model_response (dump_json)", fast_path)):
+            elapsed, total = measure(lambda payload: path(response_type, payload, build), payloads)
+            report(label, elapsed, total, len(payloads))
+
+        bodies = [fast_path(response_type, payload, build) for payload in payloads]
+        raw_total = sum(map(len, bodies))
+        for label, compress in compressors():
+            start = time.perf_counter()
+            out = sum(len(compress(body)) for body in bodies)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<34} {raw_total / elapsed / 1e6:8.1f} MB/s in, ratio {out / raw_total:.2f}")
+
+if __name__ == "__main__":
+    main()
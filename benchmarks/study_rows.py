@@ -0,0 +1,91 @@
+"""Time a 100-row /studies/api page: ORM -> dict -> model -> re-validation vs column rows.
+
+The "legacy" path reproduces what the endpoint did before: load Study objects
+(lazy-loading each patient), copy them into dicts, build StudyListItem(**row),
+then let the response_model re-validate and jsonable_encoder + json.dumps render
+it. The "rows" path is the current one: one projected query, model_construct,
+dump_json without validation. Runs against DATABASE_URL (seed it first).
+
+    python benchmarks/study_rows.py [--per-page 100] [--iterations 50]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+
+from app.api.responses import model_response
+from app.db.models import Study
+from app.db.session import SessionLocal
+from app.schemas.study import StudyListItem
+from app.services.provider import MockProvider, _mask_patient_id
+
+
+def legacy_page(db, limit: int, offset: int) -> bytes:
+    studies = db.scalars(
+        select(Study).order_by(Study.study_date.desc()).limit(limit).offset(offset)
+    ).all()
+    rows = [
+        {
+            "id": study.id,
+            "study_uid": study.study_uid,
+            "patient_uid": _mask_patient_id(study.patient.patient_uid, study.patient.anon_label),
+            "study_date": study.study_date,
+            "status": study.status,
+            "overall_risk": study.overall_risk,
+            "nodule_count": study.nodule_count,
+        }
+        for study in studies
+    ]
+    items = [StudyListItem(**row) for row in rows]
+    value = TypeAdapter(list[StudyListItem]).validate_python(items, from_attributes=True)
+    return json.dumps(
+        jsonable_encoder(value), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def rows_page(db, limit: int, offset: int) -> bytes:
+    items = MockProvider().list_studies(db, limit=limit, offset=offset)
+    return model_response(list[StudyListItem], items, validate=False).body
+
+
+def run(label: str, page, per_page: int, iterations: int) -> None:
+    elapsed = 0.0
+    rows = 0
+    for _ in range(iterations):
+        # A fresh session per request, as get_db does, so the identity map starts empty.
+        with SessionLocal() as db:
+            start = time.perf_counter()
+            body = page(db, per_page, 0)
+            elapsed += time.perf_counter() - start
+        rows += body.count(b'"study_uid"')
+    print(f"{label:<8} {elapsed / iterations * 1000:8.2f} ms/page {rows / elapsed:10.0f} rows/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        total = db.scalar(select(func.count(Study.id))) or 0
+        if not total:
+            raise SystemExit("No studies; run scripts/seed_fake_data.py first.")
+        if json.loads(legacy_page(db, args.per_page, 0)) != json.loads(rows_page(db, args.per_page, 0)):
+            raise SystemExit("legacy and rows payloads differ")
+    print(f"{total} studies, {args.per_page} rows/page, {args.iterations} pages")
+    run("legacy", legacy_page, args.per_page, args.iterations)
+    run("rows", rows_page, args.per_page, args.iterations)
+
+if __name__ == "__main__":
+    main()
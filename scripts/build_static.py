@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import shutil
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from app.api.staticfiles import MANIFEST_NAME
+from app.core.config import settings
+from app.services.image_store import write_atomic
+
+SOURCE_DIR = ROOT / "app" / "static"
+COMPRESSIBLE_SUFFIXES = {".css", ".js", ".svg", ".json", ".map", ".txt", ".html"}
+
+
+def hashed_name(path: Path, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    return f"{path.stem}.{digest}{path.suffix}"
+
+
+def write_variants(target: Path, data: bytes) -> list[str]:
+    """Write ``target`` plus .gz/.br siblings when they are actually smaller."""
+    written = []
+    write_atomic(target, data)
+    if target.suffix not in COMPRESSIBLE_SUFFIXES:
+        return written
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        write_atomic(target.with_name(target.name + ".gz"), gz)
+        written.append("gz")
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            write_atomic(target.with_name(target.name + ".br"), br)
+            written.append("br")
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Copy app/static to content-hashed names with precompressed variants and a manifest."
+    )
+    parser.add_argument("--out", default=settings.static_dist_dir, help="output directory")
+    parser.add_argument("--clean", action="store_true", help="remove the output directory first")
+    args = parser.parse_args()
+
+    out_dir = Path(args.out)
+    if not out_dir.is_absolute():
+        out_dir = ROOT / out_dir
+    if args.clean and out_dir.exists():
+        shutil.rmtree(out_dir)
+
+    manifest: dict[str, str] = {}
+    for source in sorted(SOURCE_DIR.rglob("*")):
+        if not source.is_file():
+            continue
+        relpath = source.relative_to(SOURCE_DIR)
+        data = source.read_bytes()
+        hashed = relpath.with_name(hashed_name(relpath, data))
+        variants = write_variants(out_dir / hashed, data)
+        manifest[relpath.as_posix()] = hashed.as_posix()
+        print(f"{relpath.as_posix()} -> {hashed.as_posix()} {' '.join(variants)}".rstrip())
+
+    # Previous builds' files stay in place so pages cached with old URLs keep working.
+    write_atomic(out_dir / MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    if brotli is None:
+        print("brotli not installed; only gzip variants were written")
+
+
+if __name__ == "__main__":
+    main()
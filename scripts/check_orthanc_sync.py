@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import func, select
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.db.models import IngestionLog, Site, SiteOverviewStats, Study
+from app.db.session import SessionLocal
+from app.services.orthanc import OrthancClient
+from app.services.orthanc_sync import follow_changes, read_checkpoint
+from app.services.site_stats import SITE_STAT_FIELDS, compute_site_stats
+
+# StudyInstanceUID prefix of every fake_orthanc.py study.
+FAKE_UID_PREFIX = "1.2.826.0.1.3680043.10.1."
+MOVED_INSTITUTION = "Relocated Imaging"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_orthanc(port: int, studies: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, str(ROOT / "scripts" / "fake_orthanc.py"), "--port", str(port), "--studies", str(studies)]
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/system", timeout=1).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("fake_orthanc.py did not start")
+
+
+class Checker:
+    def __init__(self) -> None:
+        self.failures: list[str] = []
+
+    def expect(self, condition: bool, message: str) -> None:
+        print(f"{'ok  ' if condition else 'FAIL'} {message}")
+        if not condition:
+            self.failures.append(message)
+
+    def mirror_state(self, fake: httpx.Client) -> None:
+        """Compare the mirror with the fake archive after the worker caught up."""
+        last = fake.get("/changes", params={"last": ""}).json()["Last"]
+        self.expect(read_checkpoint() == last, f"checkpoint at the archive's last change ({last})")
+        with SessionLocal() as db:
+            db.use_primary()
+            rollup = {
+                row.site_id: {field: getattr(row, field) for field in SITE_STAT_FIELDS}
+                for row in db.scalars(select(SiteOverviewStats))
+            }
+            live = {
+                site_id: {field: values[field] for field in SITE_STAT_FIELDS}
+                for site_id, values in compute_site_stats(db).items()
+            }
+        stale = sorted(str(site_id) for site_id in live if rollup.get(site_id) != live[site_id])
+        self.expect(not stale, f"site_overview_stats matches live counts (stale: {stale or 'none'})")
+
+
+def mirrored_count() -> int:
+    with SessionLocal() as db:
+        db.use_primary()
+        return db.scalar(select(func.count(Study.id)).where(Study.study_uid.startswith(FAKE_UID_PREFIX)))
+
+
+async def follow(base_url: str, previews: bool) -> None:
+    async with OrthancClient(base_url) as client:
+        await follow_changes(client, asyncio.Event(), previews=previews, until_caught_up=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Run the Orthanc change-feed worker against scripts/fake_orthanc.py on a scratch database: "
+            "bootstrap, new and deleted studies with transient 503s, then a study re-tagged to another "
+            "institution, checking the mirror, ingestion events, site stats and checkpoint after each step."
+        )
+    )
+    parser.add_argument("--yes", action="store_true", help="confirm DATABASE_URL is a scratch database")
+    parser.add_argument("--studies", type=int, default=30, help="studies in the fake archive")
+    parser.add_argument("--previews", action="store_true", help="also download previews into IMAGE_DIR")
+    args = parser.parse_args()
+    if not args.yes:
+        raise SystemExit("writes an Orthanc mirror into DATABASE_URL; re-run with --yes on a scratch database")
+    if read_checkpoint() is not None:
+        raise SystemExit("orthanc_sync_state already has a checkpoint; use a database without an Orthanc mirror")
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    process = start_fake_orthanc(port, args.studies)
+    checker = Checker()
+    try:
+        with httpx.Client(base_url=base_url) as fake:
+            print("bootstrap")
+            asyncio.run(follow(base_url, args.previews))
+            checker.expect(mirrored_count() == args.studies, f"{args.studies} studies mirrored")
+            checker.mirror_state(fake)
+
+            print("changes: 3 new studies, 1 deleted, 2 failed requests")
+            ids = fake.post("/tools/find", json={"Level": "Study", "Query": {}}).json()
+            fake.post("/fake/studies", params={"count": 3}).raise_for_status()
+            fake.delete(f"/fake/studies/{ids[0]}").raise_for_status()
+            fake.post("/fake/fail", params={"count": 2}).raise_for_status()
+            asyncio.run(follow(base_url, args.previews))
+            # Deletions are not mirrored.
+            checker.expect(mirrored_count() == args.studies + 3, f"{args.studies + 3} studies mirrored")
+            checker.mirror_state(fake)
+
+            # Alone in its page, so no other study of the old site triggers its refresh.
+            print("changes: 1 study re-tagged to another institution")
+            moved = ids[1]
+            moved_uid = fake.get(f"/studies/{moved}").json()["MainDicomTags"]["StudyInstanceUID"]
+            fake.post(f"/fake/studies/{moved}/tags", json={"InstitutionName": MOVED_INSTITUTION}).raise_for_status()
+            asyncio.run(follow(base_url, args.previews))
+            with SessionLocal() as db:
+                db.use_primary()
+                site, events = db.execute(
+                    select(Site.name, func.count(IngestionLog.id))
+                    .join(Study, Study.site_id == Site.id)
+                    .outerjoin(IngestionLog, IngestionLog.study_id == Study.id)
+                    .where(Study.study_uid == moved_uid)
+                    .group_by(Site.name)
+                ).one()
+            checker.expect(site == MOVED_INSTITUTION, f"re-tagged study moved to {MOVED_INSTITUTION!r} ({site!r})")
+            checker.expect(events >= 1, f"re-tagged study has an ingestion event ({events})")
+            checker.mirror_state(fake)
+    finally:
+        process.terminate()
+        process.wait()
+
+    if checker.failures:
+        sys.exit(1)
+    print("orthanc sync ok")
+
+
+if __name__ == "__main__":
+    main()
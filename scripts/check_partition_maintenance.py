@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import insert, select, text
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.core.config import settings
+from app.db.models import AccessAudit, IngestionLog, Study, User
+from app.db.partitions import (
+    PARTITIONED_TABLES,
+    add_months,
+    ensure_partitions,
+    list_detached,
+    list_partitions,
+    month_start,
+)
+from app.db.session import engine
+
+RETENTION = {
+    "ingestion_logs": settings.ingestion_log_retention_months,
+    "access_audits": settings.access_audit_retention_months,
+}
+ROWS_PER_TABLE = 5
+
+
+def run_maintenance(archive_dir: Path, *flags: str) -> None:
+    env = {**os.environ, "ARCHIVE_DIR": str(archive_dir)}
+    subprocess.run(
+        [sys.executable, str(ROOT / "scripts" / "partition_maintenance.py"), *flags], env=env, check=True
+    )
+
+
+def insert_expired_rows() -> None:
+    """Put ROWS_PER_TABLE rows in a month past retention of each table, so there is something to archive."""
+    this_month = month_start(datetime.now(timezone.utc).date())
+    with engine.begin() as conn:
+        study_id = conn.scalar(select(Study.id).limit(1))
+        user_id = conn.scalar(select(User.id).limit(1))
+        if study_id is None or user_id is None:
+            raise SystemExit("needs a seeded database (python scripts/seed_fake_data.py)")
+        for table, retention in RETENTION.items():
+            month = add_months(this_month, -retention - 1)
+            ensure_partitions(conn, table, month, month)
+            moment = datetime(month.year, month.month, 2, tzinfo=timezone.utc)
+            times = [moment + timedelta(hours=index) for index in range(ROWS_PER_TABLE)]
+            if table == "ingestion_logs":
+                rows = [
+                    {"id": uuid.uuid4(), "study_id": study_id, "status": "ok", "message": "expired", "started_at": at}
+                    for at in times
+                ]
+                conn.execute(insert(IngestionLog.__table__), rows)
+            else:
+                rows = [
+                    {
+                        "id": uuid.uuid4(),
+                        "user_id": user_id,
+                        "study_id": study_id,
+                        "action": "view",
+                        "ip_address": "127.0.0.1",
+                        "accessed_at": at,
+                    }
+                    for at in times
+                ]
+                conn.execute(insert(AccessAudit.__table__), rows)
+
+
+def expired_partitions() -> dict[str, dict[str, int]]:
+    """Rows of every attached partition past retention, by table and partition name."""
+    this_month = month_start(datetime.now(timezone.utc).date())
+    expired: dict[str, dict[str, int]] = {}
+    with engine.connect() as conn:
+        for table in PARTITIONED_TABLES:
+            cutoff = add_months(this_month, -RETENTION[table])
+            expired[table] = {
+                name: conn.scalar(text(f'SELECT count(*) FROM "{name}"'))
+                for month, name in list_partitions(conn, table).items()
+                if month < cutoff
+            }
+    return expired
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Exercise scripts/partition_maintenance.py end to end on a scratch PostgreSQL database: "
+            "adds rows to months past retention, runs --keep-detached and then a full run, and checks "
+            "that expired partitions are detached, archived with every row and dropped. "
+            "Archives and drops data older than retention: never point it at a real database."
+        )
+    )
+    parser.add_argument("--yes", action="store_true", help="confirm DATABASE_URL is a scratch database")
+    args = parser.parse_args()
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Partition maintenance requires PostgreSQL.")
+    if not args.yes:
+        raise SystemExit(f"{engine.url.render_as_string()} would lose old partitions; re-run with --yes")
+
+    insert_expired_rows()
+    expected = expired_partitions()
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        archive_dir = Path(directory)
+
+        run_maintenance(archive_dir, "--keep-detached")
+        with engine.connect() as conn:
+            for table, partitions in expected.items():
+                attached, detached = list_partitions(conn, table).values(), list_detached(conn, table).values()
+                for name in partitions:
+                    if name in attached or name not in detached:
+                        failures.append(f"{name}: still attached after --keep-detached")
+
+        run_maintenance(archive_dir)
+        with engine.connect() as conn:
+            for table, partitions in expected.items():
+                remaining = set(list_partitions(conn, table).values()) | set(list_detached(conn, table).values())
+                for name, rows in partitions.items():
+                    path = archive_dir / table / f"{name}.csv.gz"
+                    if name in remaining:
+                        failures.append(f"{name}: not dropped")
+                    if not path.is_file():
+                        failures.append(f"{name}: no archive at {path}")
+                        continue
+                    with gzip.open(path, "rt", newline="") as archive:
+                        archived = sum(1 for _ in csv.reader(archive)) - 1
+                    if archived != rows:
+                        failures.append(f"{name}: archived {archived} rows, had {rows}")
+                    print(f"{table}: {name} archived with {archived} rows and dropped")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("partition maintenance ok")
+
+
+if __name__ == "__main__":
+    main()
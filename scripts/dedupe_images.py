@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from sqlalchemy import select, update
+
+from app.db.models import Image
+from app.db.session import SessionLocal
+from app.services.derivatives import derivative_path, stored_derivative
+from app.services.image_store import content_digest, image_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Move legacy image files into the content-addressed store and repoint Image rows, then render "
+            "the thumbnails and previews that rows lack or the derivative cache evicted."
+        )
+    )
+    parser.add_argument("--delete-originals", action="store_true", help="remove legacy files once migrated")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        db.use_primary()
+        legacy_paths = [
+            path
+            for path in db.scalars(select(Image.file_path).distinct())
+            if content_digest(path) is None
+        ]
+        migrated = missing = 0
+        unique: set[str] = set()
+        for legacy_path in legacy_paths:
+            source = image_store.path(legacy_path)
+            if not source.is_file():
+                missing += 1
+                continue
+            stored_path = image_store.put_file(source)
+            unique.add(stored_path)
+            db.execute(
+                update(Image)
+                .where(Image.file_path == legacy_path)
+                .values(
+                    file_path=stored_path,
+                    thumbnail_path=derivative_path(stored_path, "thumb"),
+                    preview_path=derivative_path(stored_path, "preview"),
+                )
+            )
+            migrated += 1
+        rendered = 0
+        derived = db.execute(select(Image.file_path, Image.thumbnail_path, Image.preview_path).distinct()).all()
+        for file_path, thumbnail_path, preview_path in derived:
+            if stored_derivative(thumbnail_path) and stored_derivative(preview_path):
+                continue
+            db.execute(
+                update(Image)
+                .where(Image.file_path == file_path)
+                .values(
+                    thumbnail_path=derivative_path(file_path, "thumb"),
+                    preview_path=derivative_path(file_path, "preview"),
+                )
+            )
+            rendered += 1
+        db.commit()
+        if args.delete_originals:
+            for legacy_path in legacy_paths:
+                image_store.path(legacy_path).unlink(missing_ok=True)
+        print(f"migrated={migrated} unique={len(unique)} missing={missing} rendered={rendered}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Minimal stand-in for the Orthanc REST API, for local development and tests.
+
+Serves deterministic synthetic studies through the endpoints the dashboard
+uses: /system, /changes, /tools/find (Study level, Expand/Since/Limit),
+/studies/{id}, /studies/{id}/series, /series/{id} and /instances/{id}/preview.
+/fake/stats reports request counts, peak concurrency and the number of client
+connections seen; POST /fake/studies?count=N, POST /fake/studies/{id}/tags (a JSON
+object of DICOM tags to overwrite) and DELETE /fake/studies/{id} feed the change
+log, and POST /fake/fail?count=N answers the next N requests with 503.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import fnmatch
+import hashlib
+import random
+import struct
+import zlib
+from datetime import date, timedelta
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, Response
+
+INSTITUTIONS = ["Metro Imaging", "Harbor Diagnostics", "Valley Radiology"]
+SERIES_DESCRIPTIONS = ["Chest CT", "Chest CT Lung", "Scout"]
+
+
+def orthanc_id(*parts: str) -> str:
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+    return "-".join(digest[i : i + 8] for i in range(0, 40, 8))
+
+
+def png(width: int, height: int, seed: int) -> bytes:
+    rows = b"".join(
+        b"\x00" + bytes((x * 255 // width + seed) % 256 for x in range(width)) for _ in range(height)
+    )
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+class FakeArchive:
+    def __init__(self, studies: int, series: int, instances: int, seed: int) -> None:
+        self.rng = random.Random(seed)
+        self.series_per_study = series
+        self.instances_per_series = instances
+        self.studies: dict[str, dict] = {}
+        self.series: dict[str, dict] = {}
+        self.instances: dict[str, int] = {}
+        self.changes: list[dict] = []
+        for _ in range(studies):
+            self.add_study()
+
+    def _change(self, change_type: str, level: str, resource_id: str) -> None:
+        self.changes.append(
+            {
+                "ChangeType": change_type,
+                "ResourceType": level,
+                "ID": resource_id,
+                "Path": f"/{level.lower()}s/{resource_id}",
+                "Seq": len(self.changes) + 1,
+                "Date": f"{date.today():%Y%m%d}T120000",
+            }
+        )
+
+    def add_study(self) -> str:
+        index = len(self.studies)
+        rng = self.rng
+        patient_id = f"OP-{index // 3:05d}"
+        study_uid = f"1.2.826.0.1.3680043.10.1.{index}"
+        study_id = orthanc_id("study", study_uid)
+        self._change("NewStudy", "Study", study_id)
+        series_ids = []
+        for s_index in range(self.series_per_study):
+            series_uid = f"{study_uid}.{s_index + 1}"
+            series_id = orthanc_id("series", series_uid)
+            instance_ids = [orthanc_id("instance", series_uid, str(i)) for i in range(self.instances_per_series)]
+            for instance in instance_ids:
+                self.instances[instance] = rng.randrange(256)
+            self.series[series_id] = {
+                "ID": series_id,
+                "Type": "Series",
+                "ParentStudy": study_id,
+                "MainDicomTags": {
+                    "SeriesInstanceUID": series_uid,
+                    "SeriesDescription": SERIES_DESCRIPTIONS[s_index % len(SERIES_DESCRIPTIONS)],
+                    "Modality": "CT",
+                },
+                "Instances": instance_ids,
+            }
+            series_ids.append(series_id)
+            self._change("NewSeries", "Series", series_id)
+        study_date = date.today() - timedelta(days=rng.randrange(365))
+        self.studies[study_id] = {
+            "ID": study_id,
+            "Type": "Study",
+            "IsStable": True,
+            "LastUpdate": f"{study_date:%Y%m%d}T120000",
+            "ParentPatient": orthanc_id("patient", patient_id),
+            "MainDicomTags": {
+                "StudyInstanceUID": study_uid,
+                "StudyDate": f"{study_date:%Y%m%d}",
+                "StudyDescription": "CT TORAX",
+                "InstitutionName": INSTITUTIONS[index % len(INSTITUTIONS)],
+                "AccessionNumber": f"ACC{index:06d}",
+            },
+            "PatientMainDicomTags": {
+                "PatientID": patient_id,
+                "PatientName": f"FAKE^PATIENT{index // 3}",
+                "PatientBirthDate": f"{1940 + rng.randrange(50)}0101",
+                "PatientSex": rng.choice(["F", "M"]),
+            },
+            "Series": series_ids,
+        }
+        self._change("StableStudy", "Study", study_id)
+        return study_id
+
+    def update_study(self, study_id: str, tags: dict[str, str]) -> None:
+        """Overwrite study or patient tags, as new instances with other values would."""
+        study = self.studies[study_id]
+        for tag, value in tags.items():
+            group = "PatientMainDicomTags" if tag in study["PatientMainDicomTags"] else "MainDicomTags"
+            study[group][tag] = value
+        self._change("StableStudy", "Study", study_id)
+
+    def delete_study(self, study_id: str) -> None:
+        study = self.studies.pop(study_id)
+        for series_id in study["Series"]:
+            for instance in self.series.pop(series_id)["Instances"]:
+                self.instances.pop(instance, None)
+        self._change("Deleted", "Study", study_id)
+
+    def find(self, query: dict[str, str]) -> list[dict]:
+        return [study for study in self.studies.values() if self._matches(study, query)]
+
+    @staticmethod
+    def _matches(study: dict, query: dict[str, str]) -> bool:
+        tags = {**study["MainDicomTags"], **study["PatientMainDicomTags"]}
+        for tag, expected in query.items():
+            value = tags.get(tag, "")
+            if tag == "StudyDate" and "-" in expected:
+                lower, upper = expected.split("-", 1)
+                if (lower and value < lower) or (upper and value > upper):
+                    return False
+            elif not fnmatch.fnmatchcase(value, expected):
+                return False
+        return True
+
+
+def build_app(archive: FakeArchive, latency: float, username: str, password: str) -> FastAPI:
+    app = FastAPI(title="fake-orthanc")
+    stats = {"requests": 0, "in_flight": 0, "peak_in_flight": 0, "connections": set()}
+    # Requests still to answer with 503 (set through /fake/fail) to exercise client retries.
+    failures = {"remaining": 0}
+    expected_auth = (
+        "Basic " + base64.b64encode(f"{username}:{password}".encode("utf-8")).decode("ascii") if username else None
+    )
+
+    @app.middleware("http")
+    async def track(request: Request, call_next):
+        control = request.url.path.startswith("/fake/")
+        if expected_auth and request.headers.get("authorization") != expected_auth and not control:
+            return Response(status_code=401, headers={"WWW-Authenticate": 'Basic realm="Orthanc"'})
+        if failures["remaining"] and not control:
+            failures["remaining"] -= 1
+            return Response(status_code=503)
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+        if request.client:
+            stats["connections"].add((request.client.host, request.client.port))
+        try:
+            if latency:
+                await asyncio.sleep(latency)
+            return await call_next(request)
+        finally:
+            stats["in_flight"] -= 1
+
+    @app.get("/fake/stats")
+    def fake_stats():
+        return {**stats, "connections": len(stats["connections"])}
+
+    @app.post("/fake/studies")
+    def fake_add_studies(count: int = 1):
+        return {"added": [archive.add_study() for _ in range(count)], "last": len(archive.changes)}
+
+    @app.post("/fake/studies/{study_id}/tags")
+    async def fake_update_study(study_id: str, request: Request):
+        if study_id not in archive.studies:
+            raise HTTPException(status_code=404)
+        archive.update_study(study_id, await request.json())
+        return {"last": len(archive.changes)}
+
+    @app.delete("/fake/studies/{study_id}")
+    def fake_delete_study(study_id: str):
+        if study_id not in archive.studies:
+            raise HTTPException(status_code=404)
+        archive.delete_study(study_id)
+        return {"last": len(archive.changes)}
+
+    @app.post("/fake/fail")
+    def fake_fail(count: int = 1):
+        failures["remaining"] = count
+        return failures
+
+    @app.get("/changes")
+    def changes(since: int = 0, limit: int = 100, last: str | None = None):
+        if last is not None:
+            return {"Changes": archive.changes[-1:], "Done": True, "Last": len(archive.changes)}
+        page = archive.changes[since : since + limit]
+        return {
+            "Changes": page,
+            "Done": since + len(page) >= len(archive.changes),
+            "Last": page[-1]["Seq"] if page else len(archive.changes),
+        }
+
+    @app.get("/series/{series_id}")
+    def series(series_id: str):
+        if series_id not in archive.series:
+            raise HTTPException(status_code=404)
+        return archive.series[series_id]
+
+    @app.get("/system")
+    def system():
+        return {"Name": "fake-orthanc", "Version": "1.12.4", "ApiVersion": 24, "DatabaseVersion": 6}
+
+    @app.post("/tools/find")
+    async def tools_find(request: Request):
+        body = await request.json()
+        if body.get("Level") != "Study":
+            raise HTTPException(status_code=400, detail="Only Level=Study is supported")
+        matches = archive.find(body.get("Query") or {})
+        since = int(body.get("Since", 0))
+        limit = int(body.get("Limit", 0)) or len(matches)
+        page = matches[since : since + limit]
+        return page if body.get("Expand") else [study["ID"] for study in page]
+
+    @app.get("/studies/{study_id}")
+    def study(study_id: str):
+        if study_id not in archive.studies:
+            raise HTTPException(status_code=404)
+        return archive.studies[study_id]
+
+    @app.get("/studies/{study_id}/series")
+    def study_series(study_id: str):
+        if study_id not in archive.studies:
+            raise HTTPException(status_code=404)
+        return [archive.series[series_id] for series_id in archive.studies[study_id]["Series"]]
+
+    @app.get("/instances/{instance_id}/preview")
+    def instance_preview(instance_id: str):
+        if instance_id not in archive.instances:
+            raise HTTPException(status_code=404)
+        return Response(png(64, 64, archive.instances[instance_id]), media_type="image/png")
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a fake Orthanc REST API with synthetic studies.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8042)
+    parser.add_argument("--studies", type=int, default=300)
+    parser.add_argument("--series", type=int, default=2, help="series per study")
+    parser.add_argument("--instances", type=int, default=3, help="instances per series")
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay added to every request")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--username", default="", help="require HTTP Basic auth with this user")
+    parser.add_argument("--password", default="")
+    args = parser.parse_args()
+    archive = FakeArchive(args.studies, args.series, args.instances, args.seed)
+    app = build_app(archive, args.latency_ms / 1000, args.username, args.password)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.core.config import settings
+from app.services.provider import OrthancProvider
+
+
+async def run(previews: bool, once: bool) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await OrthancProvider().follow_changes(stop, previews=previews, until_caught_up=once)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Follow Orthanc's /changes feed into the local mirror. The first run copies the "
+            "whole archive; later runs resume from the checkpoint in orthanc_sync_state."
+        )
+    )
+    parser.add_argument("--once", action="store_true", help="exit once the feed is caught up")
+    parser.add_argument("--no-previews", action="store_true", help="skip downloading instance previews")
+    args = parser.parse_args()
+    logging.basicConfig(level=settings.log_level, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    # One line per HTTP request otherwise.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(previews=not args.no_previews, once=args.once))
+
+
+if __name__ == "__main__":
+    main()
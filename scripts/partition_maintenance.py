@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.core.config import settings
+from app.db.partitions import (
+    PARTITIONED_TABLES,
+    add_months,
+    archive_table,
+    count_default_rows,
+    detach_partition,
+    drop_table,
+    ensure_partitions,
+    list_detached,
+    list_partitions,
+    month_start,
+)
+from app.db.session import engine
+
+logger = logging.getLogger("partition_maintenance")
+
+RETENTION_MONTHS = {
+    "ingestion_logs": lambda: settings.ingestion_log_retention_months,
+    "access_audits": lambda: settings.access_audit_retention_months,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Create upcoming monthly partitions of ingestion_logs/access_audits and move "
+            "partitions past retention to gzip CSV files under ARCHIVE_DIR."
+        )
+    )
+    parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    parser.add_argument(
+        "--keep-detached",
+        action="store_true",
+        help="detach expired partitions but leave them as plain tables (no archive, no drop)",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Partition maintenance requires PostgreSQL.")
+
+    this_month = month_start(datetime.utcnow().date())
+    archive_root = Path(settings.archive_dir)
+    # Every step runs in its own engine.begin() block: a read on a shared
+    # connection would autobegin and make the next explicit begin() fail.
+    for table in PARTITIONED_TABLES:
+        if args.dry_run:
+            with engine.connect() as conn:
+                existing = list_partitions(conn, table)
+            missing = [
+                add_months(this_month, offset)
+                for offset in range(settings.partition_premake_months + 1)
+                if add_months(this_month, offset) not in existing
+            ]
+            logger.info("%s: would create %s", table, [f"{month:%Y-%m}" for month in missing])
+        else:
+            with engine.begin() as conn:
+                created = ensure_partitions(
+                    conn, table, this_month, add_months(this_month, settings.partition_premake_months)
+                )
+            logger.info("%s: created %s", table, created or "nothing")
+
+        with engine.connect() as conn:
+            stray = count_default_rows(conn, table)
+            partitions = list_partitions(conn, table)
+        if stray:
+            logger.warning("%s: %s rows in the default partition (outside every month range)", table, stray)
+
+        retention = RETENTION_MONTHS[table]()
+        if retention <= 0:
+            continue
+        cutoff = add_months(this_month, -retention)
+        expired = {month: name for month, name in partitions.items() if month < cutoff}
+        for month, name in expired.items():
+            if args.dry_run:
+                logger.info("%s: would detach %s", table, name)
+                continue
+            with engine.begin() as conn:
+                detach_partition(conn, table, name)
+            logger.info("%s: detached %s", table, name)
+        if args.keep_detached or args.dry_run:
+            continue
+
+        # Includes tables left detached by an earlier run (--keep-detached or a failed archive).
+        with engine.connect() as conn:
+            detached = list_detached(conn, table)
+        for month, name in detached.items():
+            if month >= cutoff:
+                continue
+            path = archive_root / table / f"{name}.csv.gz"
+            with engine.begin() as conn:
+                size = archive_table(conn, name, path)
+                drop_table(conn, name)
+            logger.info("%s: archived %s to %s (%s bytes) and dropped it", table, name, path, size)
+
+if __name__ == "__main__":
+    main()
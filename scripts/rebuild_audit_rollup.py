@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import func, select
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.db.models import AccessAudit
+from app.db.session import SessionLocal
+from app.services.audit import rebuild_access_rollup, utc_day
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Recount access_audit_daily from access_audits. Defaults to the days still "
+            "held in attached partitions, so counts of archived months are kept."
+        )
+    )
+    parser.add_argument("--date-from", type=date.fromisoformat, help="first UTC day (YYYY-MM-DD)")
+    parser.add_argument("--date-to", type=date.fromisoformat, help="last UTC day (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        db.use_primary()
+        date_from = args.date_from
+        if date_from is None:
+            oldest = db.scalar(select(func.min(AccessAudit.accessed_at)))
+            if oldest is None:
+                print("No access_audits rows; nothing to rebuild.")
+                return
+            date_from = utc_day(oldest)
+        written = rebuild_access_rollup(db, date_from, args.date_to)
+        db.commit()
+        print(f"Rebuilt access_audit_daily from {date_from}: {written} rows.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
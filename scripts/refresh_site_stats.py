@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.db.session import SessionLocal
+from app.services.scope import TenantScope
+from app.services.site_stats import refresh_site_stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Recompute site_overview_stats after studies, patients or nodules were changed outside "
+            "the app's writers (e.g. qCT results loaded with SQL). Defaults to every site."
+        )
+    )
+    parser.add_argument("--site-id", type=uuid.UUID, action="append", help="only this site (repeatable)")
+    parser.add_argument("--client-id", type=uuid.UUID, help="only the sites of this client")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        db.use_primary()
+        written = refresh_site_stats(db, TenantScope(client_id=args.client_id), args.site_id)
+        db.commit()
+        print(f"Refreshed site_overview_stats for {written} sites.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
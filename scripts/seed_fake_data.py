@@ -4,32 +4,38 @@ import base64
 import random
 import sys
 import uuid
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 from pathlib import Path
 
-from sqlalchemy import select
-
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
 
 from app.core.config import settings
 from app.db.models import (
     AccessAudit,
+    AccessAuditDaily,
     Client,
     Image,
     IngestionLog,
+    NoduleTrajectoryPoint,
     Patient,
     QCTFollowup,
     QCTNodule,
     QCTSummary,
     Series,
     Site,
+    SiteOverviewStats,
     Study,
     User,
 )
 from app.db.session import SessionLocal
-
-IMAGE_DIR = Path("images/mock_ct")
+from app.services.audit import record_access
+from app.services.derivatives import derivative_path
+from app.services.followups import NoduleSnapshot, StudySnapshot, build_followups
+from app.services.image_store import image_store
+from app.services.site_stats import refresh_site_stats
+from app.services.trajectories import rebuild_trajectories
 
 SVG_BYTES = (
     '<?xml version="1.0" encoding="UTF-8"?>\n'
@@ -93,19 +99,16 @@ def risk_from_metrics(volume_mm3: float, vdt_days: int) -> str:
 
 
 def ensure_images() -> list[str]:
-    IMAGE_DIR.mkdir(parents=True, exist_ok=True)
-    paths = []
-    for idx in range(1, 6):
-        path = IMAGE_DIR / f"ct_placeholder_{idx}.svg"
-        path.write_bytes(SVG_BYTES)
-        paths.append(f"mock_ct/{path.name}")
-    return paths
+    # The placeholder is identical for every study, so the store keeps one copy.
+    return [image_store.put(SVG_BYTES, ".svg")]
 
 
 def reset_data(db):
     for model in [
+        AccessAuditDaily,
         AccessAudit,
         IngestionLog,
+        NoduleTrajectoryPoint,
         QCTFollowup,
         QCTNodule,
         QCTSummary,
@@ -113,6 +116,7 @@ def reset_data(db):
         Series,
         Study,
         Patient,
+        SiteOverviewStats,
         Site,
         Client,
         User,
@@ -124,8 +128,12 @@ def reset_data(db):
 def main() -> None:
     random.seed(42)
     image_paths = ensure_images()
+    # Render derivatives at ingest so detail views never pay for the first render.
+    derived = {path: (derivative_path(path, "thumb"), derivative_path(path, "preview")) for path in image_paths}
     db = SessionLocal()
     try:
+        # Every read here (site stats, trajectories) must see this run's own writes.
+        db.use_primary()
         reset_data(db)
 
         user = User(username=settings.auth_fake_user, display_name="Demo Viewer", role="viewer")
@@ -158,9 +166,11 @@ def main() -> None:
         db.flush()
 
         studies = []
+        studies_by_patient: dict[uuid.UUID, list[StudySnapshot]] = defaultdict(list)
         for patient in patients:
             study_count = random.randint(2, 3)
             base_date = date.today() - timedelta(days=random.randint(40, 220))
+            prior_nodules: list[QCTNodule] = []
             for s_idx in range(study_count):
                 study_date = base_date + timedelta(days=s_idx * random.randint(60, 120))
                 status = random.choice(STATUS_LEVELS)
@@ -185,11 +195,13 @@ def main() -> None:
                 db.add(series)
                 db.flush()
 
+                file_path = random.choice(image_paths)
                 image = Image(
                     series_id=series.id,
                     image_uid=str(uuid.uuid4()),
-                    file_path=random.choice(image_paths),
-                    thumbnail_path=None,
+                    file_path=file_path,
+                    thumbnail_path=derived[file_path][0],
+                    preview_path=derived[file_path][1],
                 )
                 db.add(image)
 
@@ -198,10 +210,21 @@ def main() -> None:
                 LUNG_RADS_OPTS = ["2", "3", "4A", "4B"]
                 TEXTURE_OPTS = ["Solid", "Part-Solid", "Ground Glass"]
 
+                # Follow-up studies re-detect most prior nodules (same lobe, grown or
+                # shrunk) and occasionally a new one, so the matcher has real pairs.
+                nodule_specs = [
+                    (prior.location, prior.volume_mm3 * random.uniform(0.9, 1.6))
+                    for prior in prior_nodules
+                    if random.random() < 0.85
+                ]
+                new_count = random.randint(1, 4) if s_idx == 0 else random.randint(0, 1)
+                if not nodule_specs:
+                    new_count = max(new_count, 1)
+                for _ in range(new_count):
+                    nodule_specs.append((random.choice(LOCATIONS), random.uniform(50, 3000)))
+
                 nodules = []
-                nodule_count = random.randint(1, 4)
-                for n_idx in range(nodule_count):
-                    volume = random.uniform(50, 3000)
+                for n_idx, (location, volume) in enumerate(nodule_specs):
                     diameter = diameter_from_volume(volume) + random.uniform(-0.8, 0.8)
                     vdt_days = random.randint(30, 400)
                     risk = risk_from_metrics(volume, vdt_days)
@@ -209,7 +232,7 @@ def main() -> None:
                         QCTNodule(
                             study=study,
                             nodule_uid=f"ND-{study.study_uid}-{n_idx + 1}",
-                            location=random.choice(LOCATIONS),
+                            location=location,
                             volume_mm3=round(volume, 2),
                             diameter_mm=round(diameter, 2),
                             vdt_days=vdt_days,
@@ -220,6 +243,17 @@ def main() -> None:
                     )
                 db.add_all(nodules)
                 db.flush()
+                prior_nodules = nodules
+                studies_by_patient[patient.id].append(
+                    StudySnapshot(
+                        id=study.id,
+                        study_date=study.study_date,
+                        nodules=tuple(
+                            NoduleSnapshot(id=n.id, location=n.location, volume_mm3=n.volume_mm3)
+                            for n in nodules
+                        ),
+                    )
+                )
 
                 volume_total = sum(n.volume_mm3 for n in nodules)
                 mean_diameter = sum(n.diameter_mm for n in nodules) / len(nodules)
@@ -261,36 +295,24 @@ def main() -> None:
 
         db.flush()
 
-        for patient in patients:
-            patient_studies = [s for s in studies if s.patient_id == patient.id]
-            patient_studies.sort(key=lambda s: s.study_date)
-            for prev, curr in zip(patient_studies, patient_studies[1:]):
-                prev_nodule = db.execute(
-                    select(QCTNodule).where(QCTNodule.study_id == prev.id).limit(1)
-                ).scalar_one_or_none()
-                curr_nodule = db.execute(
-                    select(QCTNodule).where(QCTNodule.study_id == curr.id).limit(1)
-                ).scalar_one_or_none()
-                if prev_nodule and curr_nodule:
-                    followup = QCTFollowup(
-                        nodule_id=curr_nodule.id,
-                        prior_study_id=prev.id,
-                        current_study_id=curr.id,
-                        growth_percent=random.uniform(-5, 35),
-                        status="stable" if curr.overall_risk == "low" else "monitor",
-                    )
-                    db.add(followup)
+        db.add_all(
+            QCTFollowup(
+                nodule_id=match.nodule_id,
+                prior_nodule_id=match.prior_nodule_id,
+                prior_study_id=match.prior_study_id,
+                current_study_id=match.current_study_id,
+                growth_percent=match.growth_percent,
+                vdt_days=match.vdt_days,
+                status=match.status,
+            )
+            for match in build_followups(studies_by_patient)
+        )
+        db.flush()
+        rebuild_trajectories(db)
+        refresh_site_stats(db)
 
         for study in studies[:5]:
-            db.add(
-                AccessAudit(
-                    user_id=user.id,
-                    study_id=study.id,
-                    action="seed_view",
-                    ip_address="127.0.0.1",
-                    accessed_at=datetime.utcnow(),
-                )
-            )
+            record_access(db, user_id=user.id, study_id=study.id, action="seed_view", ip_address="127.0.0.1")
 
         db.commit()
     finally:
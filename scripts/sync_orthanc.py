@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from app.core.config import settings
+from app.services.provider import OrthancProvider
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Mirror Orthanc study/series metadata (and one preview per series) into the local tables."
+    )
+    parser.add_argument("--date-from", type=date.fromisoformat, help="first StudyDate (YYYY-MM-DD)")
+    parser.add_argument("--date-to", type=date.fromisoformat, help="last StudyDate (YYYY-MM-DD)")
+    parser.add_argument("--no-previews", action="store_true", help="skip downloading instance previews")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    # One line per HTTP request otherwise.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    query = {}
+    if args.date_from or args.date_to:
+        lower = f"{args.date_from:%Y%m%d}" if args.date_from else ""
+        upper = f"{args.date_to:%Y%m%d}" if args.date_to else ""
+        query["StudyDate"] = f"{lower}-{upper}"
+
+    started = time.perf_counter()
+    total = asyncio.run(OrthancProvider().sync(query=query, previews=not args.no_previews))
+    print(f"Mirrored {total} studies from {settings.orthanc_url} in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
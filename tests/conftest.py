@@ -0,0 +1,85 @@
+"""SQLite-backed fixtures; no PostgreSQL or Orthanc server is needed.
+
+Settings are read when app modules are imported, so the environment is
+pointed at a scratch directory before anything from ``app`` is loaded.
+"""
+from __future__ import annotations
+
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRATCH = Path(tempfile.mkdtemp(prefix="qct-tests-"))
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{SCRATCH / 'qct.db'}",
+    DATABASE_REPLICA_URLS="",
+    IMAGE_DIR=str(SCRATCH / "images"),
+    DATA_SOURCE="mock",
+    AUTH_USERS="demo:demo:Demo Viewer:viewer",
+)
+sys.path.extend([str(ROOT), str(ROOT / "scripts")])
+
+import uvicorn  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine  # noqa: E402
+
+
+@pytest.fixture
+def database():
+    """Empty tables on the SQLite file behind SessionLocal, dropped afterwards."""
+    Base.metadata.create_all(engine)
+    try:
+        yield engine
+    finally:
+        Base.metadata.drop_all(engine)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def fake_orthanc():
+    """``(archive, base_url)`` of scripts/fake_orthanc.py served from a thread."""
+    from fake_orthanc import FakeArchive, build_app
+
+    archive = FakeArchive(studies=6, series=2, instances=1, seed=7)
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(build_app(archive, 0, "", ""), host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("fake Orthanc did not start")
+        time.sleep(0.05)
+    try:
+        yield archive, f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+@pytest.fixture
+def client(database):
+    """Test client of the dashboard, logged in as the demo viewer."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        response = test_client.post("/login", data={"username": "demo", "password": "demo"}, follow_redirects=False)
+        assert response.status_code == 303, response.text
+        yield test_client
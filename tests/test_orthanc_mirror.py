@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import func, select
+
+from app.db.models import Image, Series, Site, Study
+from app.db.session import SessionLocal
+from app.services import derivatives
+from app.services.orthanc import MIRROR_RISK, MIRROR_STATUS, OrthancClient, mirror_from_orthanc
+
+
+def mirror(base_url: str) -> int:
+    async def run() -> int:
+        async with OrthancClient(base_url) as orthanc:
+            return await mirror_from_orthanc(orthanc, batch=4)
+
+    return asyncio.run(run())
+
+
+def test_mirror_upserts_by_uid(database, fake_orthanc):
+    archive, base_url = fake_orthanc
+    assert mirror(base_url) == 6
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count(Study.id))) == 6
+        assert db.scalar(select(func.count(Series.id))) == 12
+        assert db.scalar(select(func.count(Image.id))) == 12
+        assert set(db.execute(select(Study.status, Study.overall_risk))) == {(MIRROR_STATUS, MIRROR_RISK)}
+
+    study_id = next(iter(archive.studies))
+    study_uid = archive.studies[study_id]["MainDicomTags"]["StudyInstanceUID"]
+    with SessionLocal() as db:
+        local_id = db.scalar(select(Study.id).where(Study.study_uid == study_uid))
+    archive.update_study(study_id, {"InstitutionName": "Relocated Imaging"})
+
+    assert mirror(base_url) == 6
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count(Study.id))) == 6
+        assert db.scalar(select(func.count(Series.id))) == 12
+        moved_id, site = db.execute(
+            select(Study.id, Site.name).join(Site, Site.id == Study.site_id).where(Study.study_uid == study_uid)
+        ).one()
+    assert (moved_id, site) == (local_id, "Relocated Imaging")
+
+
+def test_mirrored_study_detail_api(client, fake_orthanc, monkeypatch):
+    _, base_url = fake_orthanc
+    mirror(base_url)
+    with SessionLocal() as db:
+        study_id = db.scalar(select(Study.id).order_by(Study.study_uid).limit(1))
+
+    def render(*args, **kwargs):
+        raise AssertionError("derivatives are rendered at ingest, not per request")
+
+    monkeypatch.setattr(derivatives, "render", render)
+    response = client.get(f"/studies/{study_id}/api")
+    assert response.status_code == 200, response.text
+    detail = response.json()
+    # Mirrored studies have no qCT results until they are analysed.
+    assert detail["status"] == MIRROR_STATUS
+    assert detail["summary"] is None
+    assert detail["nodules"] == []
+    assert detail["image_path"]
+    assert detail["thumbnail_path"].startswith("derived/")
+    assert detail["preview_path"].startswith("derived/")
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+from sqlalchemy import func, select
+
+from app.db.models import IngestionLog, Site, SiteOverviewStats, Study
+from app.db.session import SessionLocal
+from app.services.orthanc import OrthancClient
+from app.services.orthanc_sync import follow_changes, read_checkpoint
+from app.services.site_stats import SITE_STAT_FIELDS, compute_site_stats
+
+
+def follow(base_url: str) -> None:
+    async def run() -> None:
+        async with OrthancClient(base_url) as orthanc:
+            await follow_changes(orthanc, asyncio.Event(), previews=False, until_caught_up=True)
+
+    asyncio.run(run())
+
+
+def assert_caught_up(archive) -> None:
+    assert read_checkpoint() == archive.changes[-1]["Seq"]
+    with SessionLocal() as db:
+        rollup = {
+            row.site_id: {field: getattr(row, field) for field in SITE_STAT_FIELDS}
+            for row in db.scalars(select(SiteOverviewStats))
+        }
+        live = compute_site_stats(db)
+    assert rollup == {
+        site_id: {field: values[field] for field in SITE_STAT_FIELDS} for site_id, values in live.items()
+    }
+
+
+def mirrored(db) -> int:
+    return db.scalar(select(func.count(Study.id)))
+
+
+def test_change_feed_round_trip(database, fake_orthanc):
+    archive, base_url = fake_orthanc
+    follow(base_url)
+    with SessionLocal() as db:
+        assert mirrored(db) == 6
+    assert_caught_up(archive)
+
+    # New and deleted studies, with a transient 503 the worker retries.
+    first, *_ = archive.studies
+    added = [archive.add_study(), archive.add_study()]
+    archive.delete_study(first)
+    httpx.post(f"{base_url}/fake/fail", params={"count": 1}).raise_for_status()
+    follow(base_url)
+    with SessionLocal() as db:
+        # Deletions are not mirrored.
+        assert mirrored(db) == 8
+        new_uids = [archive.studies[study_id]["MainDicomTags"]["StudyInstanceUID"] for study_id in added]
+        logged = db.scalar(
+            select(func.count(func.distinct(IngestionLog.study_id)))
+            .join(Study, Study.id == IngestionLog.study_id)
+            .where(Study.study_uid.in_(new_uids))
+        )
+        assert logged == 2
+    assert_caught_up(archive)
+
+    # A study moving to another institution refreshes the rollup of the site it left as well.
+    moved = added[0]
+    archive.update_study(moved, {"InstitutionName": "Relocated Imaging"})
+    follow(base_url)
+    with SessionLocal() as db:
+        site = db.scalar(
+            select(Site.name)
+            .join(Study, Study.site_id == Site.id)
+            .where(Study.study_uid == archive.studies[moved]["MainDicomTags"]["StudyInstanceUID"])
+        )
+    assert site == "Relocated Imaging"
+    assert_caught_up(archive)
+
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import sys
+import threading
+
+from app.services.profiler import StackSampler
+
+
+def spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_keeps_the_switch_interval():
+    switch_interval = sys.getswitchinterval()
+    stop = threading.Event()
+    busy = threading.Thread(target=spin, args=(stop,), name="busy")
+    busy.start()
+    sampler = StackSampler(0.001)
+    seen = []
+    sampler.select = lambda ident, frame: seen.append(sys.getswitchinterval()) or True
+    try:
+        sampler.run(0.3)
+    finally:
+        stop.set()
+        busy.join()
+    assert sampler.samples > 0
+    assert set(seen) == {switch_interval}
+    assert any(stack.startswith("busy;") and "spin" in stack for stack in sampler.counts)
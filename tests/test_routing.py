@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.security import AuthUser, ensure_db_user
+from app.db.base import Base
+from app.db.models import User
+from app.db.routing import ReplicaRouter, RoutingSession
+from app.db.session import build_engine
+
+READ = select(User.id)
+
+
+@pytest.fixture
+def engines(tmp_path):
+    """Primary and two replicas as separate SQLite files, so each engine's rows are distinct."""
+    built = {
+        name: build_engine(f"sqlite:///{tmp_path / name}.db", name) for name in ("primary", "replica1", "replica2")
+    }
+    for engine in built.values():
+        Base.metadata.create_all(engine)
+    yield built
+    for engine in built.values():
+        engine.dispose()
+
+
+def sessions(router: ReplicaRouter):
+    return sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, router=router)
+
+
+def test_reads_rotate_over_replicas_one_per_session(engines):
+    router = ReplicaRouter(engines["primary"], [engines["replica1"], engines["replica2"]], health_interval=60)
+    Session = sessions(router)
+    chosen = []
+    for _ in range(4):
+        with Session() as db:
+            bind = db.get_bind(clause=READ)
+            # The replica is fixed for the rest of the session.
+            assert db.get_bind(clause=READ) is bind
+            chosen.append(bind)
+    assert chosen == [engines["replica1"], engines["replica2"], engines["replica1"], engines["replica2"]]
+
+
+def test_writes_latch_the_session_to_the_primary(engines):
+    router = ReplicaRouter(engines["primary"], [engines["replica1"]], health_interval=60)
+    Session = sessions(router)
+    with Session() as db:
+        assert db.get_bind(clause=update(User).values(role="viewer")) is engines["primary"]
+        assert db.get_bind(clause=READ) is engines["primary"]
+    with Session() as db:
+        assert db.get_bind(clause=READ) is engines["replica1"]
+        db.add(User(username="flushed", display_name="Flushed", role="viewer"))
+        db.flush()
+        assert db.get_bind(clause=READ) is engines["primary"]
+        db.commit()
+    with engines["primary"].connect() as conn:
+        assert conn.scalar(select(func.count(User.id))) == 1
+    with Session() as db:
+        db.use_primary()
+        assert db.get_bind(clause=READ) is engines["primary"]
+
+
+def test_unhealthy_replicas_fall_back_to_the_primary(engines, tmp_path):
+    broken = build_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}", "broken")
+    router = ReplicaRouter(engines["primary"], [broken], health_interval=0)
+    with sessions(router)() as db:
+        assert db.get_bind(clause=READ) is engines["primary"]
+    assert router.check_health() == {str(broken.url): False}
+
+
+def test_least_load_picks_the_replica_with_fewer_checked_out_connections(engines):
+    router = ReplicaRouter(
+        engines["primary"], [engines["replica1"], engines["replica2"]], strategy="least_load", health_interval=60
+    )
+    with engines["replica1"].connect():
+        assert router.read_engine() is engines["replica2"]
+
+
+def test_ensure_db_user_confirms_a_replica_miss_on_the_primary(engines):
+    router = ReplicaRouter(engines["primary"], [engines["replica1"]], health_interval=60)
+    Session = sessions(router)
+    with engines["primary"].begin() as conn:
+        conn.execute(User.__table__.insert().values(username="lagging", display_name="Lagging", role="viewer"))
+    auth_user = AuthUser(username="lagging", display_name="Lagging", role="viewer")
+
+    # The replica has not caught up: the primary's row is returned, not a duplicate insert.
+    with Session() as db:
+        user = ensure_db_user(db, auth_user)
+        assert user.username == "lagging"
+    with engines["primary"].connect() as conn:
+        assert conn.scalar(select(func.count(User.id))) == 1
+
+    # Unknown everywhere: inserted on the primary only.
+    with Session() as db:
+        ensure_db_user(db, AuthUser(username="new", display_name="New", role="viewer"))
+    with engines["primary"].connect() as conn:
+        assert conn.scalar(select(User.username).where(User.username == "new")) == "new"
+    with engines["replica1"].connect() as conn:
+        assert conn.scalar(select(func.count(User.id))) == 0
+
+
+def test_ensure_db_user_served_by_the_replica_stays_off_the_primary(engines):
+    router = ReplicaRouter(engines["primary"], [engines["replica1"]], health_interval=60)
+    with engines["replica1"].begin() as conn:
+        conn.execute(User.__table__.insert().values(username="synced", display_name="Synced", role="viewer"))
+    with sessions(router)() as db:
+        user = ensure_db_user(db, AuthUser(username="synced", display_name="Synced", role="viewer"))
+        assert user.username == "synced"
+        assert db.get_bind(clause=READ) is engines["replica1"]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import gzip
+
+import brotli
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.api.staticfiles import PrecompressedStaticFiles
+
+BODY = b"body { color: #123456; }\n" * 64
+
+
+@pytest.fixture
+def static(tmp_path):
+    (tmp_path / "app.css").write_bytes(BODY)
+    (tmp_path / "app.css.gz").write_bytes(gzip.compress(BODY))
+    (tmp_path / "app.css.br").write_bytes(brotli.compress(BODY))
+    (tmp_path / "plain.css").write_bytes(BODY)
+    app = Starlette(routes=[Mount("/static", PrecompressedStaticFiles(directory=tmp_path))])
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    [
+        ("br, gzip", "br"),
+        ("gzip;q=1, br;q=0.1", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("*", "br"),
+        ("*;q=0", None),
+        ("identity", None),
+    ],
+)
+def test_precompressed_variant_follows_q_values(static, accept_encoding, expected):
+    response = static.get("/static/app.css", headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == expected
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_missing_variants_are_not_offered(static):
+    response = static.get("/static/plain.css", headers={"Accept-Encoding": "br, gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == BODY
+
+
+def test_range_is_served_from_the_identity_file(static):
+    response = static.get("/static/app.css", headers={"Accept-Encoding": "br", "Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert "content-encoding" not in response.headers
+    assert response.content == BODY[:10]
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import select
+
+from app.db.models import NoduleTrajectoryPoint, Site, Study
+from app.db.session import SessionLocal
+
+
+@pytest.fixture
+def tracked(client):
+    """A patient and nodule with a trajectory, their study's site and another site."""
+    import seed_fake_data
+
+    seed_fake_data.main()
+    with SessionLocal() as db:
+        patient_id, nodule_id, site_id = db.execute(
+            select(NoduleTrajectoryPoint.patient_id, NoduleTrajectoryPoint.nodule_id, Study.site_id)
+            .join(Study, Study.id == NoduleTrajectoryPoint.study_id)
+            .limit(1)
+        ).one()
+        other_site_id = db.scalar(select(Site.id).where(Site.id != site_id).limit(1))
+    return patient_id, nodule_id, site_id, other_site_id
+
+
+def test_trajectories_respect_site_scope(client, tracked):
+    patient_id, nodule_id, site_id, other_site_id = tracked
+    for path in (f"/trajectories/patients/{patient_id}/api", f"/trajectories/nodules/{nodule_id}/api"):
+        assert client.get(path).status_code == 200
+        assert client.get(path, params={"site_id": str(site_id)}).status_code == 200
+        assert client.get(path, params={"site_id": str(other_site_id)}).status_code == 404